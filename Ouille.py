@@ -1,316 +1,283 @@
 import telebot
 from telebot.types import InlineKeyboardMarkup, InlineKeyboardButton
-import random
-from threading import Timer
 import time
-import json
 import threading
 import os
-from flask import Flask
-from types import SimpleNamespace
+import atexit
+import hmac
+import asyncio
+import concurrent.futures
+import functools
+import urllib.request
+import urllib.error
+from flask import Flask, request
+from webhook import IngestionWebhook
+from envoi import DistributeurEnvois
+from planificateur import Planificateur
+from acteurs import PoolActeurs
+from boucle import Horloge, PlanificateurBoucle, ActeursBoucle, EnvoisBoucle, BotBoucle, ApiBoucle, RelaisWebhook, configurer_session
+from routeur import Routeur
+from partitions import Repartiteur
+from metriques import Metriques, instrumenter_handlers, envoyeur_instrumente, requete_async_instrumentee, fusionner_expositions
+from profilage import Traces, echantillonner, repliees
+from stats import ouvrir_stats
+from classement import Classement, PagesClassement
+from annuaire import AnnuaireNoms
+from reprise import ArchiveParties
+from faucheuse import Faucheuse
+from analyse import AnalyseMots
+from journal import Journal
+from sauvegarde import Sauvegarde, SUFFIXE_INSTANTANE, SUFFIXE_DELTA
+from registre import RegistreDictionnaires
+from correspondance import NIVEAUX
+from moteur import Game, Transport, MOTARENA_ID, motArena_user
 TOKEN = os.getenv("BOT_TOKEN")
-bot = telebot.TeleBot(TOKEN)
-bot_username = bot.get_me().username
+# 🌐 Mode webhook optionnel : définir WEBHOOK_URL (ex. https://mon-app.onrender.com)
+WEBHOOK_URL = os.getenv("WEBHOOK_URL")
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET")
+# 🌀 Moteur d'exécution : "threads" (défaut), "asyncio" (une boucle, chronos loop.call_later,
+# une seule session HTTP keep-alive) ou "processus" (un front + PROCESSUS processus,
+# chaque chat épinglé à l'un d'eux) ; les handlers et les règles du jeu sont les mêmes
+RUNTIME = os.getenv("RUNTIME", "threads")
+PROCESSUS = int(os.getenv("PROCESSUS", os.cpu_count() or 2))
+# 🏆 En mode processus : retard maximal du classement sur les victoires des autres processus
+RAFRAICHIR_CLASSEMENT = float(os.getenv("RAFRAICHIR_CLASSEMENT", 5))
+# 📈 En mode processus, chaque partition sert /metrics et /debug/* sur 127.0.0.1:PORT_PARTITIONS+indice.
+# Le /metrics du front les rassemble (étiquette partition="front", "0", "1"…) ;
+# /debug/profil et /debug/traces visent le front, ou la partition i avec ?partition=i
+PORT_PARTITIONS = int(os.getenv("PORT_PARTITIONS", int(os.getenv("PORT", 8000)) + 1))
+# 🧪 API Telegram alternative (ex. le faux serveur de bench/) : TELEGRAM_API_URL=http://127.0.0.1:18081
+if os.getenv("TELEGRAM_API_URL"):
+    telebot.apihelper.API_URL = os.getenv("TELEGRAM_API_URL").rstrip("/") + "/bot{0}/{1}"
+    telebot.apihelper.FILE_URL = os.getenv("TELEGRAM_API_URL").rstrip("/") + "/file/bot{0}/{1}"
+# Middlewares activés pour noter les noms des joueurs à chaque update
+telebot.apihelper.ENABLE_MIDDLEWARE = True
+# 🎭 Un acteur par chat : messages, clics et chronos d'un même chat passent
+# dans l'ordre par sa boîte aux lettres ; les chats différents tournent en parallèle
+acteurs = PoolActeurs(
+    nb_workers=int(os.getenv("ACTEURS_WORKERS", 8)),
+    capacite=int(os.getenv("ACTEURS_CAPACITE", 200))
+)
+
+def chat_de_update(update):
+    for champ in ("message", "edited_message", "channel_post", "callback_query", "my_chat_member", "chat_member"):
+        objet = getattr(update, champ, None)
+        if objet is None:
+            continue
+        if champ == "callback_query":
+            objet = objet.message
+        chat = getattr(objet, "chat", None)
+        if chat is not None:
+            return chat.id
+    return None
+
+# 🔬 Une trace par update et par chrono (handlers, appels API, stats) ; les plus lentes
+# sont lisibles sur /debug/traces
+traces = Traces(capacite=int(os.getenv("TRACES_CAPACITE", 2000)))
+# 🔐 Jeton des routes /debug/* (absentes si non défini)
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+# 🚦 Tri à l'entrée : le bavardage des groupes sans partie en cours ne va pas plus loin
+routeur = Routeur()
+
+class BotActeurs(telebot.TeleBot):
+    # Polling comme webhook appellent process_new_updates : chaque update utile est
+    # déposée dans la boîte de son chat, les handlers tournent dans l'acteur
+    def process_new_updates(self, updates):
+        for update in updates:
+            if not routeur.accepter(update):
+                continue
+            chat_id = chat_de_update(update)
+            if not acteurs.proposer(chat_id, self.traiter, update, chat_id):
+                print(f"⚠️ Chat {chat_id} saturé, update {update.update_id} ignorée")
+
+    def traiter(self, update, chat_id):
+        # Dans l'acteur : dispatch telebot et handler sous une même trace
+        traces.tracer("update", telebot.TeleBot.process_new_updates, self, [update],
+                      update_id=update.update_id, chat_id=chat_id)
+
+# Les acteurs exécutent les handlers : pas besoin du pool de threads de telebot
+bot = BotActeurs(TOKEN, threaded=False)
+# 🪪 Identité du bot, demandée à Telegram seulement quand l'app démarre
+bot_username = None
+# 📤 Tous les messages sortants passent par ce distributeur (débit limité, non bloquant)
+envois = DistributeurEnvois(bot)
+# ⏱️ Un seul thread pour tous les chronos de toutes les parties
+planificateur = Planificateur()
 
-with open("dictionnaire.json", "r", encoding="utf-8") as f:
-    data = json.load(f)
-    
 CREATOR_ID = 8659372528  
-SYNONYMES = data["synonymes"]
-ANTONYMES = data["antonymes"]
+# 📚 Dictionnaires nommés ("standard" = dictionnaire.json, les autres dans dictionnaires/),
+# chargés au premier usage, rechargés à chaud quand leur fichier change.
+# Si un .mdb à jour existe (python compiler_dico.py), il est projeté en mémoire.
+registre = RegistreDictionnaires(capacite=int(os.getenv("DICO_CAPACITE", 4)))
+# 🔤 Tolérance par défaut des réponses : "stricte", "souple" ou "tolerante"
+TOLERANCE_DEFAUT = os.getenv("TOLERANCE", "souple")
 COMMANDES_DM_AUTORISÉES = ["/start", "/gradin", "/bilan" , "/joueurs" , "/reset", "/document" ]
 VICTOIRES_FILE = "victoires.json"
-MOTARENA_ID = -999  # Un ID fixe et fictif pour identifier le bot dans la partie
-motArena_user = SimpleNamespace(id=MOTARENA_ID, username="motArena", first_name="MotArena")
-VANNES_MOTARENA = [
-    "T’as pas perdu, t’as juste montré au monde à quel point t’es nul.",
-    "Même un mur aurait mieux joué que toi… au moins lui il bloque.",
-    "Tu joues ou tu testes le bouton 'honte' en boucle ?",
-    "T'as le QI d’un caillou, sans la solidité.",
-    "Joue encore une fois… qu’on rigole tous ensemble.",
-    "Tu frappes à la porte de la victoire avec un doigt cassé.",
-    "J’ai pas gagné… c’est toi qui t’es écrasé tout seul.",
-    "Tu veux une revanche ? Pourquoi ? Pour t'humilier deux fois ?",
-    "Même avec Google dans la main, t'aurais perdu.",
-    "Ton cerveau c’est du Wi-Fi public : lent, instable, et tout le monde l’utilise.",
-    "Chaque fois que tu joues, le mot 'espoir' démissionne.",
-    "Tu devrais être payé pour autant rater, c’est du talent à ce stade.",
-    "Joue pas avec moi, joue au loto, t’as plus de chances là-bas.",
-    "T’as le niveau d’un tutoriel… et encore, version bêta.",
-    "À ce niveau de nullité, c’est plus une défaite, c’est une œuvre d’art."
-]
+# 📊 Backend des stats : "sqlite" (défaut, importe victoires.json une fois) ou "json"
+STATS_BACKEND = os.getenv("STATS_BACKEND", "sqlite")
+STATS_DB = os.getenv("STATS_DB", "victoires.sqlite3")
+# 💾 Parties en cours, réécrites seulement quand elles changent, reprises au démarrage
+PARTIES_DB = os.getenv("PARTIES_DB", "parties.sqlite3")
+# 📐 Durées de réponse, erreurs et inactivité par mot ; "adaptatif" pondère le tirage
+# vers une difficulté croissante au fil de la partie, "uniforme" garde l'ancien tirage
+ANALYSE_DB = os.getenv("ANALYSE_DB", "analyse.sqlite3")
+TIRAGE = os.getenv("TIRAGE", "adaptatif")
+# 📜 Journal append-only de chaque transition de partie (gzip, rotation quotidienne ou
+# à JOURNAL_TAILLE_MO), relu hors ligne par python rejouer.py ; JOURNAL_DIR= vide le désactive
+JOURNAL_DIR = os.getenv("JOURNAL_DIR", "journal")
+JOURNAL_TAILLE_MO = int(os.getenv("JOURNAL_TAILLE_MO", 32))
+JOURNAL_JOURS = int(os.getenv("JOURNAL_JOURS", 14))
 
 
 GROUPE_SAUVEGARDE_ID = -1002898826193  # Mets ici l'ID du groupe
 
-def auto_stock():
-    while True:
-        try:
-            with open("victoires.json", "rb") as f:
-                bot.send_document(GROUPE_SAUVEGARDE_ID, f, caption="📦 Sauvegarde automatique")
-        except Exception as e:
-            print("❌ Erreur auto-stock :", e)
-        time.sleep(300)  # Toutes les 5 minutes
+# 💾 Ouverts par creer_app() : importer ce module ne touche ni au disque ni au réseau
+stats = None
+# 🏆 Index du classement tenu à jour à chaque résultat (rang et pages en O(log n))
+index_classement = Classement(exclus=[MOTARENA_ID])
+# 📇 Noms affichés dans /gradin, notés au passage : aucun get_chat au rendu
+annuaire = None
+# Appels ponctuels hors envois (annuaire, documents) : le bot synchrone, ou la
+# session aiohttp partagée en RUNTIME=asyncio
+api = bot
+# 📦 Sauvegardes envoyées seulement quand les stats changent (instantané + deltas gzip)
+sauvegarde = None
+archive_parties = None
+analyse = None
+journal = None
+# 🧹 Parties sans aucune activité depuis PARTIE_TTL secondes (salons abandonnés,
+# parties bloquées) : fermées et leurs chronos annulés, vérifié toutes les FAUCHEUSE_INTERVALLE
+faucheuse = Faucheuse(ttl=int(os.getenv("PARTIE_TTL", 900)))
+FAUCHEUSE_INTERVALLE = int(os.getenv("FAUCHEUSE_INTERVALLE", 60))
+# 🧩 Indice de ce processus en mode processus (None = processus unique)
+partition_id = None
+derniere_reinitialisation = None
+# 🌀 RUNTIME=asyncio : un thread à part pour les écritures du store (commits SQLite,
+# fichier JSON), dans l'ordre, pour que la boucle ne les attende jamais
+executeur_stats = None
+# 🧩 RUNTIME=processus : version des stats déjà reflétée par index_classement.
+# Le verrou couvre écriture + mise à jour locale de l'index d'un côté, lecture
+# + reconstruction de l'autre : une victoire n'est jamais comptée deux fois
+verrou_classement = threading.Lock()
+version_classement = None
+
+def ecrire_stats(uid, victoires, defaites):
+    try:
+        with traces.span("stats"):
+            stats.incrementer(uid, victoires=victoires, defaites=defaites)
+        sauvegarde.noter()
+    except Exception as e:
+        print(f"❌ Écriture des stats de {uid} impossible :", e)
+
+def comptabiliser(uid, victoires=0, defaites=0):
+    global version_classement
+    if executeur_stats is not None:
+        executeur_stats.submit(ecrire_stats, uid, victoires, defaites)
+        index_classement.ajouter(uid, victoires)
+        return
+    with verrou_classement:
+        connue = version_classement
+        ecrire_stats(uid, victoires, defaites)
+        index_classement.ajouter(uid, victoires)
+        # Notre commit seul depuis la dernière reconstruction : rien à relire
+        if connue is not None and stats.version() == connue + 1:
+            version_classement = connue + 1
+
+def remplacer_stats(donnees):
+    global version_classement
+    stats.remplacer(donnees)
+    with verrou_classement:
+        if version_classement is not None:
+            version_classement = stats.version()
+        index_classement.reconstruire(stats.tous())
+    sauvegarde.noter()
 
-threading.Thread(target=auto_stock).start()
-        
-        
-def load_victoires():
-    if not os.path.exists(VICTOIRES_FILE):
-        return {}
-    with open(VICTOIRES_FILE, "r", encoding="utf-8") as f:
-        return json.load(f)
-
-def save_victoires(data):
-    with open(VICTOIRES_FILE, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-victoires_globales = load_victoires()
 games = {}
 
-class Game:
-    def __init__(self, chat_id, mode=None):
+### ━━━ Journal des parties ━━━
+
+# Transitions du moteur recopiées telles quelles dans le journal
+JOURNALISES = {"inscription", "debut", "cycle", "question", "reponse", "temps", "elimination", "fin"}
+
+def journaliser(game, type_, **donnees):
+    if journal is not None and game.ident is not None:
+        journal.noter(game.chat_id, game.ident, type_, donnees)
+
+def nouvel_ident(chat_id):
+    return f"{chat_id}:{int(time.time() * 1000)}"
+
+### ━━━ Adaptateur Telegram du moteur ━━━
+
+class TransportTelegram(Transport):
+    # Un transport par partie : ses chronos reviennent dans la boîte de son chat
+    def __init__(self, chat_id):
         self.chat_id = chat_id
-        self.mode = mode
-        self.players = []
-        self.usernames = {}
-        self.current_index = 0
-        self.used_words = set()
-        self.turn_count = {}
-        self.timer = None
-        self.active = False
-        self.current_word = ""
-        self.current_player = None
-        self.eliminated = set()
-        self.countdown_started = False
-        self.countdown_timer = None
-        self.countdown_thread = None
-        self.countdown_seconds = 30
-        self.countdown_cancelled = False
-
-    def get_name(self, user):
-        return f"@{user.username}" if user.username else f"<n>{user.first_name}</n>"
-
-    def silent_cancel_countdown(self):
-        self.countdown_cancelled = True
-        if self.countdown_thread:
-            self.countdown_thread.cancel()
-            self.countdown_thread = None
-
-    def cancel_countdown(self):
-        self.countdown_cancelled = True
-        if self.countdown_thread:
-            self.countdown_thread.cancel()
-            self.countdown_thread = None
-        bot.send_message(self.chat_id, "⏸️ Le compte à rebours est suspendu. Tape /flashgame pour commencer quand tu veux.")
-
-    def start_countdown(self):
-        self.countdown_started = True
-        self.countdown_seconds = 30
-        self.countdown_cancelled = False
-        bot.send_message(self.chat_id, "<b>Début automatique dans 30 secondes…</b>", parse_mode="HTML")
-        self.countdown_thread = Timer(0, self.countdown_step)
-        self.countdown_thread.start()
-
-    def countdown_step(self):
-        if self.countdown_cancelled:
-            return
-        if self.countdown_seconds <= 0:
-            self.start_game()
-            return
-        if self.countdown_seconds in [30, 25, 20, 15, 10, 5]:
-            bot.send_message(self.chat_id, f"⏳ Début dans {self.countdown_seconds} secondes…")
-        self.countdown_seconds -= 5
-        self.countdown_thread = Timer(5, self.countdown_step)
-        self.countdown_thread.start()
-
-    def add_player(self, user):
-        if user.id in [p.id for p in self.players] or self.active:
-            return False
-        if len(self.players) >= 69:
-            bot.send_message(self.chat_id, "⛔ La partie est pleine (4 joueurs max).")
-            return False
-        self.players.append(user)
-        self.usernames[user.id] = user.username or user.first_name
-        self.turn_count[user.id] = 0
-        bot.send_message(
-            self.chat_id,
-            f"✅ {self.get_name(user)} a rejoint la partie ({len(self.players)}/69)",
-            parse_mode="HTML"
-        )
-        if len(self.players) >= 2 and not self.countdown_started:
-            self.start_countdown()
-        return True
-
-    def start_game(self):
-        # Couper immédiatement le chrono de compte à rebours
-        self.silent_cancel_countdown()
-        if len(self.players) < 2:
-            bot.send_message(self.chat_id, "⛔ Pas assez de joueurs pour commencer.")
-            return
-        self.active = True
-        self.ask_next()
-
-    def ask_next(self):
-        if not self.active:
-            return
-
-        # Couper immédiatement le chrono précédent
-        if self.timer:
-            self.timer.cancel()
-            self.timer = None
-
-        self.current_player = self.players[self.current_index]
-        self.turn_count[self.current_player.id] += 1
-
-        word_list = SYNONYMES if self.mode == "synonyme" else ANTONYMES
-        available_words = list(word_list.keys())
-
-        word = random.choice(available_words)
-        while word in self.used_words and len(self.used_words) < len(available_words):
-            word = random.choice(available_words)
-
-        self.current_word = word
-        self.used_words.add(word)
-
-        if self.current_player.id == MOTARENA_ID:
-            reponse = random.choice(word_list[word])
-            bot.send_message(
-                self.chat_id,
-                f"<b>Tour de motArena</b>\n<blockquote>Mot : <b>{word}</b>\nMode : {self.mode}</blockquote>",
-                parse_mode="HTML"
-            )
-            time.sleep(2)
-            bot.send_message(self.chat_id, f"💬 motArena : \"{reponse}\" 😏", parse_mode="HTML")
-            self.validate(self.current_player, reponse)
-        else:
-            nom = self.get_name(self.current_player)
-            temps = 20 if self.turn_count[self.current_player.id] <= 2 else 10
-            bot.send_message(
-                self.chat_id,
-                f"<b>Tour de {nom}</b>\n<blockquote>Mot : <b>{word}</b>\nMode : {self.mode}</blockquote>\nTu as {temps} secondes !",
-                parse_mode="HTML"
-            )
-            self.timer = Timer(temps, self.timeout)
-            self.timer.start()
-
-    def timeout(self):
-        name = self.get_name(self.current_player)
-        bot.send_message(self.chat_id, f"❌ <b>{name} a perdu par inactivité !</b>", parse_mode="HTML")
-        self.eliminated.add(self.current_player.id)
-
-        user_id = str(self.current_player.id)
-        if user_id not in victoires_globales:
-            victoires_globales[user_id] = {"victoires": 0, "defaites": 1}
-        else:
-            if isinstance(victoires_globales[user_id], int):
-                victoires_globales[user_id] = {"victoires": victoires_globales[user_id], "defaites": 1}
-            else:
-                victoires_globales[user_id]["defaites"] = victoires_globales[user_id].get("defaites", 0) + 1
-
-        save_victoires(victoires_globales)
-        self.check_winner_or_continue()
-
-    def validate(self, user, word):
-        # Ignorer toutes les réponses des joueurs éliminés
-        if user.id in self.eliminated:
-            return
-            
-        if not self.active or user.id != self.current_player.id:
-            return
-
-        word = word.lower().strip()
-
-        if word == self.current_word or word in self.used_words:  
-            bot.send_message(self.chat_id, f"⚠️ Ce mot a déjà été utilisé {self.get_name(user)}. Essaie un autre !", parse_mode="HTML")  
-    
-            if user.id == MOTARENA_ID:
-                time.sleep(1)
-                self.ask_next()
-    
-                return
-
-        valid_list = SYNONYMES.get(self.current_word, []) if self.mode == 'synonyme' else ANTONYMES.get(self.current_word, [])
-        if word in valid_list:
-            self.used_words.add(word)
-            bot.send_message(self.chat_id, f"✅ <b>{self.get_name(user)}</b> a réussi !", parse_mode="HTML")
-            # Couper immédiatement le chrono quand une bonne réponse est donnée
-            if self.timer:
-                self.timer.cancel()
-                self.timer = None
-            self.current_index = (self.current_index + 1) % len(self.players)
-            self.skip_eliminated()
-            self.ask_next()
-            return
-
-        bot.send_message(self.chat_id, f"⚠️ Mauvaise réponse {self.get_name(user)}. Tu peux réessayer !", parse_mode="HTML")
-
-    def skip_eliminated(self):
-        while self.players[self.current_index].id in self.eliminated:
-            self.current_index = (self.current_index + 1) % len(self.players)
-
-    def check_winner_or_continue(self):
-        alive = [p for p in self.players if p.id not in self.eliminated]
-
-        if len(alive) == 1:
-            winner = alive[0]
-            winner_name = self.get_name(winner)
-            bot.send_message(self.chat_id, f"🎉 <b>{winner_name} a gagné la partie !</b>", parse_mode="HTML")
-
-            if winner.id == MOTARENA_ID:
-                vanne = random.choice(VANNES_MOTARENA)
-                time.sleep(1.5)
-                bot.send_message(self.chat_id, f"💬 motArena : « {vanne} »", parse_mode="HTML")
-            else:
-                uid = str(winner.id)
-                if uid not in victoires_globales:
-                    victoires_globales[uid] = {"victoires": 1, "defaites": 0}
-                else:
-                    if isinstance(victoires_globales[uid], int):
-                        victoires_globales[uid] = {"victoires": victoires_globales[uid] + 1, "defaites": 0}
-                    else:
-                        victoires_globales[uid]["victoires"] = victoires_globales[uid].get("victoires", 0) + 1
-
-                save_victoires(victoires_globales)
 
-            try:
-                with open("victoires.json", "rb") as f:
-                    bot.send_document(CREATOR_ID, f, caption="📦 Sauvegarde après victoire")
-            except Exception as e:
-                print("Erreur envoi auto-stock :", e)
-
-            self.active = False
-            # Couper le chrono à la fin de partie
-            if self.timer:
-                self.timer.cancel()
-                self.timer = None
-            del games[self.chat_id]
-        else:
-            # Couper le chrono avant de passer au joueur suivant
-            if self.timer:
-                self.timer.cancel()
-                self.timer = None
-            self.current_index = (self.current_index + 1) % len(self.players)
-            self.skip_eliminated()
-            self.ask_next()
+    def envoyer(self, chat_id, texte, parse_mode=None):
+        envois.envoyer(chat_id, texte, parse_mode)
+
+    def planifier(self, delai, fn, *args):
+        return planificateur.planifier(delai, acteurs.poster, self.chat_id, traces.tracer, "chrono:" + fn.__name__, fn, *args)
+
+    def dictionnaire(self, nom):
+        try:
+            return registre.obtenir(nom)
+        except Exception as e:
+            print(f"❌ Dictionnaire '{nom}' indisponible :", e)
+            raise
+
+    def table_mots(self, mode, pool, mots_joues):
+        if TIRAGE != "adaptatif":
+            return None
+        return analyse.table(mode, pool, mots_joues)
+
+    def evenement(self, game, nom, **donnees):
+        if nom in JOURNALISES:
+            # Joueurs réduits à leur identifiant
+            journaliser(game, nom, **{cle: getattr(v, "id", v) for cle, v in donnees.items()})
+        if nom == "tour":
+            analyse.noter(game.mode, donnees["mot"], donnees["trouve"], donnees["duree"], donnees["erreurs"])
+        elif nom == "victoire":
+            comptabiliser(donnees["joueur"].id, victoires=1)
+        elif nom == "defaite":
+            comptabiliser(donnees["joueur"].id, defaites=1)
+        elif nom == "debut":
+            routeur.attendre(game.chat_id)
+        elif nom == "modifiee":
+            # Une partie remplacée (ex. après /reset) n'est plus archivée
+            if games.get(game.chat_id) is game:
+                archive_parties.noter(game.chat_id, game.instantane(time.time()))
+                faucheuse.toucher(game.chat_id)
+        elif nom == "fin":
+            if games.get(game.chat_id) is game:
+                del games[game.chat_id]
+                archive_parties.oublier(game.chat_id)
+                routeur.liberer(game.chat_id)
+                faucheuse.oublier(game.chat_id)
+
+
 ### ━━━ Commandes Telegram ━━━
 
+@bot.middleware_handler(update_types=["message", "callback_query"])
+def noter_nom(bot_instance, update):
+    if update.from_user:
+        annuaire.noter(update.from_user)
+
 # ➤ Bloque les commandes interdites en DM
 @bot.message_handler(func=lambda message: message.chat.type == "private" and message.text.startswith("/") and message.text.split()[0] not in COMMANDES_DM_AUTORISÉES)
 def bloquer_commandes_dm(message):
-    bot.send_message(message.chat.id, "🚫 Cette commande n'est disponible que dans les groupes.")
+    envois.envoyer(message.chat.id, "🚫 Cette commande n'est disponible que dans les groupes.")
 
 
 @bot.message_handler(commands=['joueurs'])
 def nombre_joueurs(message):
     chat_id = message.chat.id
 
-    total = len(victoires_globales)
+    total = index_classement.joueurs()
     texte = f"👥 <b>Nombre de joueurs enregistrés :</b> <code>{total}</code>"
 
-    try:
-        bot.send_message(chat_id, texte, parse_mode="HTML")
-    except Exception as e:
-        print("Erreur envoi nombre de joueurs :", e)
+    envois.envoyer(chat_id, texte, parse_mode="HTML")
         
 
 @bot.message_handler(commands=['bot'])
@@ -318,23 +285,23 @@ def ajouter_bot(message):
     chat_id = message.chat.id
 
     if chat_id not in games:
-        bot.send_message(chat_id, "❌ Aucune partie en cours.")
+        envois.envoyer(chat_id, "❌ Aucune partie en cours.")
         return
 
     game = games[chat_id]
 
     if game.active:
-        bot.send_message(chat_id, "⛔ La partie a déjà commencé.")
+        envois.envoyer(chat_id, "⛔ La partie a déjà commencé.")
         return
     if game.mode is None:
-        bot.answer_callback_query(call.id, text="⚠️ Choisis un mode avant d’ajouter motArena.", show_alert=True)
+        envois.envoyer(chat_id, "⚠️ Choisis un mode avant d’ajouter motArena.")
         return
-    if any(p.id == MOTARENA_ID for p in game.players):
-        bot.send_message(chat_id, "🤖 Le bot motArena est déjà dans la partie.")
+    if game.contient(MOTARENA_ID):
+        envois.envoyer(chat_id, "🤖 Le bot motArena est déjà dans la partie.")
         return
 
     game.add_player(motArena_user)
-    bot.send_message(chat_id, "🤖 Le bot <b>motArena</b> a rejoint la partie ! Préparez-vous à perdre... 💀", parse_mode="HTML")        
+    envois.envoyer(chat_id, "🤖 Le bot <b>motArena</b> a rejoint la partie ! Préparez-vous à perdre... 💀", parse_mode="HTML")        
                         
 @bot.message_handler(commands=['startgame'])
 def start_game(message):
@@ -342,10 +309,12 @@ def start_game(message):
     user = message.from_user
 
     if chat_id in games:
-        bot.send_message(chat_id, "⚠️ Une partie est déjà en cours ou en attente.")
+        envois.envoyer(chat_id, "⚠️ Une partie est déjà en cours ou en attente.")
         return
    
-    games[chat_id] = Game(chat_id)
+    games[chat_id] = Game(chat_id, TransportTelegram(chat_id), tolerance=TOLERANCE_DEFAUT)
+    games[chat_id].ident = nouvel_ident(chat_id)
+    journaliser(games[chat_id], "creation", createur=user.id, tolerance=TOLERANCE_DEFAUT, dico=games[chat_id].dico_nom)
     games[chat_id].add_player(user)
 
     nom_createur = games[chat_id].get_name(user)
@@ -356,30 +325,30 @@ def start_game(message):
         InlineKeyboardButton("➕ Rejoindre", callback_data="rejoindre_partie"),
         InlineKeyboardButton("🤖 Inviter motArena", callback_data="ajouter_bot")
     )
-    bot.send_message(chat_id, texte, parse_mode="HTML", reply_markup=join_markup)
+    envois.envoyer(chat_id, texte, parse_mode="HTML", reply_markup=join_markup)
 
     mode_markup = InlineKeyboardMarkup()
     mode_markup.add(
         InlineKeyboardButton("🎯 Synonymes", callback_data="mode_synonyme"),
         InlineKeyboardButton("🚫 Antonymes", callback_data="mode_antonyme")
     )
-    bot.send_message(chat_id, "<b>Choisis un mode :</b>", parse_mode="HTML", reply_markup=mode_markup)
+    envois.envoyer(chat_id, "<b>Choisis un mode :</b>", parse_mode="HTML", reply_markup=mode_markup)
     
 @bot.callback_query_handler(func=lambda call: call.data == "ajouter_bot")
 def ajouter_motarena(call):
     chat_id = call.message.chat.id
 
     if chat_id not in games:
-        bot.answer_callback_query(call.id, text="❌ Aucune partie en attente.")
+        envois.appeler(chat_id, "answer_callback_query", call.id, text="❌ Aucune partie en attente.")
         return
 
     game = games[chat_id]
     if game.mode is None:
-        bot.answer_callback_query(call.id, text="⚠️ Choisis un mode avant d’ajouter motArena.", show_alert=True)
+        envois.appeler(chat_id, "answer_callback_query", call.id, text="⚠️ Choisis un mode avant d’ajouter motArena.", show_alert=True)
         return         
      
-    if any(p.id == MOTARENA_ID for p in game.players):
-        bot.answer_callback_query(call.id, text="ℹ️ motArena est déjà dans la partie.")
+    if game.contient(MOTARENA_ID):
+        envois.appeler(chat_id, "answer_callback_query", call.id, text="ℹ️ motArena est déjà dans la partie.")
         return
 
     # ⚙️ Création d’un utilisateur factice pour motArena
@@ -390,7 +359,7 @@ def ajouter_motarena(call):
             self.first_name = "motArena"
 
     game.add_player(BotUser())
-    bot.answer_callback_query(call.id, text="🤖 motArena a rejoint la partie.")
+    envois.appeler(chat_id, "answer_callback_query", call.id, text="🤖 motArena a rejoint la partie.")
         
 @bot.callback_query_handler(func=lambda call: call.data == "rejoindre_partie")
 def rejoindre_via_bouton(call):
@@ -398,46 +367,46 @@ def rejoindre_via_bouton(call):
     user = call.from_user
 
     if chat_id not in games:
-        bot.answer_callback_query(call.id, text="❌ Aucune partie en attente.")
+        envois.appeler(chat_id, "answer_callback_query", call.id, text="❌ Aucune partie en attente.")
         return
 
     game = games[chat_id]
 
     if game.active:
-        bot.answer_callback_query(call.id, text="⛔ La partie a déjà commencé.")
+        envois.appeler(chat_id, "answer_callback_query", call.id, text="⛔ La partie a déjà commencé.")
         return
 
     if game.mode is None:
-        bot.answer_callback_query(call.id, text="⚠️ Aucun mode n’a encore été choisi.")
+        envois.appeler(chat_id, "answer_callback_query", call.id, text="⚠️ Aucun mode n’a encore été choisi.")
         return
 
-    if user.id in [p.id for p in game.players]:
-        bot.answer_callback_query(call.id, text="ℹ️ Tu es déjà dans la partie.")
+    if game.contient(user.id):
+        envois.appeler(chat_id, "answer_callback_query", call.id, text="ℹ️ Tu es déjà dans la partie.")
         return
 
     game.add_player(user)
-    bot.answer_callback_query(call.id, text="✅ Tu as rejoint la partie !")
+    envois.appeler(chat_id, "answer_callback_query", call.id, text="✅ Tu as rejoint la partie !")
 @bot.message_handler(commands=['play'])
 def join_game(message):
     chat_id = message.chat.id
     user = message.from_user
 
     if chat_id not in games:
-        bot.send_message(chat_id, "⛔ Aucune partie n'est en attente. Lance /startgame pour en créer une.")
+        envois.envoyer(chat_id, "⛔ Aucune partie n'est en attente. Lance /startgame pour en créer une.")
         return
 
     game = games[chat_id]
 
     if game.active:
-        bot.send_message(chat_id, "⛔ La partie a déjà commencé.")
+        envois.envoyer(chat_id, "⛔ La partie a déjà commencé.")
         return
 
     if game.mode is None:
-        bot.send_message(chat_id, "⚠️ Aucun mode choisis.")
+        envois.envoyer(chat_id, "⚠️ Aucun mode choisis.")
         return
 
-    if user.id in [p.id for p in game.players]:
-        bot.send_message(chat_id, "ℹ️ Tu es déjà dans la partie.")
+    if game.contient(user.id):
+        envois.envoyer(chat_id, "ℹ️ Tu es déjà dans la partie.")
         return
 
     game.add_player(user)
@@ -445,7 +414,7 @@ def join_game(message):
 @bot.message_handler(commands=['reset'])
 def reset_jeu(message):
     if message.from_user.id != CREATOR_ID:
-        bot.send_message(message.chat.id, "⛔ Seul le créateur peut utiliser cette commande.")
+        envois.envoyer(message.chat.id, "⛔ Seul le créateur peut utiliser cette commande.")
         return
 
     markup = InlineKeyboardMarkup(row_width=2)
@@ -454,117 +423,157 @@ def reset_jeu(message):
         InlineKeyboardButton("❌ Annuler", callback_data="reset_annuler")
     )
 
-    bot.send_message(message.chat.id, "⚠️ Es-tu sûr de vouloir réinitialiser **tout le jeu** ?", parse_mode="Markdown", reply_markup=markup)
+    envois.envoyer(message.chat.id, "⚠️ Es-tu sûr de vouloir réinitialiser **tout le jeu** ?", parse_mode="Markdown", reply_markup=markup)
 
 @bot.callback_query_handler(func=lambda call: call.data in ["reset_confirmer", "reset_annuler"])
 def confirmation_reset(call):
     if call.from_user.id != CREATOR_ID:
-        bot.answer_callback_query(call.id, text="⛔ Réservé au créateur.", show_alert=True)
+        envois.appeler(call.message.chat.id, "answer_callback_query", call.id, text="⛔ Réservé au créateur.", show_alert=True)
         return
 
     if call.data == "reset_annuler":
-        bot.edit_message_text("❌ Réinitialisation annulée.", call.message.chat.id, call.message.message_id)
+        envois.appeler(call.message.chat.id, "edit_message_text", "❌ Réinitialisation annulée.", call.message.chat.id, call.message.message_id)
         return
 
-    # ✅ Confirmation → compte à rebours
-    def countdown_and_reset():
-        for i in [3, 2, 1]:
-            bot.edit_message_text(f"🔄 Réinitialisation dans {i}...", call.message.chat.id, call.message.message_id)
-            time.sleep(1)
-
-        # Réinitialisation complète
-        global victoires_globales, games
-        victoires_globales = {}
-        games = {}
-        save_victoires(victoires_globales)
-
-        bot.edit_message_text("♻️ Le jeu entier a été réinitialisé.", call.message.chat.id, call.message.message_id)
-
-    # Lance dans un thread pour éviter le blocage
-    from threading import Thread
-    Thread(target=countdown_and_reset).start()
+    # ✅ Confirmation → compte à rebours ; la réinitialisation repasse par l'acteur de ce chat
+    chat_id, message_id = call.message.chat.id, call.message.message_id
+    for i, restant in enumerate([3, 2, 1]):
+        planificateur.planifier(i, envois.appeler, chat_id, "edit_message_text", f"🔄 Réinitialisation dans {restant}...", chat_id, message_id)
+    planificateur.planifier(3, acteurs.poster, chat_id, reinitialiser, chat_id, message_id)
+
+def fermer_partie(chat_id, raison="annulee"):
+    # Exécuté dans l'acteur du chat : aucune course avec ses handlers ou chronos
+    game = games.pop(chat_id, None)
+    if game is not None:
+        game.annuler()
+        journaliser(game, "fermeture", raison=raison)
+        archive_parties.oublier(chat_id)
+        routeur.liberer(chat_id)
+    faucheuse.oublier(chat_id)
+
+def expirer_partie(chat_id):
+    # Dans l'acteur du chat, et seulement si rien ne s'est passé depuis le balayage
+    if not faucheuse.inactive(chat_id, time.monotonic()):
+        return
+    if chat_id not in games:
+        faucheuse.oublier(chat_id)
+        return
+    fermer_partie(chat_id, "expiree")
+    faucheuse.expirees += 1
+    envois.envoyer(chat_id, "🧹 Partie fermée faute d'activité. Tape /startgame pour en relancer une.")
+
+def balayer_parties():
+    for chat_id in faucheuse.balayer(time.monotonic()):
+        acteurs.poster(chat_id, expirer_partie, chat_id)
+    planificateur.planifier(FAUCHEUSE_INTERVALLE, balayer_parties)
+
+def reinitialiser(chat_id, message_id):
+    # Réinitialisation complète : chaque partie est fermée par son propre acteur
+    global derniere_reinitialisation
+    for autre in list(games):
+        acteurs.poster(autre, fermer_partie, autre, "reinitialisation")
+    archive_parties.effacer()
+    if partition_id is not None:
+        # Les autres processus ferment leurs parties au prochain rafraîchissement,
+        # déclenché par le remplacement des stats (écrit après ce repère)
+        derniere_reinitialisation = str(time.time())
+        stats.ecrire_meta("reinitialisation", derniere_reinitialisation)
+    remplacer_stats({})
+
+    envois.appeler(chat_id, "edit_message_text", "♻️ Le jeu entier a été réinitialisé.", chat_id, message_id)
 
 @bot.message_handler(commands=['flashgame'])
 def start_game_handler(message):
     chat_id = message.chat.id
 
     if chat_id not in games:
-        bot.send_message(chat_id, "❌ Aucun jeu en attente.")
+        envois.envoyer(chat_id, "❌ Aucun jeu en attente.")
         return
 
     game = games[chat_id]
 
     if game.active:
-        bot.send_message(chat_id, "⚠️ Le jeu a déjà commencé.")
+        envois.envoyer(chat_id, "⚠️ Le jeu a déjà commencé.")
         return
 
     # ✅ Annulation silencieuse et démarrage
     game.silent_cancel_countdown()
     game.start_game()
-@bot.message_handler(commands=['gradin'])  
-def show_gradin(message):  
-    chat_id = message.chat.id  
-
-    if not victoires_globales:  
-        bot.send_message(chat_id, "ℹ️ Aucun vainqueur enregistré pour le moment.")  
-        return  
-
-    # 🔥 Exclure motArena et trier par nombre de victoires
-    classement = sorted(
-        ((uid, v) for uid, v in victoires_globales.items() if str(uid) != str(MOTARENA_ID)),
-        key=lambda x: x[1] if isinstance(x[1], int) else x[1].get("victoires", 0),
-        reverse=True
-    )
-
-    texte = "<b>📊 Classement </b>\n\n<blockquote>"  
-    medals = ["🥇", "🥈", "🥉"]  
+def rendre_gradin(lignes):
+    noms = annuaire.noms(uid for _, uid, _ in lignes)
+    texte = "<b>📊 Classement </b>\n\n<blockquote>"
+    medals = ["🥇", "🥈", "🥉"]
+
+    for rang, user_id, nb_victoires in lignes:
+        medal = medals[rang - 1] if rang <= 3 else f"{rang}."
+        texte += f"{medal} {noms[user_id]} — {nb_victoires} victoire{'s' if nb_victoires > 1 else ''}\n"
+
+    return texte + "</blockquote>"
+
+# 📊 /gradin par pages de GRADIN_PAGE joueurs, rendues une fois puis gardées
+# jusqu'à ce qu'un rang affiché change ; les boutons éditent le même message
+pages_gradin = PagesClassement(index_classement, int(os.getenv("GRADIN_PAGE", 20)), rendre_gradin)
+
+def clavier_gradin(numero, nb_pages):
+    boutons = []
+    if numero > 0:
+        boutons.append(InlineKeyboardButton("⬅️", callback_data=f"gradin_{numero - 1}"))
+    boutons.append(InlineKeyboardButton(f"{numero + 1}/{nb_pages}", callback_data="gradin_page"))
+    if numero < nb_pages - 1:
+        boutons.append(InlineKeyboardButton("➡️", callback_data=f"gradin_{numero + 1}"))
+    markup = InlineKeyboardMarkup()
+    markup.row(*boutons)
+    return markup
+
+@bot.message_handler(commands=['gradin'])
+def show_gradin(message):
+    chat_id = message.chat.id
 
-    for rang, (user_id, score) in enumerate(classement, start=1):  
-        try:  
-            user = bot.get_chat(int(user_id))  
-            nom = f"@{user.username}" if user.username else (user.first_name or f"Utilisateur {user_id}")  
-        except Exception as e:  
-            print(f"Erreur get_chat pour user_id={user_id} :", e)  
-            nom = f"Utilisateur {user_id}"  
+    if not index_classement.taille():
+        envois.envoyer(chat_id, "ℹ️ Aucun vainqueur enregistré pour le moment.")
+        return
 
-        # 🔢 Compatibilité score = int ou dict
-        nb_victoires = score if isinstance(score, int) else score.get("victoires", 0)  
+    nb_pages = pages_gradin.nb_pages()
+    if nb_pages == 1:
+        # Sans boutons, le message peut encore être fusionné avec ses voisins
+        envois.envoyer(chat_id, pages_gradin.page(0), parse_mode="HTML")
+        return
+    envois.envoyer(chat_id, pages_gradin.page(0), parse_mode="HTML", reply_markup=clavier_gradin(0, nb_pages))
 
-        medal = medals[rang - 1] if rang <= 3 else f"{rang}."  
-        texte += f"{medal} {nom} — {nb_victoires} victoire{'s' if nb_victoires > 1 else ''}\n"  
+@bot.callback_query_handler(func=lambda call: call.data.startswith("gradin_"))
+def naviguer_gradin(call):
+    chat_id = call.message.chat.id
+    envois.appeler(chat_id, "answer_callback_query", call.id)
+    if call.data == "gradin_page":
+        return
 
-    texte += "</blockquote>"  
+    # Le classement a pu rétrécir (/reset) depuis l'envoi des boutons
+    nb_pages = pages_gradin.nb_pages()
+    numero = min(int(call.data.split("_")[1]), nb_pages - 1)
+    envois.appeler(
+        chat_id, "edit_message_text", pages_gradin.page(numero), chat_id, call.message.message_id,
+        parse_mode="HTML", reply_markup=clavier_gradin(numero, nb_pages)
+    )
 
-    try:  
-        bot.send_message(chat_id, texte, parse_mode="HTML")  
-    except Exception as e:  
-        print("Erreur envoi classement :", e)
 @bot.message_handler(commands=['annule'])
 def annule_partie(message):
     chat_id = message.chat.id
     user_id = message.from_user.id
 
     if chat_id not in games:
-        bot.send_message(chat_id, "❌ Aucune partie en cours à annuler.")
+        envois.envoyer(chat_id, "❌ Aucune partie en cours à annuler.")
         return
 
     game = games[chat_id]
     lanceur_id = game.players[0].id  # Le premier joueur est le créateur de la partie
 
     if user_id != lanceur_id:
-        bot.send_message(chat_id, "⛔ Seul le joueur qui a lancé la partie peut l’annuler.")
+        envois.envoyer(chat_id, "⛔ Seul le joueur qui a lancé la partie peut l’annuler.")
         return
 
     # Arrête tous les timers
-    if game.timer:
-        game.timer.cancel()
-        game.timer = None
-    if game.countdown_thread:
-        game.countdown_thread.cancel()
-        game.countdown_thread = None
-
-    del games[chat_id]
-    bot.send_message(chat_id, "🛑 La partie a été annulée par son créateur.")
+    fermer_partie(chat_id)
+    envois.envoyer(chat_id, "🛑 La partie a été annulée par son créateur.")
 
 @bot.message_handler(commands=['bilan'])
 def bilan_personnel(message):
@@ -573,28 +582,17 @@ def bilan_personnel(message):
 
     # 🛡️ Exclusion du bot motArena
     if user_id == str(MOTARENA_ID):
-        bot.send_message(chat_id, "🤖 Ce bot est invincible... Aucun bilan n’est disponible.")
+        envois.envoyer(chat_id, "🤖 Ce bot est invincible... Aucun bilan n’est disponible.")
         return
 
-    record = victoires_globales.get(user_id, {"victoires": 0, "defaites": 0})
-
-    if isinstance(record, int):  # rétro-compatibilité
-        victoires = record
-        defaites = 0
-    else:
-        victoires = record.get("victoires", 0)
-        defaites = record.get("defaites", 0)
+    record = stats.lire(user_id)
+    victoires = record["victoires"]
+    defaites = record["defaites"]
 
     total = victoires + defaites
     taux = f"{(victoires / total * 100):.1f}%" if total > 0 else "0%"
 
-    # Tri du classement par victoires
-    classement = sorted(
-        victoires_globales.items(),
-        key=lambda x: x[1] if isinstance(x[1], int) else x[1].get("victoires", 0),
-        reverse=True
-    )
-    position = next((i + 1 for i, (uid, _) in enumerate(classement) if uid == user_id), None)
+    position = index_classement.rang(user_id)
 
     def get_statut(pos):
         if pos is None:
@@ -619,51 +617,120 @@ def bilan_personnel(message):
     texte += f"<blockquote><b> 🌍 Position : {position if position else 'Non classé'}</b></blockquote>\n"
     texte += f"<blockquote><b> 🏅 Statut : {statut}</b></blockquote>"
 
-    try:
-        bot.send_message(chat_id, texte, parse_mode="HTML")
-    except Exception as e:
-        print("Erreur envoi bilan :", e)
+    envois.envoyer(chat_id, texte, parse_mode="HTML")
         
 @bot.message_handler(commands=["stock"])
 def stock_data(message):
     if message.from_user.id != CREATOR_ID:
-        bot.send_message(message.chat.id, "⛔ Cette commande est réservée au créateur.")
+        envois.envoyer(message.chat.id, "⛔ Cette commande est réservée au créateur.")
         return
     try:
-        with open("victoires.json", "rb") as f:
-            bot.send_document(message.from_user.id, f, caption="📦 Données sauvegardées.")
+        envois.envoyer_document(message.from_user.id, stats.exporter_json(), VICTOIRES_FILE, caption="📦 Données sauvegardées.")
     except Exception as e:
-        bot.send_message(message.chat.id, f"❌ Erreur : {e}")
+        envois.envoyer(message.chat.id, f"❌ Erreur : {e}")
         
          
 @bot.message_handler(content_types=["document"])
 def transfert_data(message):
     if message.from_user.id != CREATOR_ID:
-        bot.send_message(message.chat.id, "⛔ Tu n'as pas l'autorisation d'utiliser cette commande.")
+        envois.envoyer(message.chat.id, "⛔ Tu n'as pas l'autorisation d'utiliser cette commande.")
         return
 
     if not message.document:
-        bot.send_message(message.chat.id, "❌ Aucun document reçu.")
+        envois.envoyer(message.chat.id, "❌ Aucun document reçu.")
         return
 
-    if message.document.file_name != "victoires.json":
-        bot.send_message(message.chat.id, "❌ Le fichier doit s’appeler 'victoires.json'.")
+    nom_fichier = message.document.file_name or ""
+    if nom_fichier != VICTOIRES_FILE and not nom_fichier.endswith((SUFFIXE_INSTANTANE, SUFFIXE_DELTA)):
+        envois.envoyer(message.chat.id, "❌ Envoie 'victoires.json', une sauvegarde complète (.snap.json.gz) ou un delta (.delta.json.gz).")
         return
 
     try:
-        file_info = bot.get_file(message.document.file_id)
-        downloaded_file = bot.download_file(file_info.file_path)
+        file_info = api.get_file(message.document.file_id)
+        downloaded_file = api.download_file(file_info.file_path)
 
-        with open("victoires.json", "wb") as f:
-            f.write(downloaded_file)
+        # Instantané complet, puis le dernier delta qui s'y applique
+        remplacer_stats(sauvegarde.restaurer(nom_fichier, downloaded_file))
 
-        global victoires_globales
-        victoires_globales = load_victoires()
-
-        bot.send_message(message.chat.id, "✅ Données restaurées avec succès.")
+        envois.envoyer(message.chat.id, "✅ Données restaurées avec succès.")
+    except ValueError as e:
+        envois.envoyer(message.chat.id, f"❌ Sauvegarde refusée : {e}")
     except Exception as e:
-        bot.send_message(message.chat.id, f"❌ Erreur transfert : {e}")
+        envois.envoyer(message.chat.id, f"❌ Erreur transfert : {e}")
                
+@bot.message_handler(commands=['tolerance'])
+def choisir_tolerance(message):
+    chat_id = message.chat.id
+
+    if chat_id not in games:
+        envois.envoyer(chat_id, "❌ Aucune partie en attente.")
+        return
+
+    game = games[chat_id]
+    if message.from_user.id != game.players[0].id:
+        envois.envoyer(chat_id, "⛔ Seul le joueur qui a lancé la partie peut régler la tolérance.")
+        return
+
+    arguments = message.text.split()[1:]
+    if not arguments or arguments[0] not in NIVEAUX:
+        envois.envoyer(chat_id, f"ℹ️ Tolérance actuelle : <b>{game.tolerance}</b>\nUsage : /tolerance {' | '.join(NIVEAUX)}", parse_mode="HTML")
+        return
+
+    game.tolerance = arguments[0]
+    journaliser(game, "reglage", tolerance=game.tolerance)
+    game.signaler_changement()
+    envois.envoyer(chat_id, f"🔤 Tolérance des réponses : <b>{game.tolerance}</b>", parse_mode="HTML")
+
+@bot.message_handler(commands=['dico'])
+def choisir_dico(message):
+    chat_id = message.chat.id
+
+    if chat_id not in games:
+        envois.envoyer(chat_id, "❌ Aucune partie en attente.")
+        return
+
+    game = games[chat_id]
+    arguments = message.text.split()[1:]
+    if not arguments:
+        envois.envoyer(
+            chat_id,
+            f"📚 Dictionnaire : <b>{game.dico_nom}</b>\nDisponibles : {', '.join(registre.disponibles())}\nUsage : /dico nom",
+            parse_mode="HTML"
+        )
+        return
+
+    if game.active:
+        envois.envoyer(chat_id, "⛔ La partie a déjà commencé.")
+        return
+    if message.from_user.id != game.players[0].id:
+        envois.envoyer(chat_id, "⛔ Seul le joueur qui a lancé la partie peut choisir le dictionnaire.")
+        return
+    if not registre.existe(arguments[0]):
+        envois.envoyer(chat_id, "❌ Dictionnaire inconnu.")
+        return
+
+    game.dico_nom = arguments[0]
+    journaliser(game, "reglage", dico=game.dico_nom)
+    game.signaler_changement()
+    envois.envoyer(chat_id, f"📚 Dictionnaire sélectionné : <b>{game.dico_nom}</b>", parse_mode="HTML")
+
+@bot.message_handler(commands=['rechargerdico'])
+def recharger_dico(message):
+    if message.from_user.id != CREATOR_ID:
+        envois.envoyer(message.chat.id, "⛔ Cette commande est réservée au créateur.")
+        return
+
+    # Les parties en cours gardent leur instantané, les nouvelles prennent le nouveau
+    def recharger():
+        recharges = registre.recharger()
+        envois.envoyer(message.chat.id, f"🔄 Dictionnaires rechargés : {', '.join(recharges) or 'aucun'}")
+
+    if executeur_stats is None:
+        recharger()
+    else:
+        # RUNTIME=asyncio : relecture des fichiers hors de la boucle
+        threading.Thread(target=recharger, name="recharger-dicos", daemon=True).start()
+
 @bot.message_handler(commands=['waitgame'])
 def wait_game(message):
     chat_id = message.chat.id
@@ -675,12 +742,14 @@ def wait_game(message):
 def choose_mode(call):
     chat_id = call.message.chat.id
     mode = call.data.split("_")[1]
-    bot.delete_message(chat_id, call.message.message_id)
+    envois.appeler(chat_id, "delete_message", chat_id, call.message.message_id)
 
     if chat_id in games:
         games[chat_id].mode = mode
-    bot.send_message(chat_id, f"🎮 Mode sélectionné : <b>{mode}</b>", parse_mode="HTML")
-    bot.answer_callback_query(call.id)
+        journaliser(games[chat_id], "mode", mode=mode)
+        games[chat_id].signaler_changement()
+    envois.envoyer(chat_id, f"🎮 Mode sélectionné : <b>{mode}</b>", parse_mode="HTML")
+    envois.appeler(chat_id, "answer_callback_query", call.id)
 
 @bot.message_handler(func=lambda m: True)
 def handle_word(message):
@@ -690,19 +759,373 @@ def handle_word(message):
     game = games[chat_id]
     if game.active:
         game.validate(message.from_user, message.text)
+
+### ━━━ Métriques (/metrics) ━━━
+
+metriques = Metriques()
+metriques.histogramme("mot_handler_secondes", "Durée des handlers telebot")
+metriques.compteur("mot_handler_secondes_erreurs_total", "Exceptions levées par les handlers")
+metriques.histogramme("mot_telegram_secondes", "Durée des appels à l'API Telegram")
+metriques.compteur("mot_telegram_erreurs_total", "Appels à l'API Telegram en erreur (code HTTP ou exception)")
+metriques.histogramme("mot_stats_ecriture_secondes", "Durée des écritures du store des stats (commit SQLite ou fichier JSON)")
+# Tous les handlers ci-dessus sont chronométrés, sans toucher à leur code
+instrumenter_handlers(bot, metriques, traces=traces)
+routeur.charger_commandes(bot)
+
+def etat_parties():
+    parties = list(games.values())
+    en_cours = sum(1 for g in parties if g.active)
+    return [({"etat": "en_cours"}, en_cours), ({"etat": "en_attente"}, len(parties) - en_cours)]
+
+metriques.jauge("mot_parties", "Parties en mémoire", etat_parties)
+metriques.jauge("mot_joueurs_en_partie", "Joueurs inscrits dans une partie", lambda: sum(len(g.players) for g in list(games.values())))
+# Lus au scrape via le nom global : RUNTIME=asyncio remplace ces objets au lancement
+metriques.jauge("mot_file_envois", "Messages sortants en attente", lambda: envois.profondeur())
+metriques.jauge("mot_file_acteurs", "Événements en attente dans les boîtes des chats", lambda: acteurs.profondeur())
+metriques.jauge("mot_chronos_actifs", "Chronos planifiés non annulés", lambda: planificateur.actives())
+metriques.jauge("mot_threads", "Threads vivants", threading.active_count)
+metriques.jauge("mot_envois_fusions_total", "Messages fusionnés avant envoi", lambda: envois.fusions, "counter")
+metriques.jauge("mot_envois_429_total", "Réponses 429 reçues par le distributeur", lambda: envois.limites, "counter")
+metriques.jauge(
+    "mot_routeur_total", "Updates triées à l'entrée, par décision (ignore_* = jetées)",
+    lambda: [({"decision": decision}, n) for decision, n in list(routeur.compteurs.items())], "counter"
+)
+metriques.jauge("mot_parties_expirees_total", "Parties fermées faute d'activité", lambda: faucheuse.expirees, "counter")
+metriques.jauge("mot_analyse_file", "Tours en attente d'agrégation", lambda: analyse.file.qsize() if analyse else [])
+metriques.jauge("mot_analyse_tours_total", "Tours agrégés par l'analyse des mots", lambda: analyse.tours if analyse else [], "counter")
+metriques.jauge(
+    "mot_gradin_pages_total", "Pages de /gradin servies, par origine",
+    lambda: [({"origine": "cache"}, pages_gradin.servies), ({"origine": "rendu"}, pages_gradin.rendues)], "counter"
+)
+metriques.jauge("mot_journal_file", "Événements en attente d'écriture dans le journal", lambda: journal.file.qsize() if journal else [])
+metriques.jauge("mot_journal_evenements_total", "Événements écrits dans le journal", lambda: journal.evenements if journal else [], "counter")
+metriques.jauge("mot_acteurs_rejetes_total", "Updates refusées car la boîte du chat était pleine", lambda: acteurs.rejetes, "counter")
+metriques.jauge(
+    "mot_webhook_ignores_total", "Updates webhook ignorées",
+    lambda: [({"raison": "doublon"}, ingestion.doublons), ({"raison": "file_pleine"}, ingestion.rejetes)], "counter"
+)
+metriques.jauge(
+    "mot_sauvegardes_total", "Passages du thread de sauvegarde",
+    lambda: [({"resultat": "envoyee"}, sauvegarde.envoyes), ({"resultat": "inchangee"}, sauvegarde.ignores)] if sauvegarde else [],
+    "counter"
+)
+metriques.jauge("mot_sauvegarde_duree_secondes", "Durée de la dernière sauvegarde", lambda: sauvegarde.duree if sauvegarde else [])
+metriques.jauge("mot_stats_octets", "Taille sur disque du store des stats", lambda: stats.taille_octets() if stats else [])
+metriques.jauge("mot_sauvegarde_octets", "Taille compressée de la dernière sauvegarde", lambda: sauvegarde.taille if sauvegarde else [])
+
 # ▶️ Flask pour Render
 
 
 app = Flask(__name__)
+# 🧩 Front du mode processus (None sinon)
+repartiteur = None
+
+# Un seul worker : il ne fait que déposer dans les boîtes des acteurs, dans l'ordre d'arrivée
+ingestion = IngestionWebhook(
+    bot,
+    nb_workers=int(os.getenv("WEBHOOK_WORKERS", 1)),
+    taille_file=int(os.getenv("WEBHOOK_QUEUE", 1000))
+)
 
 @app.route('/')
 def home():
     return "Bot Telegram actif via Render ✅"
 
+def relayer_partition(indice, chemin, delai):
+    # Requête locale vers le serveur HTTP d'une partition : (corps, code, type de contenu)
+    requete = urllib.request.Request(
+        f"http://127.0.0.1:{PORT_PARTITIONS + indice}{chemin}",
+        headers={"Authorization": request.headers.get("Authorization", "")}
+    )
+    try:
+        with urllib.request.urlopen(requete, timeout=delai) as reponse:
+            return reponse.read(), reponse.status, reponse.headers.get("Content-Type")
+    except urllib.error.HTTPError as e:
+        return e.read(), e.code, e.headers.get("Content-Type")
+
+@app.route('/metrics')
+def exposer_metriques():
+    texte = metriques.exposer()
+    if repartiteur is not None:
+        # Front du mode processus : parties, handlers et appels API vivent dans les partitions
+        sources = [("front", texte)]
+        for indice in range(repartiteur.nb):
+            try:
+                corps, code, _ = relayer_partition(indice, "/metrics", 2)
+            except OSError as e:
+                print(f"⚠️ Métriques de la partition {indice} indisponibles :", e)
+                continue
+            if code == 200:
+                sources.append((str(indice), corps.decode("utf-8")))
+        texte = fusionner_expositions(sources)
+    return texte, 200, {"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
+
+def admin_autorise():
+    return bool(ADMIN_TOKEN) and hmac.compare_digest(
+        request.headers.get("Authorization", ""), f"Bearer {ADMIN_TOKEN}"
+    )
+
+def vers_partition():
+    # /debug/*?partition=i sur le front du mode processus : rejoué tel quel sur la partition i
+    indice = request.args.get("partition", type=int)
+    if repartiteur is None or indice is None:
+        return None
+    if not 0 <= indice < repartiteur.nb:
+        return "Partition inconnue", 400
+    try:
+        corps, code, type_ = relayer_partition(indice, request.full_path, 75)
+    except OSError as e:
+        return f"Partition {indice} injoignable : {e}", 502
+    return corps, code, {"Content-Type": type_ or "text/plain; charset=utf-8"}
+
+@app.route('/debug/profil')
+def profiler():
+    # Échantillonne le processus vivant : ?secondes=10&hz=100, piles repliées (flamegraph)
+    if not admin_autorise():
+        return "", 404
+    relais = vers_partition()
+    if relais is not None:
+        return relais
+    try:
+        secondes = min(float(request.args.get("secondes", 10)), 60)
+        frequence = max(1, min(int(request.args.get("hz", 100)), 1000))
+    except ValueError:
+        return "secondes et hz doivent être des nombres", 400
+    piles = echantillonner(secondes, frequence)
+    if piles is None:
+        return "Un profil est déjà en cours", 409
+    return repliees(piles), 200, {"Content-Type": "text/plain; charset=utf-8"}
+
+@app.route('/debug/traces')
+def traces_lentes():
+    # Les updates (et appels API) les plus lents parmi les TRACES_CAPACITE derniers
+    if not admin_autorise():
+        return "", 404
+    relais = vers_partition()
+    if relais is not None:
+        return relais
+    return {"traces": traces.plus_lentes(request.args.get("n", 20, type=int))}
+
+@app.route('/webhook', methods=['POST'])
+def webhook():
+    if WEBHOOK_SECRET and not hmac.compare_digest(
+        request.headers.get("X-Telegram-Bot-Api-Secret-Token", "").encode(), WEBHOOK_SECRET.encode()
+    ):
+        return "", 403
+    # Toujours 200 immédiatement : Telegram ne doit jamais ralentir ses envois
+    (repartiteur or ingestion).recevoir(request.get_data(as_text=True))
+    return "", 200
+
+def reprendre_parties():
+    # Parties interrompues par un redémarrage : chronos réarmés avec le temps restant
+    maintenant = time.time()
+    for chat_id, etat in archive_parties.charger().items():
+        try:
+            game = Game.depuis_instantane(chat_id, TransportTelegram(chat_id), etat)
+            games[chat_id] = game
+            if game.ident is None:
+                game.ident = nouvel_ident(chat_id)
+            # L'état repris suffit à rejouer la suite, même sans le début du journal
+            journaliser(game, "reprise", etat={cle: v for cle, v in etat.items() if cle not in ("echeance", "compte", "tirage")})
+            game.reprendre(maintenant)
+            faucheuse.toucher(chat_id)
+            if game.active:
+                routeur.attendre(chat_id)
+        except Exception as e:
+            print(f"❌ Reprise impossible de la partie {chat_id} :", e)
+            games.pop(chat_id, None)
+            archive_parties.oublier(chat_id)
+    if games:
+        print(f"♻️ {len(games)} partie(s) reprise(s)")
+
+def creer_app():
+    # Démarre tout ce qui a un effet de bord ; les appels suivants ne font rien
+    global stats, annuaire, sauvegarde, archive_parties, analyse, journal, bot_username
+    if stats is not None:
+        return app
+
+    # Store partagé entre processus : chaque incrément est validé tout de suite
+    stats = ouvrir_stats(STATS_BACKEND, STATS_DB, VICTOIRES_FILE, lot=200 if partition_id is None else 1)
+    stats.observateur = lambda secondes: metriques.observer("mot_stats_ecriture_secondes", secondes)
+    atexit.register(stats.fermer)
+    index_classement.reconstruire(stats.tous())
+
+    annuaire = AnnuaireNoms(api, os.getenv("ANNUAIRE_DB", STATS_DB))
+    annuaire.demarrer()
+    annuaire.abonner(pages_gradin.renommer)
+    atexit.register(annuaire.vider)
+
+    envois.demarrer()
+    planificateur.demarrer()
+    acteurs.demarrer()
+    # 📈 Chaque appel à l'API Telegram est chronométré (méthode, erreurs)
+    telebot.apihelper.CUSTOM_REQUEST_SENDER = envoyeur_instrumente(metriques, traces)
+    analyse = AnalyseMots(ANALYSE_DB)
+    analyse.demarrer()
+    atexit.register(analyse.vider)
+    if JOURNAL_DIR:
+        # Un préfixe par processus : chaque partie n'écrit que dans les fichiers du sien
+        prefixe = "evenements" if partition_id is None else f"evenements-p{partition_id}"
+        journal = Journal(JOURNAL_DIR, prefixe, taille_max=JOURNAL_TAILLE_MO * 1024 * 1024, jours=JOURNAL_JOURS)
+        journal.demarrer()
+        atexit.register(journal.fermer)
+    archive_parties = ArchiveParties(PARTIES_DB)
+    reprendre_parties()
+    archive_parties.demarrer()
+    atexit.register(archive_parties.vider)
+    registre.surveiller(int(os.getenv("DICO_SURVEILLANCE", 10)))
+    planificateur.planifier(FAUCHEUSE_INTERVALLE, balayer_parties)
+    # Un seul processus envoie les sauvegardes ; les autres gardent de quoi restaurer
+    if partition_id in (None, 0):
+        sauvegarde = Sauvegarde(stats, envois, [GROUPE_SAUVEGARDE_ID, CREATOR_ID])
+        # Rien n'est renvoyé au redémarrage si les stats n'ont pas bougé depuis le dernier envoi
+        sauvegarde.reprendre()
+        sauvegarde.demarrer()
+        sauvegarde.noter()
+    else:
+        sauvegarde = Sauvegarde(stats, envois, [])
+
+    bot_username = bot.get_me().username
+    return app
+
 def run_flask():
     port = int(os.getenv("PORT", 8000))
     app.run(host="0.0.0.0", port=port)
 
-if __name__ == "__main__":
-    threading.Thread(target=run_flask).start()
-    bot.infinity_polling()     
+def dico_a_charger(chat_id):
+    # RUNTIME=asyncio : un dictionnaire pas encore en mémoire est chargé dans l'exécuteur
+    # de la boucle avant que ce chat ne reprenne (donc avant que sa partie ne démarre)
+    game = games.get(chat_id)
+    if game is None or game.dico is not None or registre.en_memoire(game.dico_nom):
+        return None
+    return functools.partial(registre.obtenir, game.dico_nom)
+
+def lancer_boucle():
+    # 🌀 RUNTIME=asyncio : envois, chronos et boîtes des chats passent sur une seule
+    # boucle ; handlers, moteur et stockage sont ceux du mode threads. Ce qui bloquerait
+    # (chargement d'un dictionnaire, écritures des stats) tourne hors de la boucle
+    global envois, planificateur, acteurs, executeur_stats, api
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    horloge = Horloge(loop)
+    # 📈 Les appels passent par aiohttp, pas par CUSTOM_REQUEST_SENDER : mêmes métriques ici
+    configurer_session(
+        os.getenv("TELEGRAM_API_URL"), int(os.getenv("HTTP_CONNEXIONS", 50)),
+        instrumenter=functools.partial(requete_async_instrumentee, metriques)
+    )
+    bot_async = BotBoucle(TOKEN, bot, routeur.accepter)
+    bot_async.loop = loop
+    api = ApiBoucle(bot_async, horloge)
+    envois = EnvoisBoucle(bot_async, horloge, nb_workers=int(os.getenv("ENVOIS_WORKERS", 32)))
+    planificateur = PlanificateurBoucle(horloge)
+    acteurs = ActeursBoucle(horloge, prealable=dico_a_charger, capacite=int(os.getenv("ACTEURS_CAPACITE", 200)))
+    executeur_stats = concurrent.futures.ThreadPoolExecutor(1, thread_name_prefix="stats")
+
+    async def principal():
+        horloge.thread = threading.get_ident()
+        creer_app()
+        threading.Thread(target=run_flask, daemon=True).start()
+        await bot_async.remove_webhook()
+        if WEBHOOK_URL:
+            ingestion.bot = RelaisWebhook(bot_async)
+            ingestion.demarrer()
+            await bot_async.set_webhook(url=WEBHOOK_URL.rstrip("/") + "/webhook", secret_token=WEBHOOK_SECRET)
+            await asyncio.Event().wait()
+        else:
+            await bot_async.infinity_polling()
+
+    loop.run_until_complete(principal())
+
+def rafraichir_classement():
+    # Victoires et /reset des autres processus : l'index local est reconstruit
+    # dès que les stats partagées ont changé, au plus RAFRAICHIR_CLASSEMENT après
+    global derniere_reinitialisation, version_classement
+    derniere_reinitialisation = stats.lire_meta("reinitialisation")
+    with verrou_classement:
+        version_classement = stats.version()
+        index_classement.reconstruire(stats.tous())
+    while True:
+        time.sleep(RAFRAICHIR_CLASSEMENT)
+        try:
+            with verrou_classement:
+                version = stats.version()
+                if version == version_classement:
+                    continue
+                version_classement = version
+                index_classement.reconstruire(stats.tous())
+            reinitialisation = stats.lire_meta("reinitialisation")
+            if reinitialisation != derniere_reinitialisation:
+                derniere_reinitialisation = reinitialisation
+                for chat_id in list(games):
+                    acteurs.poster(chat_id, fermer_partie, chat_id, "reinitialisation")
+                archive_parties.effacer()
+            sauvegarde.noter()
+        except Exception as e:
+            print("❌ Erreur rafraîchissement du classement :", e)
+
+def travailleur(indice, nb, conn):
+    # 🧩 Un processus de partition : les chats dont chat_id % nb == indice, leurs
+    # parties (archive à part) et sa part du débit global d'envoi
+    global partition_id, PARTIES_DB, ANALYSE_DB, envois
+    partition_id = indice
+    racine, extension = os.path.splitext(PARTIES_DB)
+    PARTIES_DB = f"{racine}-{indice}{extension}"
+    racine, extension = os.path.splitext(ANALYSE_DB)
+    ANALYSE_DB = f"{racine}-{indice}{extension}"
+    envois = DistributeurEnvois(bot, debit_global=30 / nb)
+    creer_app()
+    threading.Thread(target=rafraichir_classement, name="classement", daemon=True).start()
+    # /metrics et /debug/* de cette partition, relevés par le front
+    threading.Thread(
+        target=app.run, kwargs={"host": "127.0.0.1", "port": PORT_PARTITIONS + indice}, name="http", daemon=True
+    ).start()
+    while True:
+        try:
+            brut = conn.recv()
+        except EOFError:
+            return  # front arrêté
+        bot.process_new_updates([telebot.types.Update.de_json(brut)])
+
+def lancer_processus():
+    # 🧩 RUNTIME=processus : ce processus reçoit et répartit, les parties vivent ailleurs
+    global repartiteur
+    if STATS_BACKEND != "sqlite":
+        raise SystemExit("RUNTIME=processus demande STATS_BACKEND=sqlite (store partagé)")
+    # Import unique de victoires.json avant que les partitions n'ouvrent la base
+    ouvrir_stats(STATS_BACKEND, STATS_DB, VICTOIRES_FILE).fermer()
+    # Même fenêtre anti-doublons que le mode webhook classique
+    repartiteur = Repartiteur(
+        travailleur, PROCESSUS, taille_file=int(os.getenv("WEBHOOK_QUEUE", 1000)), deja_vu=ingestion.deja_vu
+    )
+    metriques.jauge(
+        "mot_partition_file", "Updates en attente d'envoi vers chaque processus",
+        lambda: [({"partition": str(i)}, n) for i, n in enumerate(repartiteur.profondeurs())]
+    )
+    metriques.jauge(
+        "mot_partition_relances_total", "Processus de partition relancés",
+        lambda: [({"partition": str(p.indice)}, p.redemarrages) for p in repartiteur.partitions], "counter"
+    )
+    repartiteur.demarrer()
+    bot.remove_webhook()
+    if WEBHOOK_URL:
+        bot.set_webhook(url=WEBHOOK_URL.rstrip("/") + "/webhook", secret_token=WEBHOOK_SECRET)
+        run_flask()
+    else:
+        threading.Thread(target=run_flask, daemon=True).start()
+        repartiteur.relever(TOKEN)
+
+if __name__ == "__main__" and RUNTIME == "asyncio":
+    lancer_boucle()
+elif __name__ == "__main__" and RUNTIME == "processus":
+    lancer_processus()
+elif __name__ == "__main__":
+    creer_app()
+    if WEBHOOK_URL:
+        ingestion.demarrer()
+        bot.remove_webhook()
+        bot.set_webhook(url=WEBHOOK_URL.rstrip("/") + "/webhook", secret_token=WEBHOOK_SECRET)
+        run_flask()
+    else:
+        threading.Thread(target=run_flask).start()
+        bot.remove_webhook()
+        bot.infinity_polling()
@@ -0,0 +1,84 @@
+import queue
+import threading
+from collections import deque
+
+
+class _Boite:
+    __slots__ = ("cle", "verrou", "file", "planifiee", "fermee")
+
+    def __init__(self, cle):
+        self.cle = cle
+        self.verrou = threading.Lock()
+        self.file = deque()
+        self.planifiee = False  # déjà dans la file des boîtes prêtes (ou en cours)
+        self.fermee = False     # vidée et retirée : un dépôt concurrent doit en recréer une
+
+
+### ━━━ Acteurs par chat ━━━
+
+class PoolActeurs:
+    # Une boîte aux lettres par clé (le chat) : ses événements s'exécutent dans
+    # l'ordre, un seul à la fois, sur un pool partagé. Deux chats différents
+    # tournent en parallèle ; aucun verrou global autour de l'état du jeu.
+    def __init__(self, nb_workers=8, capacite=200, tranche=32):
+        self.nb_workers = nb_workers
+        self.capacite = capacite
+        self.tranche = tranche  # événements traités d'affilée avant de laisser la place
+        self.boites = {}
+        self.prets = queue.SimpleQueue()
+        self.rejetes = 0
+
+    def demarrer(self):
+        for i in range(self.nb_workers):
+            threading.Thread(target=self._boucle, name=f"acteur-{i}", daemon=True).start()
+
+    def poster(self, cle, fn, *args):
+        # Toujours accepté : chronos et événements internes ne se perdent pas
+        self._deposer(cle, fn, args, False)
+
+    def proposer(self, cle, fn, *args):
+        # Refusé (False) si la boîte du chat est pleine : un chat qui inonde ne
+        # fait grossir ni la mémoire ni le retard des autres
+        return self._deposer(cle, fn, args, True)
+
+    def profondeur(self):
+        return sum(len(boite.file) for boite in list(self.boites.values()))
+
+    def _deposer(self, cle, fn, args, limite):
+        while True:
+            boite = self.boites.get(cle)
+            if boite is None:
+                boite = self.boites.setdefault(cle, _Boite(cle))
+            with boite.verrou:
+                if boite.fermee:
+                    continue
+                if limite and len(boite.file) >= self.capacite:
+                    self.rejetes += 1
+                    return False
+                boite.file.append((fn, args))
+                if not boite.planifiee:
+                    boite.planifiee = True
+                    self.prets.put(boite)
+                return True
+
+    def _boucle(self):
+        while True:
+            boite = self.prets.get()
+            for _ in range(self.tranche):
+                with boite.verrou:
+                    if not boite.file:
+                        break
+                    fn, args = boite.file.popleft()
+                try:
+                    fn(*args)
+                except Exception as e:
+                    print(f"❌ Erreur acteur {boite.cle} :", e)
+            with boite.verrou:
+                if boite.file:
+                    # Retour en fin de file : équité entre les chats
+                    self.prets.put(boite)
+                else:
+                    boite.planifiee = False
+                    boite.fermee = True
+                    if self.boites.get(boite.cle) is boite:
+                        del self.boites[boite.cle]
@@ -0,0 +1,273 @@
+import json
+import math
+import queue
+import random
+import sqlite3
+import threading
+import time
+import weakref
+from array import array
+
+# Croquis des durées : seaux logarithmiques fixes de 0,1 s à ~40 s (erreur relative ≤ 12 %)
+DUREE_MIN = 0.1
+GAMMA = 1.25
+NB_SEAUX = 28
+
+# Courbe de difficulté : palier visé selon le nombre de mots déjà joués dans la partie
+PALIERS = {"facile": 0.2, "moyen": 0.5, "difficile": 0.8}
+COURBE = ((0, "facile"), (6, "moyen"), (15, "difficile"))
+LARGEUR = 0.2    # tolérance autour de la difficulté visée
+PLANCHER = 0.05  # aucun mot ne disparaît complètement du tirage
+A_PRIORI = 5     # tours fictifs « moyens » mêlés aux observations d'un mot
+
+
+def palier(mots_joues):
+    choisi = COURBE[0][1]
+    for seuil, nom in COURBE:
+        if mots_joues >= seuil:
+            choisi = nom
+    return choisi
+
+
+def _seau(duree):
+    if duree <= DUREE_MIN:
+        return 0
+    return min(NB_SEAUX - 1, 1 + int(math.log(duree / DUREE_MIN) / math.log(GAMMA)))
+
+
+def quantile(croquis, q):
+    total = sum(croquis)
+    if not total:
+        return None
+    rang = q * (total - 1)
+    cumul = 0
+    for i, n in enumerate(croquis):
+        cumul += n
+        if cumul > rang:
+            # Milieu géométrique du seau
+            return DUREE_MIN if i == 0 else DUREE_MIN * GAMMA ** (i - 0.5)
+    return DUREE_MIN * GAMMA ** (NB_SEAUX - 1)
+
+
+class StatMot:
+    # Mémoire constante par mot, quel que soit le nombre de tours observés
+    __slots__ = ("tours", "trouves", "temps", "erreurs", "croquis")
+
+    def __init__(self, tours=0, trouves=0, temps=0, erreurs=0, croquis=None):
+        self.tours = tours
+        self.trouves = trouves
+        self.temps = temps      # tours perdus par inactivité
+        self.erreurs = erreurs  # mauvaises réponses cumulées
+        self.croquis = array("I", croquis or [0] * NB_SEAUX)  # durées des bonnes réponses
+
+    def difficulte(self):
+        # 0 = facile, 1 = difficile ; lissée vers 0,5 tant que le mot a peu de tours
+        if not self.tours:
+            return PALIERS["moyen"]
+        taux_temps = self.temps / self.tours
+        mediane = quantile(self.croquis, 0.5)
+        lenteur = 1.0 if mediane is None else min(1.0, mediane / 20)
+        hesitation = min(1.0, self.erreurs / self.tours / 3)
+        observee = 0.5 * taux_temps + 0.3 * lenteur + 0.2 * hesitation
+        return (A_PRIORI * PALIERS["moyen"] + self.tours * observee) / (A_PRIORI + self.tours)
+
+
+def poids(difficulte, cible):
+    return PLANCHER + math.exp(-((difficulte - cible) / LARGEUR) ** 2)
+
+
+class ArbrePoids:
+    # Arbre de Fenwick sur les poids : tirage pondéré et mise à jour d'un poids
+    # en O(log n), construction en O(n) une seule fois par pool
+    __slots__ = ("arbre", "total", "pas")
+
+    def __init__(self, poids):
+        n = len(poids)
+        self.arbre = array("d", [0.0]) + array("d", poids)
+        for i in range(1, n + 1):
+            parent = i + (i & -i)
+            if parent <= n:
+                self.arbre[parent] += self.arbre[i]
+        self.total = math.fsum(poids)
+        self.pas = 1 << (n.bit_length() - 1) if n else 0
+
+    def ajuster(self, i, delta):
+        n = len(self.arbre) - 1
+        i += 1
+        while i <= n:
+            self.arbre[i] += delta
+            i += i & -i
+        self.total += delta
+
+    def tirer(self, rng=random):
+        # Lu pendant qu'un ajustement est en cours, le tirage est à peine biaisé,
+        # jamais hors du pool
+        reste = rng.random() * self.total
+        n = len(self.arbre) - 1
+        position, pas = 0, self.pas
+        while pas:
+            suivant = position + pas
+            if suivant <= n and self.arbre[suivant] <= reste:
+                position = suivant
+                reste -= self.arbre[suivant]
+            pas >>= 1
+        return min(position, n - 1)
+
+
+### ━━━ Analyse des tours ━━━
+
+class AnalyseMots:
+    # Le moteur ne fait que déposer un tuple dans une file ; un thread agrège,
+    # écrit par lots les mots modifiés et ajuste les poids de tirage des seuls
+    # mots qui ont bougé. Un pool est suivi par identité (référence faible) :
+    # après un rechargement l'ancien et le nouveau ont chacun leurs tables,
+    # et celles d'un pool que plus personne ne tient sont oubliées.
+    def __init__(self, chemin, intervalle=30.0):
+        self.intervalle = intervalle
+        self.file = queue.SimpleQueue()
+        self.mots = {}          # (mode, mot) → StatMot
+        self.sales = set()
+        self.modifies = set()   # (mode, mot) dont les poids sont à ajuster
+        self.suivis = {}        # id(pool) → référence faible, posée au premier tirage
+        self.nouveaux = []      # (mode, référence) à construire
+        self.pools = {}         # id(pool) → (référence, mode, difficultés, {palier: ArbrePoids})
+        self.tables = {}        # id(pool) → (référence, {palier: ArbrePoids}), lu par les parties
+        self.verrou = threading.Lock()  # mots et connexion (vider() est aussi appelé à l'arrêt)
+        self.tours = 0
+        self.ecritures = 0
+        self.conn = sqlite3.connect(chemin, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS mots (mode TEXT NOT NULL, mot TEXT NOT NULL, tours INTEGER, "
+            "trouves INTEGER, temps INTEGER, erreurs INTEGER, croquis TEXT, PRIMARY KEY (mode, mot))"
+        )
+        self.conn.commit()
+        for mode, mot, tours, trouves, temps, erreurs, croquis in self.conn.execute("SELECT * FROM mots"):
+            croquis = json.loads(croquis)
+            if len(croquis) == NB_SEAUX:
+                self.mots[mode, mot] = StatMot(tours, trouves, temps, erreurs, croquis)
+
+    def demarrer(self):
+        threading.Thread(target=self._boucle, name="analyse-mots", daemon=True).start()
+
+    def noter(self, mode, mot, trouve, duree, erreurs):
+        # Chemin de la réponse : un seul dépôt, sans verrou ni calcul
+        self.file.put((mode, mot, trouve, duree, erreurs))
+
+    def table(self, mode, pool, mots_joues):
+        # Table du palier visé, ou None tant qu'elle n'est pas prête (tirage uniforme)
+        cle = id(pool)
+        entree = self.tables.get(cle)
+        if entree is not None and entree[0]() is pool:
+            return entree[1].get(palier(mots_joues))
+        ref = self.suivis.get(cle)
+        if ref is None or ref() is not pool:
+            ref = self.suivis[cle] = weakref.ref(pool, lambda ref: self.file.put(("oubli", cle, ref)))
+            self.file.put(("pool", mode, ref))
+        return None
+
+    def difficulte(self, mode, mot):
+        stat = self.mots.get((mode, mot))
+        return PALIERS["moyen"] if stat is None else stat.difficulte()
+
+    def _boucle(self):
+        prochaine = time.monotonic() + self.intervalle
+        while True:
+            try:
+                evenement = self.file.get(timeout=max(0.0, prochaine - time.monotonic()))
+            except queue.Empty:
+                evenement = None
+            try:
+                if evenement is not None:
+                    self._agreger(evenement)
+                if time.monotonic() >= prochaine:
+                    prochaine = time.monotonic() + self.intervalle
+                    self.vider()
+                    self._ajuster()
+            except Exception as e:
+                print("❌ Erreur analyse des mots :", e)
+
+    def _agreger(self, evenement):
+        if evenement[0] == "pool":
+            self.nouveaux.append(evenement[1:])
+            return
+        if evenement[0] == "oubli":
+            # Rappel de la référence faible (SimpleQueue.put y est permis)
+            _, cle, ref = evenement
+            if self.suivis.get(cle) is ref:
+                del self.suivis[cle]
+            for suivi in (self.tables, self.pools):
+                if cle in suivi and suivi[cle][0] is ref:
+                    del suivi[cle]
+            return
+        mode, mot, trouve, duree, erreurs = evenement
+        with self.verrou:
+            self._compter(mode, mot, trouve, duree, erreurs)
+        self.tours += 1
+        self.modifies.add((mode, mot))
+
+    def _compter(self, mode, mot, trouve, duree, erreurs):
+        stat = self.mots.get((mode, mot))
+        if stat is None:
+            stat = self.mots[mode, mot] = StatMot()
+        stat.tours += 1
+        stat.erreurs += erreurs
+        if trouve:
+            stat.trouves += 1
+            stat.croquis[_seau(duree)] += 1
+        else:
+            stat.temps += 1
+        self.sales.add((mode, mot))
+
+    def vider(self):
+        # Une transaction pour tous les mots modifiés depuis le dernier passage
+        with self.verrou:
+            if not self.sales:
+                return
+            lot, self.sales = self.sales, set()
+            lignes = []
+            for mode, mot in lot:
+                s = self.mots[mode, mot]
+                lignes.append((mode, mot, s.tours, s.trouves, s.temps, s.erreurs, json.dumps(s.croquis.tolist())))
+            self.conn.executemany("INSERT OR REPLACE INTO mots VALUES (?, ?, ?, ?, ?, ?, ?)", lignes)
+            self.conn.commit()
+            self.ecritures += len(lignes)
+
+    def _construire(self, mode, ref):
+        pool = ref()
+        if pool is None:
+            return
+        entree = self.pools.get(id(pool))
+        if entree is not None and entree[0]() is pool:
+            return
+        difficultes = array("d", (self.difficulte(mode, pool.mot(i)) for i in range(len(pool))))
+        if not difficultes:
+            return
+        tables = {nom: ArbrePoids([poids(d, cible) for d in difficultes]) for nom, cible in PALIERS.items()}
+        self.pools[id(pool)] = (ref, mode, difficultes, tables)
+        self.tables[id(pool)] = (ref, tables)
+
+    def _ajuster(self):
+        # Pools nouveaux : construction complète ; les autres : les mots modifiés seulement
+        nouveaux, self.nouveaux = self.nouveaux, []
+        for mode, ref in nouveaux:
+            self._construire(mode, ref)
+        modifies, self.modifies = self.modifies, set()
+        if not modifies:
+            return
+        for ref, mode_pool, difficultes, tables in list(self.pools.values()):
+            pool = ref()
+            if pool is None:
+                continue
+            for mode, mot in modifies:
+                if mode != mode_pool:
+                    continue
+                i = pool.indice(mot)
+                if i is None:
+                    continue
+                ancienne, nouvelle = difficultes[i], self.difficulte(mode, mot)
+                if nouvelle == ancienne:
+                    continue
+                for nom, cible in PALIERS.items():
+                    tables[nom].ajuster(i, poids(nouvelle, cible) - poids(ancienne, cible))
+                difficultes[i] = nouvelle
@@ -0,0 +1,119 @@
+import sqlite3
+import threading
+import time
+
+
+def formater_nom(uid, username, prenom):
+    if username:
+        return f"@{username}"
+    return prenom or f"Utilisateur {uid}"
+
+
+### ━━━ Annuaire des noms affichés ━━━
+
+class AnnuaireNoms:
+    # Les noms sont notés gratuitement à chaque interaction ; un thread de fond
+    # rafraîchit les entrées trop vieilles (et les inconnues) via get_chat.
+    def __init__(self, bot, chemin, ttl=7 * 24 * 3600, intervalle=30, lot=20, pause=0.5):
+        self.bot = bot
+        self.ttl = ttl
+        self.intervalle = intervalle
+        self.lot = lot
+        self.pause = pause
+        self.verrou = threading.Lock()
+        self.entrees = {}   # uid → (username, prenom, maj)
+        self.sales = set()
+        self.inconnus = set()
+        self.introuvables = set()
+        self.abonnes = []   # appelés avec l'uid dont le nom affiché a changé
+        self.conn = sqlite3.connect(chemin, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS noms (uid TEXT PRIMARY KEY, username TEXT, prenom TEXT, maj REAL NOT NULL)"
+        )
+        self.conn.commit()
+        for uid, username, prenom, maj in self.conn.execute("SELECT uid, username, prenom, maj FROM noms"):
+            self.entrees[uid] = (username, prenom, maj)
+
+    def demarrer(self):
+        threading.Thread(target=self._boucle, name="annuaire", daemon=True).start()
+
+    def abonner(self, fn):
+        self.abonnes.append(fn)
+
+    def noter(self, user):
+        self._enregistrer(str(user.id), getattr(user, "username", None), getattr(user, "first_name", None))
+
+    def _enregistrer(self, uid, username, prenom):
+        with self.verrou:
+            ancien = self.entrees.get(uid)
+            maintenant = time.time()
+            # Inutile de réécrire si rien n'a changé et que l'entrée est fraîche
+            if ancien and ancien[:2] == (username, prenom) and maintenant - ancien[2] < self.ttl / 2:
+                return
+            self.entrees[uid] = (username, prenom, maintenant)
+            self.sales.add(uid)
+            self.inconnus.discard(uid)
+            renomme = ancien is None or formater_nom(uid, *ancien[:2]) != formater_nom(uid, username, prenom)
+        if renomme:
+            for fn in self.abonnes:
+                fn(uid)
+
+    def nom(self, uid):
+        return self.noms([uid])[str(uid)]
+
+    def noms(self, uids):
+        # Recherche groupée, sans aucun appel réseau
+        resultat = {}
+        with self.verrou:
+            for uid in uids:
+                uid = str(uid)
+                entree = self.entrees.get(uid)
+                if entree is None:
+                    if uid not in self.introuvables:
+                        self.inconnus.add(uid)
+                    resultat[uid] = formater_nom(uid, None, None)
+                else:
+                    resultat[uid] = formater_nom(uid, entree[0], entree[1])
+        return resultat
+
+    def vider(self):
+        with self.verrou:
+            lignes = [(uid, *self.entrees[uid]) for uid in self.sales]
+            self.sales.clear()
+        if lignes:
+            self.conn.executemany("INSERT OR REPLACE INTO noms (uid, username, prenom, maj) VALUES (?, ?, ?, ?)", lignes)
+            self.conn.commit()
+
+    def _a_rafraichir(self):
+        limite = time.time() - self.ttl
+        with self.verrou:
+            choix = list(self.inconnus)[:self.lot]
+            if len(choix) < self.lot:
+                vieux = sorted((maj, uid) for uid, (_, _, maj) in self.entrees.items() if maj < limite)
+                choix += [uid for _, uid in vieux[:self.lot - len(choix)]]
+        return choix
+
+    def _boucle(self):
+        while True:
+            time.sleep(self.intervalle)
+            for uid in self._a_rafraichir():
+                try:
+                    chat = self.bot.get_chat(int(uid))
+                    self._enregistrer(uid, chat.username, chat.first_name)
+                except Exception as e:
+                    print(f"Erreur get_chat pour user_id={uid} :", e)
+                    # On garde l'ancien nom et on repousse le prochain essai d'un TTL
+                    with self.verrou:
+                        self.inconnus.discard(uid)
+                        ancien = self.entrees.get(uid)
+                        if ancien is None:
+                            self.introuvables.add(uid)
+                        else:
+                            self.entrees[uid] = (ancien[0], ancien[1], time.time())
+                            self.sales.add(uid)
+                time.sleep(self.pause)
+            try:
+                self.vider()
+            except Exception as e:
+                print("❌ Erreur écriture annuaire :", e)
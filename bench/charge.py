@@ -0,0 +1,203 @@
+# 🧪 Banc de charge hors ligne : faux serveur Bot API + parties simulées.
+#   python bench/charge.py --parties 1000 --duree 60 --latence 0.05 --taux-429 0.01
+# Chaque mesure est enregistrée dans bench/resultats/ et comparée à la précédente.
+import argparse
+import glob
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RACINE)
+
+from faux_telegram import FauxTelegram
+from joueurs import PartieSimulee
+from planificateur import Planificateur
+
+# Plus grand = pire, sauf le débit
+METRIQUES = ("p50_ms", "p99_ms", "msgs_par_s", "threads_max", "rss_max_mo")
+PLUS_GRAND_MIEUX = {"msgs_par_s"}
+SEUIL_REGRESSION = 0.10
+
+
+def rss_mo():
+    try:
+        with open("/proc/self/status") as f:
+            for ligne in f:
+                if ligne.startswith("VmRSS:"):
+                    return int(ligne.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def threads_bot():
+    # Les threads de requête du faux serveur ne comptent pas
+    return sum(1 for t in threading.enumerate() if "process_request_thread" not in t.name)
+
+
+def centile(valeurs, q):
+    if not valeurs:
+        return None
+    valeurs = sorted(valeurs)
+    return valeurs[min(len(valeurs) - 1, int(q * len(valeurs)))]
+
+
+### ━━━ Banc de charge ━━━
+
+class Banc:
+    def __init__(self, options):
+        self.options = options
+        self.faux = FauxTelegram(
+            port=options.port, latence=options.latence, gigue=options.gigue,
+            taux_429=options.taux_429, retry_after=options.retry_after
+        )
+        self.planificateur = Planificateur()
+        self.reflexion = tuple(options.reflexion)
+        self.latences = []
+        self.reponses = 0
+        self.actif = False
+        self.parties = {}
+        self.dico = None
+        self.echantillons = []
+
+    def ecouter(self, methode, params, instant):
+        if methode != "sendMessage":
+            return
+        partie = self.parties.get(int(params.get("chat_id", 0) or 0))
+        if partie is not None:
+            partie.recu(params.get("text", ""), instant)
+
+    def echantillonner(self):
+        while True:
+            self.echantillons.append((threads_bot(), rss_mo()))
+            time.sleep(0.5)
+
+    def lancer(self):
+        o = self.options
+        self.faux.demarrer()
+        self.faux.ecouteurs.append(self.ecouter)
+
+        # Le bot tourne dans un dossier jetable : les vraies stats ne sont pas touchées
+        dossier = tempfile.mkdtemp(prefix="banc-mot-")
+        for fichier in ("dictionnaire.json", "dictionnaire.mdb"):
+            if os.path.exists(os.path.join(RACINE, fichier)):
+                shutil.copy(os.path.join(RACINE, fichier), dossier)
+        os.chdir(dossier)
+        os.environ["TELEGRAM_API_URL"] = self.faux.url()
+        os.environ.setdefault("BOT_TOKEN", "1:banc")
+        os.environ.pop("WEBHOOK_URL", None)
+
+        import Ouille
+        if o.sans_limite:
+            # Mesure du bot seul, sans les limites de débit de Telegram
+            Ouille.envois.lever_limites()
+        Ouille.creer_app()
+        self.dico = Ouille.registre.obtenir()
+        threading.Thread(
+            target=Ouille.bot.infinity_polling, kwargs={"timeout": 10, "long_polling_timeout": 1},
+            name="banc-polling", daemon=True
+        ).start()
+
+        self.planificateur.demarrer()
+        threading.Thread(target=self.echantillonner, name="banc-echantillons", daemon=True).start()
+
+        self.actif = True
+        for numero in range(o.parties):
+            partie = PartieSimulee(self, numero, mode=o.mode)
+            self.parties[partie.chat_id] = partie
+            partie.lancer(self.planificateur, o.montee * numero / max(1, o.parties))
+
+        # Les envois comptent à partir de la fin de la montée en charge
+        time.sleep(o.montee)
+        envois_debut = self.faux.compteurs.get("sendMessage", 0)
+        self.latences.clear()
+        debut = time.monotonic()
+        time.sleep(o.duree)
+        self.actif = False
+        ecoule = time.monotonic() - debut
+        envois = self.faux.compteurs.get("sendMessage", 0) - envois_debut
+
+        Ouille.bot.stop_polling()
+        return {
+            "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "etiquette": o.etiquette,
+            "config": {
+                "parties": o.parties, "duree": o.duree, "montee": o.montee, "mode": o.mode,
+                "latence": o.latence, "gigue": o.gigue, "taux_429": o.taux_429,
+                "reflexion": list(self.reflexion), "sans_limite": o.sans_limite,
+            },
+            "reponses": self.reponses,
+            "mesures": len(self.latences),
+            "p50_ms": round(centile(self.latences, 0.50) * 1000, 1) if self.latences else None,
+            "p99_ms": round(centile(self.latences, 0.99) * 1000, 1) if self.latences else None,
+            "msgs_par_s": round(envois / ecoule, 1),
+            "erreurs_429": self.faux.erreurs_429,
+            "fusions": Ouille.envois.fusions,
+            "threads_max": max(t for t, _ in self.echantillons),
+            "rss_max_mo": round(max(r for _, r in self.echantillons), 1),
+        }
+
+
+### ━━━ Résultats ━━━
+
+def comparer(precedent, actuel):
+    lignes = []
+    for cle in METRIQUES:
+        avant, apres = precedent.get(cle), actuel.get(cle)
+        if avant is None or apres is None:
+            continue
+        ecart = (apres - avant) / avant if avant else 0
+        pire = -ecart if cle in PLUS_GRAND_MIEUX else ecart
+        alerte = " ⚠️ régression" if pire > SEUIL_REGRESSION else ""
+        lignes.append(f"  {cle:<12} {avant:>10} → {apres:<10} ({ecart:+.1%}){alerte}")
+    return lignes
+
+
+def enregistrer(resultat, dossier):
+    os.makedirs(dossier, exist_ok=True)
+    precedents = sorted(glob.glob(os.path.join(dossier, "*.json")))
+    chemin = os.path.join(dossier, time.strftime("%Y%m%d-%H%M%S") + ".json")
+    with open(chemin, "w", encoding="utf-8") as f:
+        json.dump(resultat, f, indent=2, ensure_ascii=False)
+
+    print(json.dumps(resultat, indent=2, ensure_ascii=False))
+    print(f"💾 Résultats : {chemin}")
+    if precedents:
+        with open(precedents[-1], encoding="utf-8") as f:
+            precedent = json.load(f)
+        if precedent.get("config") != resultat["config"]:
+            print("ℹ️ Configuration différente de la mesure précédente, comparaison indicative.")
+        print(f"📈 Comparaison avec {os.path.basename(precedents[-1])} :")
+        print("\n".join(comparer(precedent, resultat)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Banc de charge hors ligne du bot Mot")
+    parser.add_argument("--parties", type=int, default=100, help="parties simultanées (2 joueurs chacune)")
+    parser.add_argument("--duree", type=float, default=60, help="secondes de mesure après la montée en charge")
+    parser.add_argument("--montee", type=float, default=10, help="secondes pour lancer toutes les parties")
+    parser.add_argument("--mode", default="synonyme", choices=["synonyme", "antonyme"])
+    parser.add_argument("--latence", type=float, default=0.05, help="latence de chaque appel API (s)")
+    parser.add_argument("--gigue", type=float, default=0.02, help="latence aléatoire ajoutée (s)")
+    parser.add_argument("--taux-429", type=float, default=0.0, help="proportion d'envois refusés en 429")
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--reflexion", type=float, nargs=2, default=(0.5, 2.0), metavar=("MIN", "MAX"),
+                        help="temps de réflexion des joueurs (s)")
+    parser.add_argument("--sans-limite", action="store_true", help="désactive les seaux de jetons des envois")
+    parser.add_argument("--port", type=int, default=18081)
+    parser.add_argument("--resultats", default=os.path.join(RACINE, "bench", "resultats"))
+    parser.add_argument("--etiquette", default="", help="note libre enregistrée avec la mesure")
+    options = parser.parse_args()
+
+    resultat = Banc(options).lancer()
+    enregistrer(resultat, options.resultats)
+
+
+if __name__ == "__main__":
+    main()
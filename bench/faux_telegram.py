@@ -0,0 +1,162 @@
+import json
+import random
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import parse_qs, urlparse
+
+
+### ━━━ Faux serveur Bot API ━━━
+
+class FauxTelegram:
+    # Imite les méthodes de l'API utilisées par le bot. Les updates sont
+    # injectées par les simulateurs et servies par getUpdates (long polling).
+    def __init__(self, port=18081, latence=0.0, gigue=0.0, taux_429=0.0, retry_after=1):
+        self.port = port
+        self.latence = latence
+        self.gigue = gigue
+        self.taux_429 = taux_429
+        self.retry_after = retry_after
+        self.cond = threading.Condition()
+        self.updates = []          # (update_id, dict)
+        self.prochain_update = 1
+        self.prochain_message = 1
+        self.ecouteurs = []        # fn(methode, params, instant) à chaque envoi accepté
+        self.compteurs = {}        # méthode → nombre d'appels acceptés
+        self.erreurs_429 = 0
+        self.serveur = None
+
+    def url(self):
+        return f"http://127.0.0.1:{self.port}"
+
+    def demarrer(self):
+        faux = self
+
+        class Gestionnaire(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                faux._traiter(self)
+
+            def do_POST(self):
+                faux._traiter(self)
+
+        self.serveur = ThreadingHTTPServer(("127.0.0.1", self.port), Gestionnaire)
+        self.serveur.daemon_threads = True
+        threading.Thread(target=self.serveur.serve_forever, name="faux-telegram", daemon=True).start()
+
+    def arreter(self):
+        if self.serveur:
+            self.serveur.shutdown()
+
+    # ➤ Côté simulateurs
+
+    def injecter(self, update):
+        with self.cond:
+            update["update_id"] = self.prochain_update
+            self.updates.append((self.prochain_update, update))
+            self.prochain_update += 1
+            self.cond.notify_all()
+
+    def message(self, chat_id, user, texte):
+        self.injecter({"message": {
+            "message_id": self._id_message(),
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "group", "title": f"Banc {chat_id}"},
+            "from": user,
+            "text": texte,
+        }})
+
+    def clic(self, chat_id, user, donnees):
+        self.injecter({"callback_query": {
+            "id": str(self._id_message()),
+            "from": user,
+            "chat_instance": str(chat_id),
+            "data": donnees,
+            "message": {
+                "message_id": self._id_message(),
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "group", "title": f"Banc {chat_id}"},
+                "text": "…",
+            },
+        }})
+
+    def _id_message(self):
+        with self.cond:
+            i = self.prochain_message
+            self.prochain_message += 1
+            return i
+
+    # ➤ Côté bot
+
+    def _traiter(self, requete):
+        url = urlparse(requete.path)
+        methode = url.path.rsplit("/", 1)[-1]
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        longueur = int(requete.headers.get("Content-Length") or 0)
+        corps = requete.rfile.read(longueur) if longueur else b""
+        if corps and requete.headers.get("Content-Type", "").startswith("application/x-www-form-urlencoded"):
+            params.update({k: v[0] for k, v in parse_qs(corps.decode()).items()})
+
+        if methode != "getUpdates":
+            delai = self.latence + random.uniform(0, self.gigue)
+            if delai:
+                time.sleep(delai)
+
+        if methode in ("sendMessage", "sendDocument") and random.random() < self.taux_429:
+            with self.cond:
+                self.erreurs_429 += 1
+            self._repondre(requete, 429, {
+                "ok": False, "error_code": 429,
+                "description": f"Too Many Requests: retry after {self.retry_after}",
+                "parameters": {"retry_after": self.retry_after},
+            })
+            return
+
+        resultat = self._resultat(methode, params)
+        with self.cond:
+            self.compteurs[methode] = self.compteurs.get(methode, 0) + 1
+        instant = time.monotonic()
+        for ecouteur in self.ecouteurs:
+            ecouteur(methode, params, instant)
+        self._repondre(requete, 200, {"ok": True, "result": resultat})
+
+    def _resultat(self, methode, params):
+        if methode == "getUpdates":
+            return self._attendre_updates(int(params.get("offset", 0) or 0), float(params.get("timeout", 0) or 0))
+        if methode == "getMe":
+            return {"id": 1, "is_bot": True, "first_name": "Banc", "username": "banc_bot"}
+        if methode == "getChat":
+            uid = int(params["chat_id"])
+            return {"id": uid, "type": "private", "first_name": f"J{uid}", "username": f"j{uid}"}
+        if methode in ("sendMessage", "sendDocument", "editMessageText"):
+            return {
+                "message_id": self._id_message(),
+                "date": int(time.time()),
+                "chat": {"id": int(params.get("chat_id", 0) or 0), "type": "group"},
+                "text": params.get("text", ""),
+            }
+        # answerCallbackQuery, deleteMessage, deleteWebhook, setWebhook…
+        return True
+
+    def _attendre_updates(self, offset, timeout):
+        limite = time.monotonic() + min(timeout, 5)
+        with self.cond:
+            # Les updates confirmées (id < offset) ne seront plus redemandées
+            while self.updates and self.updates[0][0] < offset:
+                self.updates.pop(0)
+            while not self.updates and time.monotonic() < limite:
+                self.cond.wait(limite - time.monotonic())
+            return [u for _, u in self.updates[:100]]
+
+    def _repondre(self, requete, code, contenu):
+        donnees = json.dumps(contenu).encode()
+        try:
+            requete.send_response(code)
+            requete.send_header("Content-Type", "application/json")
+            requete.send_header("Content-Length", str(len(donnees)))
+            requete.end_headers()
+            requete.wfile.write(donnees)
+        except OSError:
+            pass
@@ -0,0 +1,64 @@
+import random
+import re
+import threading
+import time
+
+# Invite envoyée par Game.ask_next (éventuellement fusionnée avec d'autres messages)
+INVITE = re.compile(r"Tour de (@\w+)</b>\n<blockquote>Mot : <b>(.+?)</b>")
+
+
+### ━━━ Simulateurs de joueurs ━━━
+
+class PartieSimulee:
+    # Deux joueurs d'un même groupe : /startgame, choix du mode, /play,
+    # /flashgame, puis une bonne réponse à chaque invite après un temps de réflexion.
+    def __init__(self, banc, numero, mode="synonyme"):
+        self.banc = banc
+        self.chat_id = -1000 - numero
+        self.mode = mode
+        self.joueurs = {}
+        for uid in (2 * numero + 1, 2 * numero + 2):
+            self.joueurs[f"@j{uid}"] = {"id": uid, "is_bot": False, "first_name": f"J{uid}", "username": f"j{uid}"}
+        self.createur, self.invite = self.joueurs.values()
+        self.utilises = set()
+        self.reponse_envoyee = None  # instant de la dernière réponse, en attente d'invite
+        self.verrou = threading.Lock()
+
+    def lancer(self, planificateur, decalage):
+        faux = self.banc.faux
+        planificateur.planifier(decalage, faux.message, self.chat_id, self.createur, "/startgame")
+        planificateur.planifier(decalage + 0.3, faux.clic, self.chat_id, self.createur, f"mode_{self.mode}")
+        planificateur.planifier(decalage + 0.6, faux.message, self.chat_id, self.invite, "/play")
+        planificateur.planifier(decalage + 0.9, faux.message, self.chat_id, self.createur, "/flashgame")
+
+    def recu(self, texte, instant):
+        invites = INVITE.findall(texte)
+        if not invites:
+            return
+        nom, mot = invites[-1]
+        with self.verrou:
+            if self.reponse_envoyee is not None:
+                self.banc.latences.append(instant - self.reponse_envoyee)
+                self.reponse_envoyee = None
+            self.utilises.add(mot)
+        joueur = self.joueurs.get(nom)
+        if joueur is None or not self.banc.actif:
+            return
+        reponse = self.choisir(mot)
+        if reponse is None:
+            return  # Plus de réponse libre : on laisse le chrono faire
+        reflexion = random.uniform(*self.banc.reflexion)
+        self.banc.planificateur.planifier(reflexion, self.repondre, joueur, reponse)
+
+    def choisir(self, mot):
+        libres = [r for r in self.banc.dico[self.mode].liste_reponses(mot) if r not in self.utilises]
+        return random.choice(libres) if libres else None
+
+    def repondre(self, joueur, reponse):
+        if not self.banc.actif:
+            return
+        with self.verrou:
+            self.utilises.add(reponse)
+            self.reponse_envoyee = time.monotonic()
+        self.banc.reponses += 1
+        self.banc.faux.message(self.chat_id, joueur, reponse)
@@ -0,0 +1,291 @@
+import asyncio
+import concurrent.futures
+import threading
+import time
+from collections import deque
+
+import telebot
+from telebot.async_telebot import AsyncTeleBot
+from telebot import asyncio_helper
+
+from envoi import DistributeurEnvois
+
+
+class Horloge:
+    # La boucle et son thread : on sait si l'appelant tourne déjà dessus
+    def __init__(self, loop):
+        self.loop = loop
+        self.thread = None  # identifiant du thread de la boucle, fixé au démarrage
+
+    def sur_boucle(self):
+        return threading.get_ident() == self.thread
+
+    def appeler(self, fn, *args):
+        if self.sur_boucle():
+            self.loop.call_soon(fn, *args)
+        else:
+            self.loop.call_soon_threadsafe(fn, *args)
+
+
+### ━━━ Chronos : loop.call_later ━━━
+
+class ChronoBoucle:
+    __slots__ = ("poignee", "planificateur")
+
+    def __init__(self, poignee, planificateur):
+        self.poignee = poignee
+        self.planificateur = planificateur
+
+    def annuler(self):
+        if not self.poignee.cancelled():
+            self.poignee.cancel()
+            self.planificateur.actifs.discard(self)
+
+    def restant(self):
+        return max(0, self.poignee.when() - self.planificateur.loop.time())
+
+
+class PlanificateurBoucle:
+    # Même interface que Planificateur, mais chaque chrono est un TimerHandle de la
+    # boucle : pas de thread, annulation retirée tout de suite du compte
+    def __init__(self, horloge):
+        self.horloge = horloge
+        self.loop = horloge.loop
+        self.actifs = set()
+
+    def demarrer(self):
+        pass
+
+    def planifier(self, delai, fn, *args):
+        # À appeler depuis la boucle (handlers, chronos)
+        chrono = ChronoBoucle(None, self)
+        chrono.poignee = self.loop.call_later(delai, self._declencher, chrono, fn, args)
+        self.actifs.add(chrono)
+        return chrono
+
+    def _declencher(self, chrono, fn, args):
+        self.actifs.discard(chrono)
+        try:
+            fn(*args)
+        except Exception as e:
+            print("❌ Erreur tâche planifiée :", e)
+
+    def taille(self):
+        return len(self.actifs)
+
+    def actives(self):
+        return len(self.actifs)
+
+
+### ━━━ Boîtes des chats : la boucle elle-même ━━━
+
+class ActeursBoucle:
+    # Même interface que PoolActeurs : un seul thread exécute tout, dans l'ordre
+    # de dépôt, donc chaque chat voit ses événements l'un après l'autre.
+    # prealable(cle) peut renvoyer une fonction bloquante (ex. charger un dictionnaire) :
+    # elle tourne dans l'exécuteur de la boucle et le chat est suspendu jusqu'à sa fin,
+    # ses événements suivants retenus dans l'ordre ; les autres chats continuent.
+    def __init__(self, horloge, prealable=None, capacite=200):
+        self.horloge = horloge
+        self.prealable = prealable
+        self.capacite = capacite
+        self.boites = {}  # jamais rempli : rien n'attend hors de la file de la boucle
+        self.suspendus = {}  # cle → deque de (fn, args) retenus pendant un prealable
+        self.par_cle = {}    # cle → événements déposés pas encore exécutés
+        self.verrou = threading.Lock()  # dépôts possibles depuis les threads annexes
+        self.en_attente = 0
+        self.rejetes = 0
+
+    def demarrer(self):
+        pass
+
+    def poster(self, cle, fn, *args):
+        # Toujours accepté : chronos et événements internes ne se perdent pas
+        self._deposer(cle, fn, args, False)
+
+    def proposer(self, cle, fn, *args):
+        # Refusé (False) si la boîte du chat est pleine, comme avec PoolActeurs
+        return self._deposer(cle, fn, args, True)
+
+    def _deposer(self, cle, fn, args, limite):
+        with self.verrou:
+            n = self.par_cle.get(cle, 0)
+            if limite and n >= self.capacite:
+                self.rejetes += 1
+                return False
+            self.par_cle[cle] = n + 1
+            self.en_attente += 1
+        self.horloge.appeler(self._executer, cle, fn, args)
+        return True
+
+    def profondeur(self):
+        return self.en_attente + sum(len(attente) for attente in list(self.suspendus.values()))
+
+    def _executer(self, cle, fn, args):
+        with self.verrou:
+            self.en_attente -= 1
+        attente = self.suspendus.get(cle)
+        if attente is not None:
+            attente.append((fn, args))
+            return
+        if self.prealable is not None:
+            bloquant = self.prealable(cle)
+            if bloquant is not None:
+                self.suspendus[cle] = deque([(fn, args)])
+                futur = self.horloge.loop.run_in_executor(None, bloquant)
+                futur.add_done_callback(lambda f: self._reprendre(cle, f))
+                return
+        self._lancer(cle, fn, args)
+
+    def _reprendre(self, cle, futur):
+        if futur.exception() is not None:
+            print(f"❌ Préalable de {cle} en échec :", futur.exception())
+        attente = self.suspendus.pop(cle)
+        # Le premier événement passe sans nouveau préalable (pas de boucle sur un échec)
+        fn, args = attente.popleft()
+        self._lancer(cle, fn, args)
+        while attente:
+            fn, args = attente.popleft()
+            with self.verrou:
+                self.en_attente += 1
+            self._executer(cle, fn, args)
+            if cle in self.suspendus:
+                # Nouveau préalable en route : le reste attend derrière lui
+                self.suspendus[cle].extend(attente)
+                return
+
+    def _lancer(self, cle, fn, args):
+        with self.verrou:
+            n = self.par_cle.pop(cle) - 1
+            if n:
+                self.par_cle[cle] = n
+        try:
+            fn(*args)
+        except Exception as e:
+            print(f"❌ Erreur acteur {cle} :", e)
+
+
+### ━━━ Envois : coroutines sur une seule session HTTP ━━━
+
+class EnvoisBoucle(DistributeurEnvois):
+    # Mêmes files, seaux de jetons, fusions et 429 que DistributeurEnvois ; les
+    # workers sont des coroutines qui attendent les réponses sans bloquer de thread
+    def __init__(self, bot_async, horloge, nb_workers=32, **options):
+        super().__init__(bot_async, nb_workers=nb_workers, **options)
+        self.horloge = horloge
+        self.reveil = asyncio.Event()
+
+    def demarrer(self):
+        # Depuis la boucle
+        for _ in range(self.nb_workers):
+            self.horloge.loop.create_task(self._boucle_async())
+
+    def _deposer(self, envoi):
+        # Les threads annexes (sauvegarde, webhook, document) repassent par la boucle
+        if not self.horloge.sur_boucle():
+            self.horloge.loop.call_soon_threadsafe(self._deposer, envoi)
+            return
+        super()._deposer(envoi)
+        self.reveil.set()
+
+    async def _boucle_async(self):
+        while True:
+            with self.cond:
+                chat_id, attente = self._choisir(time.monotonic())
+                if chat_id is not None:
+                    envoi = self._extraire(chat_id)
+            if chat_id is None:
+                self.reveil.clear()
+                try:
+                    await asyncio.wait_for(self.reveil.wait(), attente)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            fn, args, kwargs = self._requete(envoi)
+            try:
+                await fn(*args, **kwargs)
+                retry_after = None
+            except Exception as e:
+                retry_after = self._echec(envoi, e)
+
+            with self.cond:
+                self._rendre(chat_id, envoi, retry_after)
+            self.reveil.set()
+
+
+### ━━━ Réception : AsyncTeleBot ━━━
+
+class BotBoucle(AsyncTeleBot):
+    # Le long polling passe par la session aiohttp partagée ; les updates reçues
+    # sont confiées au bot synchrone (tri, acteurs, handlers), qui tourne sur la boucle.
+    # Les documents (téléchargement bloquant) passent par un unique thread à part.
+    def __init__(self, token, modele, accepter):
+        super().__init__(token)
+        self.modele = modele
+        self.accepter = accepter
+        self.loop = None
+        self.documents = concurrent.futures.ThreadPoolExecutor(1, thread_name_prefix="documents")
+
+    def relayer(self, updates):
+        # Depuis un autre thread (webhook) : même chemin que le polling
+        asyncio.run_coroutine_threadsafe(self.process_new_updates(updates), self.loop)
+
+    async def process_new_updates(self, updates):
+        for update in updates:
+            message = update.message
+            if message is not None and message.content_type == "document":
+                if self.accepter(update):
+                    self.documents.submit(self._document, update)
+                continue
+            self.modele.process_new_updates([update])
+
+    def _document(self, update):
+        try:
+            telebot.TeleBot.process_new_updates(self.modele, [update])
+        except Exception as e:
+            print(f"❌ Erreur document {update.update_id} :", e)
+
+
+class ApiBoucle:
+    # Appels ponctuels des threads annexes (annuaire, documents) : même session
+    # aiohttp que les envois, le thread appelant attend la réponse
+    def __init__(self, bot_async, horloge, delai=60):
+        self.bot_async = bot_async
+        self.horloge = horloge
+        self.delai = delai
+
+    def _attendre(self, methode, *args):
+        if self.horloge.sur_boucle():
+            raise RuntimeError(f"{methode} bloquerait la boucle")
+        appel = getattr(self.bot_async, methode)(*args)
+        return asyncio.run_coroutine_threadsafe(appel, self.horloge.loop).result(self.delai)
+
+    def get_chat(self, chat_id):
+        return self._attendre("get_chat", chat_id)
+
+    def get_file(self, file_id):
+        return self._attendre("get_file", file_id)
+
+    def download_file(self, chemin):
+        return self._attendre("download_file", chemin)
+
+
+class RelaisWebhook:
+    # Se substitue au bot auprès d'IngestionWebhook
+    def __init__(self, bot_async):
+        self.bot_async = bot_async
+
+    def process_new_updates(self, updates):
+        self.bot_async.relayer(updates)
+
+
+def configurer_session(api_url=None, connexions=50, instrumenter=None):
+    # Une seule ClientSession aiohttp (keep-alive) pour toute l'API, bornée à `connexions`.
+    # instrumenter(requete) → requete chronométrée (voir requete_async_instrumentee)
+    if api_url:
+        asyncio_helper.API_URL = api_url.rstrip("/") + "/bot{0}/{1}"
+        asyncio_helper.FILE_URL = api_url.rstrip("/") + "/file/bot{0}/{1}"
+    asyncio_helper.REQUEST_LIMIT = connexions
+    if instrumenter is not None:
+        asyncio_helper._process_request = instrumenter(asyncio_helper._process_request)
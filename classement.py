@@ -0,0 +1,238 @@
+import random
+import threading
+
+NIVEAU_MAX = 32
+
+
+class _Noeud:
+    __slots__ = ("cle", "suivants", "largeurs")
+
+    def __init__(self, cle, niveau):
+        self.cle = cle
+        self.suivants = [None] * niveau
+        # largeurs[i] = nombre de rangs franchis en suivant suivants[i]
+        self.largeurs = [0] * niveau
+
+
+class ListeSautIndexee:
+    # Liste à sauts avec largeurs : insertion, suppression, rang et accès
+    # par position en O(log n)
+    def __init__(self):
+        self.tete = _Noeud(None, NIVEAU_MAX)
+        self.niveau = 1
+        self.taille = 0
+
+    def _niveau_aleatoire(self):
+        niveau = 1
+        while niveau < NIVEAU_MAX and random.random() < 0.25:
+            niveau += 1
+        return niveau
+
+    def inserer(self, cle):
+        precedents = [None] * NIVEAU_MAX
+        rangs = [0] * NIVEAU_MAX
+        x = self.tete
+        for i in reversed(range(self.niveau)):
+            rangs[i] = rangs[i + 1] if i + 1 < self.niveau else 0
+            while x.suivants[i] is not None and x.suivants[i].cle < cle:
+                rangs[i] += x.largeurs[i]
+                x = x.suivants[i]
+            precedents[i] = x
+
+        niveau = self._niveau_aleatoire()
+        if niveau > self.niveau:
+            for i in range(self.niveau, niveau):
+                rangs[i] = 0
+                precedents[i] = self.tete
+                self.tete.largeurs[i] = self.taille
+            self.niveau = niveau
+
+        noeud = _Noeud(cle, niveau)
+        for i in range(niveau):
+            noeud.suivants[i] = precedents[i].suivants[i]
+            precedents[i].suivants[i] = noeud
+            noeud.largeurs[i] = precedents[i].largeurs[i] - (rangs[0] - rangs[i])
+            precedents[i].largeurs[i] = rangs[0] - rangs[i] + 1
+        for i in range(niveau, self.niveau):
+            precedents[i].largeurs[i] += 1
+        self.taille += 1
+
+    def supprimer(self, cle):
+        precedents = [None] * NIVEAU_MAX
+        x = self.tete
+        for i in reversed(range(self.niveau)):
+            while x.suivants[i] is not None and x.suivants[i].cle < cle:
+                x = x.suivants[i]
+            precedents[i] = x
+        x = x.suivants[0]
+        if x is None or x.cle != cle:
+            return False
+        for i in range(self.niveau):
+            if precedents[i].suivants[i] is x:
+                precedents[i].largeurs[i] += x.largeurs[i] - 1
+                precedents[i].suivants[i] = x.suivants[i]
+            else:
+                precedents[i].largeurs[i] -= 1
+        while self.niveau > 1 and self.tete.suivants[self.niveau - 1] is None:
+            self.niveau -= 1
+        self.taille -= 1
+        return True
+
+    def rang(self, cle):
+        # Rang à partir de 1, None si la clé est absente
+        rang = 0
+        x = self.tete
+        for i in reversed(range(self.niveau)):
+            while x.suivants[i] is not None and x.suivants[i].cle <= cle:
+                rang += x.largeurs[i]
+                x = x.suivants[i]
+            if x.cle == cle:
+                return rang
+        return None
+
+    def tranche(self, debut, nombre):
+        # Les `nombre` clés à partir de la position `debut` (0 = premier)
+        if debut < 0 or debut >= self.taille or nombre <= 0:
+            return []
+        parcouru = 0
+        x = self.tete
+        for i in reversed(range(self.niveau)):
+            while x.suivants[i] is not None and parcouru + x.largeurs[i] <= debut + 1:
+                parcouru += x.largeurs[i]
+                x = x.suivants[i]
+        resultat = []
+        while x is not None and len(resultat) < nombre:
+            resultat.append(x.cle)
+            x = x.suivants[0]
+        return resultat
+
+
+### ━━━ Index du classement ━━━
+
+class Classement:
+    # Clé (-victoires, uid) : le premier élément est le meilleur joueur
+    def __init__(self, exclus=()):
+        self.exclus = set(str(uid) for uid in exclus)
+        self.verrou = threading.Lock()
+        # Appelés avec (premier rang touché, dernier rang touché ou None = jusqu'au bout)
+        self.abonnes = []
+        self.reconstruire({})
+
+    def abonner(self, fn):
+        self.abonnes.append(fn)
+
+    def _signaler(self, premier, dernier):
+        for fn in self.abonnes:
+            fn(premier, dernier)
+
+    def reconstruire(self, donnees):
+        liste = ListeSautIndexee()
+        victoires = {}
+        exclus_presents = set()
+        for uid, record in donnees.items():
+            uid = str(uid)
+            if uid in self.exclus:
+                exclus_presents.add(uid)
+                continue
+            victoires[uid] = record["victoires"]
+            liste.inserer((-record["victoires"], uid))
+        with self.verrou:
+            self.liste = liste
+            self.victoires = victoires
+            # Hors classement mais comptés parmi les joueurs enregistrés (motArena)
+            self.exclus_presents = exclus_presents
+        self._signaler(1, None)
+
+    def ajouter(self, uid, victoires=0):
+        uid = str(uid)
+        if uid in self.exclus:
+            with self.verrou:
+                self.exclus_presents.add(uid)
+            return
+        with self.verrou:
+            ancien = self.victoires.get(uid)
+            if ancien is not None:
+                if not victoires:
+                    return
+                ancien_rang = self.liste.rang((-ancien, uid))
+                self.liste.supprimer((-ancien, uid))
+            nouveau = (ancien or 0) + victoires
+            self.victoires[uid] = nouveau
+            self.liste.inserer((-nouveau, uid))
+            rang = self.liste.rang((-nouveau, uid))
+        # Un joueur qui monte ne décale que les rangs entre sa nouvelle et son ancienne
+        # place ; un nouveau venu décale tout ce qui est derrière lui
+        self._signaler(rang, None if ancien is None else ancien_rang)
+
+    def rang(self, uid):
+        uid = str(uid)
+        with self.verrou:
+            victoires = self.victoires.get(uid)
+            if victoires is None:
+                return None
+            return self.liste.rang((-victoires, uid))
+
+    def page(self, numero, taille_page):
+        # Liste de (rang, uid, victoires) pour la page `numero` (0 = première)
+        debut = numero * taille_page
+        with self.verrou:
+            cles = self.liste.tranche(debut, taille_page)
+        return [(debut + i + 1, uid, -moins_victoires) for i, (moins_victoires, uid) in enumerate(cles)]
+
+    def taille(self):
+        with self.verrou:
+            return self.liste.taille
+
+    def joueurs(self):
+        # Même total que stats.compter(), sans parcourir la base
+        with self.verrou:
+            return self.liste.taille + len(self.exclus_presents)
+
+
+### ━━━ Pages rendues du classement ━━━
+
+class PagesClassement:
+    # Texte de chaque page déjà rendue ; une page n'est jetée que si l'un des
+    # rangs qu'elle affiche a bougé. Un rendu commencé avant une invalidation
+    # n'est pas gardé (il a pu lire l'ancien ordre).
+    def __init__(self, classement, taille_page, rendre):
+        self.taille_page = taille_page
+        self.rendre = rendre  # rendre(lignes de (rang, uid, victoires)) → texte
+        self.classement = classement
+        self.pages = {}  # numéro → texte
+        self.generation = 0
+        self.verrou = threading.Lock()
+        self.servies = 0
+        self.rendues = 0
+        classement.abonner(self.invalider)
+
+    def nb_pages(self):
+        return max(1, -(-self.classement.taille() // self.taille_page))
+
+    def invalider(self, premier, dernier):
+        premiere = (premier - 1) // self.taille_page
+        derniere = None if dernier is None else (dernier - 1) // self.taille_page
+        with self.verrou:
+            self.generation += 1
+            for numero in [n for n in self.pages if n >= premiere and (derniere is None or n <= derniere)]:
+                del self.pages[numero]
+
+    def renommer(self, uid):
+        # Nom affiché changé : seule la page où figure ce joueur est à refaire
+        rang = self.classement.rang(uid)
+        if rang is not None:
+            self.invalider(rang, rang)
+
+    def page(self, numero):
+        with self.verrou:
+            texte = self.pages.get(numero)
+            generation = self.generation
+        if texte is not None:
+            self.servies += 1
+            return texte
+        texte = self.rendre(self.classement.page(numero, self.taille_page))
+        self.rendues += 1
+        with self.verrou:
+            if self.generation == generation:
+                self.pages[numero] = texte
+        return texte
@@ -0,0 +1,21 @@
+import json
+import os
+import sys
+import time
+
+from dictionnaire import DicoCompile, ecrire_compile
+
+# Usage : python compiler_dico.py [dictionnaire.json] [dictionnaire.mdb]
+if __name__ == "__main__":
+    source = sys.argv[1] if len(sys.argv) > 1 else "dictionnaire.json"
+    cible = sys.argv[2] if len(sys.argv) > 2 else os.path.splitext(source)[0] + ".mdb"
+
+    debut = time.perf_counter()
+    with open(source, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    ecrire_compile(data, cible)
+    duree = time.perf_counter() - debut
+
+    modes = DicoCompile(cible).modes
+    resume = ", ".join(f"{mode} : {len(pool)} mots" for mode, pool in modes.items())
+    print(f"✅ {cible} ({os.path.getsize(cible)} octets, {duree:.2f} s) — {resume}")
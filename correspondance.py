@@ -0,0 +1,79 @@
+import unicodedata
+
+# stricte : comme avant (minuscules) ; souple : accents, casse, ligatures,
+# apostrophes ignorés ; tolerante : souple + une faute de frappe (deux si mot long)
+NIVEAUX = ("stricte", "souple", "tolerante")
+
+LIGATURES = str.maketrans({
+    "œ": "oe", "Œ": "oe", "æ": "ae", "Æ": "ae",
+    "’": "'", "‘": "'", "ʼ": "'", "`": "'", "´": "'",
+    "‐": "-", "‑": "-", "–": "-", "—": "-",
+})
+
+
+def normaliser(texte):
+    texte = texte.translate(LIGATURES)
+    texte = unicodedata.normalize("NFKD", texte)
+    texte = "".join(c for c in texte if not unicodedata.combining(c))
+    return " ".join(texte.casefold().split()).strip(" .!?,;:")
+
+
+def fautes_autorisees(longueur):
+    if longueur < 4:
+        return 0
+    return 1 if longueur < 8 else 2
+
+
+def distance_bornee(a, b, limite):
+    # Levenshtein avec abandon dès que la ligne dépasse la limite (renvoie limite + 1)
+    if abs(len(a) - len(b)) > limite:
+        return limite + 1
+    precedente = list(range(len(b) + 1))
+    for i, ca in enumerate(a, start=1):
+        courante = [i] + [0] * len(b)
+        for j, cb in enumerate(b, start=1):
+            courante[j] = min(
+                precedente[j] + 1,
+                courante[j - 1] + 1,
+                precedente[j - 1] + (ca != cb)
+            )
+        if min(courante) > limite:
+            return limite + 1
+        precedente = courante
+    return min(precedente[-1], limite + 1)
+
+
+### ━━━ Index des réponses d'un mot ━━━
+
+class IndexReponses:
+    __slots__ = ("exactes", "normalisees", "par_longueur")
+
+    def __init__(self, reponses):
+        self.exactes = frozenset(reponses)
+        self.normalisees = {}
+        self.par_longueur = {}
+        for reponse in reponses:
+            cle = normaliser(reponse)
+            self.normalisees.setdefault(cle, reponse)
+            self.par_longueur.setdefault(len(cle), []).append((cle, reponse))
+
+    def trouver(self, saisie, niveau="souple"):
+        # Renvoie la réponse officielle reconnue, ou None
+        if saisie in self.exactes:
+            return saisie
+        if niveau == "stricte":
+            return None
+        cle = normaliser(saisie)
+        reponse = self.normalisees.get(cle)
+        if reponse is not None or niveau != "tolerante":
+            return reponse
+
+        # Seules les réponses de longueur proche peuvent être à distance ≤ k
+        k = fautes_autorisees(len(cle))
+        meilleure, meilleure_distance = None, k + 1
+        for longueur in range(len(cle) - k, len(cle) + k + 1):
+            for candidate, reponse in self.par_longueur.get(longueur, ()):
+                d = distance_bornee(cle, candidate, meilleure_distance - 1)
+                if d < meilleure_distance:
+                    meilleure, meilleure_distance = reponse, d
+        return meilleure
@@ -0,0 +1,248 @@
+import functools
+import json
+import mmap
+import os
+import random
+import struct
+import sys
+import zlib
+from array import array
+
+from correspondance import IndexReponses
+
+# Ordre des modes dans le JSON source et dans le format compilé
+MODES = (("synonyme", "synonymes"), ("antonyme", "antonymes"))
+
+
+### ━━━ Dictionnaire compilé au chargement ━━━
+
+class ModeDico:
+    # Mots tirables d'un mode (tuple figé) et index des réponses valides par mot
+    def __init__(self, entrees):
+        self.mots = tuple(entrees)
+        self.positions = {mot: i for i, mot in enumerate(self.mots)}
+        self.reponses = {mot: tuple(reponses) for mot, reponses in entrees.items()}
+        self.index = {mot: IndexReponses(reponses) for mot, reponses in self.reponses.items()}
+
+    def __len__(self):
+        return len(self.mots)
+
+    def mot(self, i):
+        return self.mots[i]
+
+    def indice(self, mot):
+        return self.positions.get(mot)
+
+    def liste_reponses(self, mot):
+        return self.reponses.get(mot, ())
+
+    def valides(self, mot):
+        index = self.index.get(mot)
+        return index.exactes if index else frozenset()
+
+    def trouver(self, mot, saisie, niveau="souple"):
+        index = self.index.get(mot)
+        return index.trouver(saisie, niveau) if index else None
+
+
+def compiler_dictionnaire(data):
+    return {mode: ModeDico(data[cle]) for mode, cle in MODES}
+
+
+### ━━━ Format binaire compilé (.mdb), lu par mmap ━━━
+#
+# En-tête   : "MDIC", version, nb_chaines, taille_blob, nb_modes   (uint32 LE)
+# Chaînes   : offsets[nb_chaines + 1], puis blob UTF-8 (complété à 4 octets)
+# Par mode  : nb_mots, nb_adj, taille_hash
+#             mots[nb_mots]            → id de chaîne du mot
+#             adj_offsets[nb_mots + 1] → tranche de adj pour chaque mot
+#             adj[nb_adj]              → ids de chaîne des réponses
+#             hash[taille_hash]        → indice de mot + 1 (0 = vide), sondage linéaire
+
+MAGIE = b"MDIC"
+VERSION = 1
+EN_TETE = struct.Struct("<4sIIII")
+EN_TETE_MODE = struct.Struct("<III")
+
+
+def _hacher(octets):
+    return zlib.crc32(octets)
+
+
+def ecrire_compile(data, chemin):
+    ids = {}
+    chaines = []
+
+    def interner(texte):
+        i = ids.get(texte)
+        if i is None:
+            i = ids[texte] = len(chaines)
+            chaines.append(texte.encode("utf-8"))
+        return i
+
+    sections = []
+    for _, cle in MODES:
+        entrees = data[cle]
+        mots = array("I", (interner(mot) for mot in entrees))
+        adj_offsets = array("I", [0])
+        adj = array("I")
+        for reponses in entrees.values():
+            adj.extend(interner(r) for r in reponses)
+            adj_offsets.append(len(adj))
+        taille_hash = 1
+        while taille_hash < 2 * max(1, len(mots)):
+            taille_hash *= 2
+        table = array("I", [0]) * taille_hash
+        for i, sid in enumerate(mots):
+            h = _hacher(chaines[sid]) & (taille_hash - 1)
+            while table[h]:
+                h = (h + 1) & (taille_hash - 1)
+            table[h] = i + 1
+        sections.append((mots, adj_offsets, adj, table))
+
+    offsets = array("I", [0])
+    for octets in chaines:
+        offsets.append(offsets[-1] + len(octets))
+    blob = b"".join(chaines)
+    blob += b"\0" * (-len(blob) % 4)
+
+    def le(tableau):
+        if sys.byteorder != "little":
+            tableau = array("I", tableau)
+            tableau.byteswap()
+        return tableau.tobytes()
+
+    temporaire = chemin + ".tmp"
+    with open(temporaire, "wb") as f:
+        f.write(EN_TETE.pack(MAGIE, VERSION, len(chaines), len(blob), len(sections)))
+        f.write(le(offsets))
+        f.write(blob)
+        for mots, adj_offsets, adj, table in sections:
+            f.write(EN_TETE_MODE.pack(len(mots), len(adj), len(table)))
+            for tableau in (mots, adj_offsets, adj, table):
+                f.write(le(tableau))
+    os.replace(temporaire, chemin)
+
+
+class DicoCompile:
+    # Le fichier est projeté en lecture seule : les pages sont partagées entre
+    # processus et rien n'est décodé avant d'être demandé.
+    def __init__(self, chemin):
+        if sys.byteorder != "little":
+            raise ValueError("format .mdb lisible uniquement en little-endian")
+        with open(chemin, "rb") as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        vue = memoryview(self.mm)
+        magie, version, nb_chaines, taille_blob, nb_modes = EN_TETE.unpack_from(vue, 0)
+        if magie != MAGIE or version != VERSION:
+            raise ValueError(f"{chemin} n'est pas un dictionnaire compilé v{VERSION}")
+        pos = EN_TETE.size
+
+        def tableau(nombre):
+            nonlocal pos
+            t = vue[pos:pos + 4 * nombre].cast("I")
+            pos += 4 * nombre
+            return t
+
+        self.offsets = tableau(nb_chaines + 1)
+        self.blob = vue[pos:pos + taille_blob]
+        pos += taille_blob
+        self.modes = {}
+        for mode, _ in MODES[:nb_modes]:
+            nb_mots, nb_adj, taille_hash = EN_TETE_MODE.unpack_from(vue, pos)
+            pos += EN_TETE_MODE.size
+            self.modes[mode] = ModeDicoCompile(
+                self, tableau(nb_mots), tableau(nb_mots + 1), tableau(nb_adj), tableau(taille_hash)
+            )
+
+    def octets(self, sid):
+        return self.blob[self.offsets[sid]:self.offsets[sid + 1]]
+
+    def chaine(self, sid):
+        return str(self.octets(sid), "utf-8")
+
+
+class ModeDicoCompile:
+    # Même interface que ModeDico, mais adossée au fichier projeté
+    def __init__(self, dico, mots, adj_offsets, adj, table):
+        self.dico = dico
+        self.mots = mots
+        self.adj_offsets = adj_offsets
+        self.adj = adj
+        self.table = table
+        self._index = functools.lru_cache(maxsize=4096)(self._construire_index)
+
+    def __len__(self):
+        return len(self.mots)
+
+    def mot(self, i):
+        return self.dico.chaine(self.mots[i])
+
+    def indice(self, mot):
+        return self._indice(mot)
+
+    def _indice(self, mot):
+        octets = mot.encode("utf-8")
+        masque = len(self.table) - 1
+        h = _hacher(octets) & masque
+        while True:
+            entree = self.table[h]
+            if entree == 0:
+                return None
+            if self.dico.octets(self.mots[entree - 1]) == octets:
+                return entree - 1
+            h = (h + 1) & masque
+
+    def liste_reponses(self, mot):
+        i = self._indice(mot)
+        if i is None:
+            return ()
+        return tuple(self.dico.chaine(sid) for sid in self.adj[self.adj_offsets[i]:self.adj_offsets[i + 1]])
+
+    def _construire_index(self, mot):
+        reponses = self.liste_reponses(mot)
+        return IndexReponses(reponses) if reponses else None
+
+    def valides(self, mot):
+        index = self._index(mot)
+        return index.exactes if index else frozenset()
+
+    def trouver(self, mot, saisie, niveau="souple"):
+        index = self._index(mot)
+        return index.trouver(saisie, niveau) if index else None
+
+
+def charger_dictionnaire(chemin_json, chemin_compile=None):
+    # Le JSON reste la source ; le .mdb est utilisé s'il est à jour
+    chemin_compile = chemin_compile or os.path.splitext(chemin_json)[0] + ".mdb"
+    if os.path.exists(chemin_compile) and (
+        not os.path.exists(chemin_json) or os.path.getmtime(chemin_compile) >= os.path.getmtime(chemin_json)
+    ):
+        try:
+            return DicoCompile(chemin_compile).modes
+        except ValueError as e:
+            print("⚠️ Dictionnaire compilé ignoré :", e)
+    with open(chemin_json, "r", encoding="utf-8") as f:
+        return compiler_dictionnaire(json.load(f))
+
+
+class Tirage:
+    # Fisher-Yates paresseux : seules les positions échangées sont stockées,
+    # donc création en O(1) et chaque tirage en O(1), sans jamais de doublon.
+    def __init__(self, taille, rng=random):
+        self.restants = taille
+        self.echanges = {}
+        self.rng = rng
+
+    def suivant(self):
+        if self.restants == 0:
+            return None
+        dernier = self.restants - 1
+        j = self.rng.randrange(self.restants)
+        valeur = self.echanges.get(j, j)
+        if j != dernier:
+            self.echanges[j] = self.echanges.pop(dernier, dernier)
+        else:
+            self.echanges.pop(dernier, None)
+        self.restants = dernier
+        return valeur
@@ -0,0 +1,253 @@
+import html
+import io
+import threading
+import time
+from collections import deque
+
+from telebot.types import InputFile
+
+LIMITE_TEXTE = 4096  # Taille max d'un message Telegram
+# Appels qui ne comptent pas dans les limites de messages de Telegram
+HORS_QUOTA = frozenset({"answer_callback_query", "delete_message"})
+
+
+class SeauJetons:
+    def __init__(self, debit, capacite):
+        self.debit = debit
+        self.capacite = capacite
+        self.jetons = capacite
+        self.maj = time.monotonic()
+
+    def _remplir(self, maintenant):
+        self.jetons = min(self.capacite, self.jetons + (maintenant - self.maj) * self.debit)
+        self.maj = maintenant
+
+    def attente(self, maintenant):
+        # Secondes avant qu'un jeton soit disponible (0 = tout de suite)
+        self._remplir(maintenant)
+        if self.jetons >= 1:
+            return 0
+        return (1 - self.jetons) / self.debit
+
+    def prendre(self):
+        self.jetons -= 1
+
+    def plein(self, maintenant):
+        self._remplir(maintenant)
+        return self.jetons >= self.capacite
+
+
+class Envoi:
+    __slots__ = ("chat_id", "texte", "parse_mode", "options", "document", "nom_fichier", "methode", "args", "depose", "essais")
+
+    def __init__(self, chat_id, texte=None, parse_mode=None, options=None, document=None, nom_fichier=None,
+                 methode=None, args=()):
+        self.chat_id = chat_id
+        self.texte = texte
+        self.parse_mode = parse_mode
+        self.options = options or {}
+        self.document = document
+        self.nom_fichier = nom_fichier
+        self.methode = methode  # autre appel à l'API (édition, réponse de bouton…)
+        self.args = args
+        self.depose = time.monotonic()
+        self.essais = 0
+
+    def fusionnable(self):
+        return self.methode is None and self.document is None and not self.options and self.parse_mode in (None, "HTML")
+
+
+def _fusionner(a, b):
+    # Deux messages texte consécutifs du même chat → un seul envoi
+    if a.parse_mode == b.parse_mode:
+        texte, mode = a.texte + "\n\n" + b.texte, a.parse_mode
+    else:
+        ta = a.texte if a.parse_mode == "HTML" else html.escape(a.texte, quote=False)
+        tb = b.texte if b.parse_mode == "HTML" else html.escape(b.texte, quote=False)
+        texte, mode = ta + "\n\n" + tb, "HTML"
+    if len(texte) > LIMITE_TEXTE:
+        return None
+    fusion = Envoi(a.chat_id, texte, mode)
+    fusion.depose = a.depose
+    return fusion
+
+
+### ━━━ Distributeur des messages sortants ━━━
+
+class DistributeurEnvois:
+    # La logique de jeu ne fait que déposer ; des workers envoient en respectant
+    # un seau de jetons global et un par chat, et les 429 (retry_after) de Telegram.
+    # Les groupes (chat_id < 0) ont leur propre seau : Telegram n'y accepte
+    # qu'environ 20 messages par minute, contre 1 par seconde en privé.
+    def __init__(self, bot, nb_workers=4, debit_global=30, debit_chat=1, rafale_chat=3,
+                 debit_groupe=20 / 60, rafale_groupe=3, fenetre_fusion=0.05, essais_max=3):
+        self.bot = bot
+        self.global_ = SeauJetons(debit_global, debit_global)
+        self.debit_chat = debit_chat
+        self.rafale_chat = rafale_chat
+        self.debit_groupe = debit_groupe
+        self.rafale_groupe = rafale_groupe
+        self.fenetre_fusion = fenetre_fusion
+        self.essais_max = essais_max
+        self.files = {}      # chat_id → deque d'Envoi
+        self.seaux = {}      # chat_id → SeauJetons
+        self.bloques = {}    # chat_id → instant de fin du retry_after
+        self.prets = deque() # chats ayant des messages en attente et aucun envoi en vol
+        self.cond = threading.Condition()
+        self.nb_workers = nb_workers
+        self.fusions = 0
+        self.limites = 0
+
+    def demarrer(self):
+        for i in range(self.nb_workers):
+            threading.Thread(target=self._boucle, name=f"envoi-{i}", daemon=True).start()
+
+    def lever_limites(self):
+        # Bancs d'essai : plus aucun seau de jetons (global, chats privés, groupes)
+        with self.cond:
+            self.global_ = SeauJetons(1e9, 1e9)
+            self.debit_chat = self.rafale_chat = self.debit_groupe = self.rafale_groupe = 1e9
+            self.seaux.clear()
+
+    def envoyer(self, chat_id, texte, parse_mode=None, **options):
+        self._deposer(Envoi(chat_id, texte, parse_mode, options))
+
+    def envoyer_document(self, chat_id, contenu, nom_fichier, caption=None):
+        # Contenu figé au dépôt : on envoie l'état des données à cet instant
+        self._deposer(Envoi(chat_id, caption, document=contenu, nom_fichier=nom_fichier))
+
+    def appeler(self, chat_id, methode, *args, **kwargs):
+        # Éditions, suppressions, réponses aux boutons : dans la file du chat,
+        # à leur place parmi ses messages, sans bloquer le handler
+        self._deposer(Envoi(chat_id, options=kwargs, methode=methode, args=args))
+
+    def profondeur(self):
+        with self.cond:
+            return sum(len(f) for f in self.files.values())
+
+    def _deposer(self, envoi):
+        with self.cond:
+            file = self.files.get(envoi.chat_id)
+            if file is None:
+                file = self.files[envoi.chat_id] = deque()
+                self.prets.append(envoi.chat_id)
+            if envoi.methode in HORS_QUOTA:
+                # Réponses aux boutons (expirées après ~15 s) et suppressions : devant les
+                # messages qui attendent leur jeton, derrière les autres appels hors quota
+                position = 0
+                while position < len(file) and file[position].methode in HORS_QUOTA:
+                    position += 1
+                file.insert(position, envoi)
+            else:
+                file.append(envoi)
+            self.cond.notify()
+
+    def _choisir(self, maintenant):
+        # Tourniquet sur les chats prêts ; renvoie (chat_id, None) ou (None, attente)
+        attente_min = None
+        attente_globale = self.global_.attente(maintenant)
+        for _ in range(len(self.prets)):
+            chat_id = self.prets.popleft()
+            seau = self.seaux.get(chat_id)
+            if seau is None:
+                if chat_id < 0:
+                    seau = self.seaux[chat_id] = SeauJetons(self.debit_groupe, self.rafale_groupe)
+                else:
+                    seau = self.seaux[chat_id] = SeauJetons(self.debit_chat, self.rafale_chat)
+            if self.files[chat_id][0].methode in HORS_QUOTA:
+                if self.bloques.get(chat_id, 0) <= maintenant:
+                    self.bloques.pop(chat_id, None)
+                    return chat_id, None
+                self.prets.append(chat_id)
+                attente = self.bloques[chat_id] - maintenant
+                attente_min = attente if attente_min is None else min(attente_min, attente)
+                continue
+            attente = max(
+                self.bloques.get(chat_id, 0) - maintenant,
+                self.files[chat_id][0].depose + self.fenetre_fusion - maintenant,
+                seau.attente(maintenant),
+                attente_globale
+            )
+            if attente <= 0:
+                seau.prendre()
+                self.global_.prendre()
+                self.bloques.pop(chat_id, None)
+                return chat_id, None
+            self.prets.append(chat_id)
+            attente_min = attente if attente_min is None else min(attente_min, attente)
+        return None, attente_min
+
+    def _extraire(self, chat_id):
+        file = self.files[chat_id]
+        envoi = file.popleft()
+        if envoi.fusionnable():
+            while file and file[0].fusionnable():
+                fusion = _fusionner(envoi, file[0])
+                if fusion is None:
+                    break
+                file.popleft()
+                envoi = fusion
+                self.fusions += 1
+        return envoi
+
+    def _boucle(self):
+        while True:
+            with self.cond:
+                while True:
+                    chat_id, attente = self._choisir(time.monotonic())
+                    if chat_id is not None:
+                        break
+                    self.cond.wait(attente)
+                envoi = self._extraire(chat_id)
+
+            retry_after = self._expedier(envoi)
+
+            with self.cond:
+                self._rendre(chat_id, envoi, retry_after)
+                self.cond.notify()
+
+    def _rendre(self, chat_id, envoi, retry_after):
+        # Après un envoi (verrou tenu) : remise en tête si retry_after, chat de nouveau prêt
+        file = self.files[chat_id]
+        if retry_after is not None:
+            file.appendleft(envoi)
+            self.bloques[chat_id] = time.monotonic() + retry_after
+        if file:
+            self.prets.append(chat_id)
+        else:
+            del self.files[chat_id]
+            if self.seaux[chat_id].plein(time.monotonic()):
+                del self.seaux[chat_id]
+
+    def _requete(self, envoi):
+        # Méthode du bot à appeler et ses arguments
+        if envoi.methode is not None:
+            return getattr(self.bot, envoi.methode), envoi.args, envoi.options
+        if envoi.document is not None:
+            fichier = InputFile(io.BytesIO(envoi.document), file_name=envoi.nom_fichier)
+            return self.bot.send_document, (envoi.chat_id, fichier), {"caption": envoi.texte}
+        return self.bot.send_message, (envoi.chat_id, envoi.texte), dict(envoi.options, parse_mode=envoi.parse_mode)
+
+    def _echec(self, envoi, e):
+        # Renvoie un délai si l'envoi doit être retenté, None sinon.
+        # ApiTelegramException (telebot synchrone ou asyncio) porte error_code
+        code = getattr(e, "error_code", None)
+        if code == 429:
+            self.limites += 1
+            return e.result_json.get("parameters", {}).get("retry_after", 1)
+        if code is not None:
+            print(f"❌ Erreur envoi vers {envoi.chat_id} :", e)
+            return None
+        envoi.essais += 1
+        if envoi.essais < self.essais_max:
+            return 1
+        print(f"❌ Envoi abandonné vers {envoi.chat_id} :", e)
+        return None
+
+    def _expedier(self, envoi):
+        fn, args, kwargs = self._requete(envoi)
+        try:
+            fn(*args, **kwargs)
+        except Exception as e:
+            return self._echec(envoi, e)
+        return None
@@ -0,0 +1,40 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+### ━━━ Parties abandonnées ━━━
+
+class Faucheuse:
+    # Dernière activité de chaque partie, de la plus ancienne à la plus récente :
+    # un balayage ne regarde que le début de la liste, jamais les parties vivantes.
+    def __init__(self, ttl=900):
+        self.ttl = ttl
+        self.activite = OrderedDict()  # chat_id → dernier instant (monotonic)
+        self.verrou = threading.Lock()
+        self.expirees = 0
+
+    def toucher(self, chat_id):
+        with self.verrou:
+            self.activite[chat_id] = time.monotonic()
+            self.activite.move_to_end(chat_id)
+
+    def oublier(self, chat_id):
+        with self.verrou:
+            self.activite.pop(chat_id, None)
+
+    def inactive(self, chat_id, maintenant):
+        # Re-vérifiée dans l'acteur du chat : une update a pu arriver depuis le balayage
+        with self.verrou:
+            instant = self.activite.get(chat_id)
+        return instant is not None and maintenant - instant >= self.ttl
+
+    def balayer(self, maintenant):
+        # Chats dont la partie n'a rien fait depuis ttl secondes
+        perimees = []
+        with self.verrou:
+            for chat_id, instant in self.activite.items():
+                if maintenant - instant < self.ttl:
+                    break
+                perimees.append(chat_id)
+        return perimees
@@ -0,0 +1,259 @@
+import glob
+import gzip
+import json
+import os
+import queue
+import threading
+import time
+import zlib
+
+SUFFIXE = ".jsonl.gz"
+
+
+### ━━━ Journal des parties ━━━
+
+class Journal:
+    # Chaque transition de partie est une ligne JSON ajoutée à un fichier gzip.
+    # Le moteur ne fait que déposer un tuple ; un thread sérialise, écrit par lots
+    # et ne vide le flux compressé qu'une fois par lot (lisible jusqu'au dernier lot).
+    def __init__(self, dossier, prefixe="evenements", intervalle=1.0, taille_max=32 * 1024 * 1024, jours=14):
+        self.dossier = dossier
+        self.prefixe = prefixe
+        self.intervalle = intervalle
+        self.taille_max = taille_max
+        self.jours = jours  # fichiers plus anciens supprimés à la rotation (0 = jamais)
+        self.file = queue.SimpleQueue()
+        self.verrou = threading.Lock()  # fichier courant (vider() est aussi appelé à l'arrêt)
+        self.brut = None
+        self.flux = None
+        self.jour = None
+        self.evenements = 0
+        self.rotations = 0
+        os.makedirs(dossier, exist_ok=True)
+
+    def demarrer(self):
+        def boucle():
+            while True:
+                time.sleep(self.intervalle)
+                try:
+                    self.vider()
+                except Exception as e:
+                    print("❌ Erreur écriture du journal :", e)
+
+        threading.Thread(target=boucle, name="journal", daemon=True).start()
+
+    def noter(self, chat_id, partie, type_, donnees):
+        # Chemin du jeu : horodatage et dépôt, rien d'autre
+        self.file.put((time.time(), chat_id, partie, type_, donnees))
+
+    def vider(self):
+        with self.verrou:
+            lignes = []
+            while True:
+                try:
+                    t, chat_id, partie, type_, donnees = self.file.get_nowait()
+                except queue.Empty:
+                    break
+                ligne = {"t": round(t, 3), "chat": chat_id, "partie": partie, "type": type_}
+                ligne.update(donnees)
+                lignes.append(json.dumps(ligne, ensure_ascii=False, separators=(",", ":")))
+            if not lignes:
+                return
+            self._fichier()
+            self.flux.write(("\n".join(lignes) + "\n").encode("utf-8"))
+            self.flux.flush(zlib.Z_SYNC_FLUSH)
+            self.evenements += len(lignes)
+
+    def fermer(self):
+        self.vider()
+        with self.verrou:
+            if self.flux is not None:
+                self.flux.close()
+                self.brut.close()
+                self.flux = self.brut = None
+
+    def _fichier(self):
+        # Nouveau fichier au changement de jour ou au-delà de taille_max octets compressés
+        jour = time.strftime("%Y%m%d")
+        if self.flux is not None and jour == self.jour and self.brut.tell() < self.taille_max:
+            return
+        if self.flux is not None:
+            self.flux.close()
+            self.brut.close()
+            self.rotations += 1
+        self.jour = jour
+        chemin = os.path.join(self.dossier, f"{self.prefixe}-{time.strftime('%Y%m%d-%H%M%S')}{SUFFIXE}")
+        # Un membre gzip de plus si le fichier existe déjà : les lecteurs enchaînent les membres
+        self.brut = open(chemin, "ab")
+        self.flux = gzip.GzipFile(fileobj=self.brut, mode="ab")
+        self._purger()
+
+    def _purger(self):
+        if not self.jours:
+            return
+        limite = time.time() - self.jours * 86400
+        for chemin in glob.glob(os.path.join(self.dossier, f"{self.prefixe}-*{SUFFIXE}")):
+            try:
+                if os.path.getmtime(chemin) < limite:
+                    os.remove(chemin)
+            except OSError:
+                pass
+
+
+### ━━━ Relecture ━━━
+
+def fichiers(dossier):
+    # Ordre des noms = ordre d'écriture (préfixe de processus, puis horodatage)
+    return sorted(glob.glob(os.path.join(dossier, f"*{SUFFIXE}")))
+
+
+def _blocs(chemin, taille=1 << 20):
+    # Décompression à la main : membres gzip enchaînés, et un fichier sans fin de flux
+    # (en cours d'écriture ou arrêt brutal) se lit jusqu'à son dernier lot
+    d = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    with open(chemin, "rb") as f:
+        while True:
+            brut = f.read(taille)
+            if not brut:
+                return
+            while brut:
+                yield d.decompress(brut)
+                if not d.eof:
+                    break
+                brut = d.unused_data
+                d = zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+
+def lire(chemins, filtre=None):
+    # Un json.loads par bloc plutôt que par ligne ; `filtre` (octets) écarte les
+    # lignes des autres parties avant tout décodage
+    for chemin in chemins:
+        reste = b""
+        try:
+            for bloc in _blocs(chemin):
+                lignes = (reste + bloc).split(b"\n")
+                reste = lignes.pop()
+                if filtre is not None:
+                    lignes = [ligne for ligne in lignes if filtre in ligne]
+                if lignes:
+                    yield from json.loads(b"[" + b",".join(lignes) + b"]")
+        except zlib.error as e:
+            print(f"⚠️ {chemin} corrompu, lu jusqu'au dernier lot intact :", e)
+
+
+def nouvelle_partie(evenement):
+    return {
+        "partie": evenement["partie"],
+        "chat": evenement["chat"],
+        "debut": evenement["t"],
+        "fin": None,
+        "issue": None,
+        "mode": None,
+        "tolerance": None,
+        "dico": None,
+        "joueurs": [],
+        "positions": {},
+        "tours": {},
+        "index": 0,
+        "utilises": set(),
+        "elimines": set(),
+        "actif": False,
+        "mot": "",
+        "joueur": None,
+        "verdicts": {"juste": 0, "faux": 0, "deja": 0},
+        "gagnant": None,
+        "evenements": 0,
+    }
+
+
+def appliquer(parties, evenement):
+    # Réducteur : l'état d'une partie ne dépend que de ses événements, dans l'ordre
+    p = parties.get(evenement["partie"])
+    if p is None:
+        p = parties[evenement["partie"]] = nouvelle_partie(evenement)
+    p["evenements"] += 1
+    type_ = evenement["type"]
+    if type_ == "creation":
+        p["tolerance"] = evenement["tolerance"]
+        p["dico"] = evenement["dico"]
+    elif type_ == "inscription":
+        if evenement["joueur"] not in p["positions"]:
+            p["positions"][evenement["joueur"]] = len(p["joueurs"])
+            p["joueurs"].append([evenement["joueur"], evenement["username"], evenement["prenom"]])
+    elif type_ == "mode":
+        p["mode"] = evenement["mode"]
+    elif type_ == "reglage":
+        for cle in ("tolerance", "dico"):
+            if cle in evenement:
+                p[cle] = evenement[cle]
+    elif type_ == "debut":
+        p["actif"] = True
+        p["dico"] = evenement["dico"]
+    elif type_ == "cycle":
+        p["utilises"] = set()
+    elif type_ == "question":
+        joueur = evenement["joueur"]
+        p["joueur"] = joueur
+        p["mot"] = evenement["mot"]
+        p["utilises"].add(evenement["mot"])
+        p["tours"][joueur] = p["tours"].get(joueur, 0) + 1
+        p["index"] = p["positions"].get(joueur, p["index"])
+    elif type_ == "reponse":
+        p["verdicts"][evenement["verdict"]] += 1
+        if evenement["verdict"] == "juste":
+            p["utilises"].add(evenement["reponse"])
+    elif type_ == "elimination":
+        p["elimines"].add(evenement["joueur"])
+    elif type_ == "fin":
+        p["actif"] = False
+        p["gagnant"] = evenement["gagnant"]
+        p["fin"] = evenement["t"]
+        p["issue"] = "victoire"
+    elif type_ == "reprise":
+        # Redémarrage du bot : l'instantané rechargé fait foi
+        etat = evenement["etat"]
+        for cle in ("mode", "tolerance", "dico", "joueurs", "index", "actif", "mot"):
+            p[cle] = etat[cle]
+        p["positions"] = {uid: i for i, (uid, _, _) in enumerate(etat["joueurs"])}
+        p["tours"] = {uid: n for (uid, _, _), n in zip(etat["joueurs"], etat["tours"])}
+        p["utilises"] = set(etat["utilises"])
+        p["elimines"] = set(etat["elimines"])
+    elif type_ == "fermeture":
+        p["actif"] = False
+        p["fin"] = evenement["t"]
+        p["issue"] = evenement["raison"]
+    return p
+
+
+def rejouer(evenements, partie=None, chat=None):
+    parties = {}
+    for evenement in evenements:
+        if partie is not None and evenement["partie"] != partie:
+            continue
+        if chat is not None and evenement["chat"] != chat:
+            continue
+        appliquer(parties, evenement)
+    return parties
+
+
+def instantane(p):
+    # Même format que Game.instantane : la partie rejouée se recharge avec
+    # Game.depuis_instantane (sans chrono en cours ni ordre de tirage)
+    return {
+        "v": 1,
+        "mode": p["mode"],
+        "tolerance": p["tolerance"],
+        "dico": p["dico"],
+        "joueurs": p["joueurs"],
+        "tours": [p["tours"].get(uid, 0) for uid, _, _ in p["joueurs"]],
+        "index": p["index"],
+        "utilises": sorted(p["utilises"]),
+        "elimines": sorted(p["elimines"]),
+        "actif": p["actif"],
+        "mot": p["mot"],
+        "reponse_motarena": None,
+        "tirage": None,
+        "echeance": None,
+        "compte": [False, False, 30, None],
+        "ident": p["partie"],
+    }
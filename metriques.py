@@ -0,0 +1,251 @@
+import bisect
+import contextlib
+import functools
+import threading
+import time
+
+from telebot import apihelper
+
+SEUILS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+class _Tranche:
+    # Compteurs d'un seul thread : seul lui écrit, le scrape ne fait que copier
+    __slots__ = ("thread", "compteurs", "histos")
+
+    def __init__(self, thread):
+        self.thread = thread
+        self.compteurs = {}  # (nom, étiquettes) → valeur
+        self.histos = {}     # (nom, étiquettes) → [n par seuil…, n au-delà, somme]
+
+
+def _cle(nom, etiquettes):
+    return nom, tuple(sorted(etiquettes.items()))
+
+
+def _echapper(valeur):
+    return str(valeur).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _etiquettes(paires, extra=()):
+    paires = tuple(paires) + tuple(extra)
+    if not paires:
+        return ""
+    return "{" + ",".join(f'{k}="{_echapper(v)}"' for k, v in paires) + "}"
+
+
+def _fusionner(dans, tranche):
+    for cle, valeur in dict(tranche.compteurs).items():
+        dans.compteurs[cle] = dans.compteurs.get(cle, 0) + valeur
+    for cle, serie in dict(tranche.histos).items():
+        serie = list(serie)
+        cible = dans.histos.get(cle)
+        if cible is None:
+            dans.histos[cle] = serie
+        else:
+            for i, valeur in enumerate(serie):
+                cible[i] += valeur
+
+
+### ━━━ Métriques au format Prometheus ━━━
+
+class Metriques:
+    # Écriture sans verrou dans la tranche du thread courant ; les tranches sont
+    # additionnées au scrape. Les threads terminés sont versés dans `retraite`.
+    def __init__(self, seuils=SEUILS):
+        self.seuils = tuple(seuils)
+        self.local = threading.local()
+        self.verrou = threading.Lock()  # liste des tranches, pas les valeurs
+        self.tranches = []
+        self.retraite = _Tranche(None)
+        self.familles = {}  # nom → (type, aide)
+        self.jauges = []    # (nom, fn) ; fn renvoie un nombre ou [(étiquettes, valeur)]
+
+    def compteur(self, nom, aide):
+        self.familles[nom] = ("counter", aide)
+
+    def histogramme(self, nom, aide):
+        self.familles[nom] = ("histogram", aide)
+
+    def jauge(self, nom, aide, fn, type_="gauge"):
+        # Valeur lue au scrape ; type_="counter" pour un compteur tenu ailleurs
+        self.familles[nom] = (type_, aide)
+        self.jauges.append((nom, fn))
+
+    def _tranche(self):
+        tranche = getattr(self.local, "tranche", None)
+        if tranche is None:
+            tranche = self.local.tranche = _Tranche(threading.current_thread())
+            with self.verrou:
+                self.tranches.append(tranche)
+        return tranche
+
+    def incrementer(self, nom, valeur=1, **etiquettes):
+        compteurs = self._tranche().compteurs
+        cle = _cle(nom, etiquettes)
+        compteurs[cle] = compteurs.get(cle, 0) + valeur
+
+    def observer(self, nom, valeur, **etiquettes):
+        histos = self._tranche().histos
+        cle = _cle(nom, etiquettes)
+        serie = histos.get(cle)
+        if serie is None:
+            serie = histos[cle] = [0] * (len(self.seuils) + 1) + [0.0]
+        serie[bisect.bisect_left(self.seuils, valeur)] += 1
+        serie[-1] += valeur
+
+    def chronometre(self, nom, fn, **etiquettes):
+        # Enveloppe fn : durée observée dans `nom`, exceptions comptées dans nom_erreurs_total
+        @functools.wraps(fn)
+        def enveloppe(*args, **kwargs):
+            debut = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            except Exception:
+                self.incrementer(nom + "_erreurs_total", **etiquettes)
+                raise
+            finally:
+                self.observer(nom, time.perf_counter() - debut, **etiquettes)
+        return enveloppe
+
+    def _agreger(self):
+        with self.verrou:
+            vivantes = []
+            for tranche in self.tranches:
+                if tranche.thread.is_alive():
+                    vivantes.append(tranche)
+                else:
+                    _fusionner(self.retraite, tranche)
+            self.tranches = vivantes
+            total = _Tranche(None)
+            _fusionner(total, self.retraite)
+        for tranche in vivantes:
+            _fusionner(total, tranche)
+        return total
+
+    def exposer(self):
+        total = self._agreger()
+        series = {}
+        for (nom, paires), valeur in total.compteurs.items():
+            series.setdefault(nom, []).append(f"{nom}{_etiquettes(paires)} {valeur}")
+        for (nom, paires), serie in total.histos.items():
+            lignes = series.setdefault(nom, [])
+            cumul = 0
+            for seuil, n in zip(self.seuils, serie):
+                cumul += n
+                lignes.append(f"{nom}_bucket{_etiquettes(paires, [('le', seuil)])} {cumul}")
+            cumul += serie[len(self.seuils)]
+            lignes.append(f"{nom}_bucket{_etiquettes(paires, [('le', '+Inf')])} {cumul}")
+            lignes.append(f"{nom}_sum{_etiquettes(paires)} {serie[-1]}")
+            lignes.append(f"{nom}_count{_etiquettes(paires)} {cumul}")
+        for nom, fn in self.jauges:
+            try:
+                valeur = fn()
+            except Exception as e:
+                print(f"❌ Jauge {nom} :", e)
+                continue
+            if isinstance(valeur, (int, float)):
+                valeur = [({}, valeur)]
+            series.setdefault(nom, []).extend(
+                f"{nom}{_etiquettes(sorted(etiquettes.items()))} {v}" for etiquettes, v in valeur
+            )
+
+        sortie = []
+        for nom in sorted(series):
+            type_, aide = self.familles.get(nom, ("untyped", ""))
+            if aide:
+                sortie.append(f"# HELP {nom} {aide}")
+            sortie.append(f"# TYPE {nom} {type_}")
+            sortie.extend(series[nom])
+        return "\n".join(sortie) + "\n"
+
+
+### ━━━ Instrumentation telebot ━━━
+
+def instrumenter_handlers(bot, metriques, nom="mot_handler_secondes", traces=None):
+    # À appeler une fois tous les handlers déclarés ; traces : span "handler:<nom>" en plus
+    for handlers in (bot.message_handlers, bot.callback_query_handlers):
+        for handler in handlers:
+            fn = handler["function"]
+            enveloppe = metriques.chronometre(nom, fn, handler=fn.__name__)
+            if traces is not None:
+                enveloppe = traces.envelopper(enveloppe, "handler:" + fn.__name__)
+            handler["function"] = enveloppe
+
+
+def envoyeur_instrumente(metriques, traces=None):
+    # À placer dans apihelper.CUSTOM_REQUEST_SENDER : chaque appel à l'API est chronométré
+    # (et tracé : span de l'update en cours, ou trace à lui seul depuis un thread d'envoi)
+    def envoyer(method, url, params=None, files=None, timeout=None, proxies=None):
+        methode = url.rsplit("/", 1)[-1]
+        debut = time.perf_counter()
+        # Le long polling n'est pas un appel lent : pas de trace
+        suivi = contextlib.nullcontext() if traces is None or methode == "getUpdates" else traces.span("api:" + methode, racine=True)
+        try:
+            with suivi:
+                reponse = apihelper._get_req_session().request(
+                    method, url, params=params, files=files, timeout=timeout, proxies=proxies
+                )
+        except Exception as e:
+            metriques.incrementer("mot_telegram_erreurs_total", methode=methode, code=type(e).__name__)
+            raise
+        finally:
+            metriques.observer("mot_telegram_secondes", time.perf_counter() - debut, methode=methode)
+        if reponse.status_code != 200:
+            metriques.incrementer("mot_telegram_erreurs_total", methode=methode, code=str(reponse.status_code))
+        return reponse
+    return envoyer
+
+
+def requete_async_instrumentee(metriques, originale):
+    # Équivalent d'envoyeur_instrumente pour RUNTIME=asyncio, à la place de
+    # asyncio_helper._process_request (tous les appels de l'AsyncTeleBot y passent).
+    # Pas de span : plusieurs coroutines se partagent le thread de la boucle
+    async def requete(token, url, method="get", params=None, files=None, **kwargs):
+        debut = time.perf_counter()
+        try:
+            return await originale(token, url, method, params, files, **kwargs)
+        except Exception as e:
+            code = getattr(e, "error_code", None) or getattr(getattr(e, "result", None), "status", None)
+            metriques.incrementer("mot_telegram_erreurs_total", methode=url, code=str(code or type(e).__name__))
+            raise
+        finally:
+            metriques.observer("mot_telegram_secondes", time.perf_counter() - debut, methode=url)
+    return requete
+
+
+### ━━━ Fusion de plusieurs processus ━━━
+
+def fusionner_expositions(sources, etiquette="partition"):
+    # sources : [(valeur de l'étiquette, texte exposé par un processus)] → un seul texte,
+    # chaque famille regroupée une fois, chaque série marquée par son processus
+    familles = {}  # nom → [lignes HELP/TYPE, séries]
+    for valeur, texte in sources:
+        courante = None
+        marque = f'{etiquette}="{_echapper(valeur)}"'
+        for ligne in texte.splitlines():
+            if not ligne:
+                continue
+            if ligne.startswith("#"):
+                morceaux = ligne.split(" ", 3)
+                if len(morceaux) >= 3 and morceaux[1] in ("HELP", "TYPE"):
+                    courante = familles.setdefault(morceaux[2], [[], []])
+                    if ligne not in courante[0]:
+                        courante[0].append(ligne)
+                continue
+            if courante is None:
+                continue
+            serie, nombre = ligne.rsplit(" ", 1)
+            if f'{etiquette}="' in serie:
+                pass  # déjà par processus (ex. files du front vers chaque partition)
+            elif serie.endswith("}"):
+                serie = f"{serie[:-1]},{marque}}}"
+            else:
+                serie = f"{serie}{{{marque}}}"
+            courante[1].append(f"{serie} {nombre}")
+    sortie = []
+    for nom in sorted(familles):
+        entete, series = familles[nom]
+        sortie.extend(entete)
+        sortie.extend(series)
+    return "\n".join(sortie) + "\n"
@@ -0,0 +1,468 @@
+import random
+from types import SimpleNamespace
+
+from correspondance import normaliser
+from dictionnaire import Tirage
+from registre import DICO_STANDARD
+
+ESSAIS_PONDERES = 8  # tirages pondérés tentés avant de revenir à l'ordre mélangé
+MOTARENA_ID = -999  # Un ID fixe et fictif pour identifier le bot dans la partie
+motArena_user = SimpleNamespace(id=MOTARENA_ID, username="motArena", first_name="MotArena")
+VANNES_MOTARENA = [
+    "T’as pas perdu, t’as juste montré au monde à quel point t’es nul.",
+    "Même un mur aurait mieux joué que toi… au moins lui il bloque.",
+    "Tu joues ou tu testes le bouton 'honte' en boucle ?",
+    "T'as le QI d’un caillou, sans la solidité.",
+    "Joue encore une fois… qu’on rigole tous ensemble.",
+    "Tu frappes à la porte de la victoire avec un doigt cassé.",
+    "J’ai pas gagné… c’est toi qui t’es écrasé tout seul.",
+    "Tu veux une revanche ? Pourquoi ? Pour t'humilier deux fois ?",
+    "Même avec Google dans la main, t'aurais perdu.",
+    "Ton cerveau c’est du Wi-Fi public : lent, instable, et tout le monde l’utilise.",
+    "Chaque fois que tu joues, le mot 'espoir' démissionne.",
+    "Tu devrais être payé pour autant rater, c’est du talent à ce stade.",
+    "Joue pas avec moi, joue au loto, t’as plus de chances là-bas.",
+    "T’as le niveau d’un tutoriel… et encore, version bêta.",
+    "À ce niveau de nullité, c’est plus une défaite, c’est une œuvre d’art."
+]
+
+
+### ━━━ Joueur ━━━
+
+class Joueur:
+    # Ce que la partie garde d'un utilisateur : pas l'objet telebot entier
+    __slots__ = ("id", "username", "first_name", "tours")
+
+    def __init__(self, id, username, first_name, tours=0):
+        self.id = id
+        self.username = username
+        self.first_name = first_name
+        self.tours = tours  # tours déjà joués (les deux premiers sont plus longs)
+
+
+### ━━━ Transport ━━━
+
+class Transport:
+    # Tout ce que le moteur demande au monde extérieur. Le moteur ne fait
+    # lui-même aucune entrée/sortie : l'adaptateur telebot (Ouille.py) en est
+    # une implémentation, un banc d'essai peut en fournir une autre.
+    def envoyer(self, chat_id, texte, parse_mode=None):
+        raise NotImplementedError
+
+    def planifier(self, delai, fn, *args):
+        # Doit renvoyer un objet avec les méthodes annuler() et restant()
+        raise NotImplementedError
+
+    def dictionnaire(self, nom):
+        raise NotImplementedError
+
+    def table_mots(self, mode, pool, mots_joues):
+        # Table pondérée (méthode tirer() → indice dans pool) ou None : tirage uniforme
+        return None
+
+    def evenement(self, game, nom, **donnees):
+        # "victoire", "defaite", "fin", "modifiee", "tour", et les transitions
+        # journalisées ("inscription", "question", "reponse"…) ; rien à faire par défaut
+        pass
+
+
+### ━━━ Moteur de jeu ━━━
+
+class Game:
+    def __init__(self, chat_id, transport, mode=None, tolerance="souple"):
+        self.chat_id = chat_id
+        self.transport = transport
+        # Identifiant de la partie dans le journal, fixé par l'adaptateur
+        self.ident = None
+        self.mode = mode
+        self.players = []    # Joueur, dans l'ordre d'arrivée
+        self.positions = {}  # id → indice dans players
+        self.current_index = 0
+        self.used_words = set()
+        # Ordre de tirage propre à la partie, créé au premier tour
+        self.tirage = None
+        self.tirage_pool = None
+        self.tolerance = tolerance
+        # Instantané du dictionnaire pris au lancement : un rechargement ne le modifie pas
+        self.dico_nom = DICO_STANDARD
+        self.dico = None
+        self.timer = None
+        # Jeton de génération : un timeout planifié pour un tour périmé est ignoré
+        self.generation = 0
+        self.active = False
+        self.current_word = ""
+        self.current_player = None
+        self.reponse_motarena = None
+        # Tour en cours d'un joueur humain : durée accordée et mauvaises réponses
+        self.temps_tour = 0
+        self.erreurs_tour = 0
+        self.eliminated = set()
+        self.countdown_started = False
+        self.countdown_timer = None
+        self.countdown_tache = None
+        self.countdown_seconds = 30
+        self.countdown_cancelled = False
+        # Échéances murales lues dans un instantané, en attente de reprendre()
+        self.echeances_reprise = None
+        self.tirage_reprise = None
+
+    def contient(self, uid):
+        return uid in self.positions
+
+    def get_name(self, user):
+        return f"@{user.username}" if user.username else f"<n>{user.first_name}</n>"
+
+    def silent_cancel_countdown(self):
+        self.countdown_cancelled = True
+        if self.countdown_tache:
+            self.countdown_tache.annuler()
+            self.countdown_tache = None
+
+    def cancel_countdown(self):
+        self.countdown_cancelled = True
+        if self.countdown_tache:
+            self.countdown_tache.annuler()
+            self.countdown_tache = None
+        self.transport.envoyer(self.chat_id, "⏸️ Le compte à rebours est suspendu. Tape /flashgame pour commencer quand tu veux.")
+        self.signaler_changement()
+
+    def start_countdown(self):
+        self.countdown_started = True
+        self.countdown_seconds = 30
+        self.countdown_cancelled = False
+        self.transport.envoyer(self.chat_id, "<b>Début automatique dans 30 secondes…</b>", parse_mode="HTML")
+        self.countdown_tache = self.transport.planifier(0, self.countdown_step)
+
+    def countdown_step(self):
+        if self.countdown_cancelled:
+            return
+        if self.countdown_seconds <= 0:
+            self.start_game()
+            return
+        if self.countdown_seconds in [30, 25, 20, 15, 10, 5]:
+            self.transport.envoyer(self.chat_id, f"⏳ Début dans {self.countdown_seconds} secondes…")
+        self.countdown_seconds -= 5
+        self.countdown_tache = self.transport.planifier(5, self.countdown_step)
+        self.signaler_changement()
+
+    def arreter_chrono(self):
+        # Invalide tout délai en vol, même s'il est déjà en train de se déclencher
+        self.generation += 1
+        if self.timer:
+            self.timer.annuler()
+            self.timer = None
+
+    def annuler(self):
+        # Arrête tous les chronos, la partie ne réagit plus à rien
+        self.active = False
+        self.arreter_chrono()
+        self.silent_cancel_countdown()
+
+    def add_player(self, user):
+        if user.id in self.positions or self.active:
+            return False
+        if len(self.players) >= 69:
+            self.transport.envoyer(self.chat_id, "⛔ La partie est pleine (4 joueurs max).")
+            return False
+        joueur = Joueur(user.id, user.username, user.first_name)
+        self._inscrire(joueur)
+        self.transport.evenement(self, "inscription", joueur=joueur, username=joueur.username, prenom=joueur.first_name)
+        self.transport.envoyer(
+            self.chat_id,
+            f"✅ {self.get_name(user)} a rejoint la partie ({len(self.players)}/69)",
+            parse_mode="HTML"
+        )
+        if len(self.players) >= 2 and not self.countdown_started:
+            self.start_countdown()
+        self.signaler_changement()
+        return True
+
+    def _inscrire(self, joueur):
+        self.positions[joueur.id] = len(self.players)
+        self.players.append(joueur)
+
+    def start_game(self):
+        # Couper immédiatement le chrono de compte à rebours
+        self.silent_cancel_countdown()
+        if len(self.players) < 2:
+            self.transport.envoyer(self.chat_id, "⛔ Pas assez de joueurs pour commencer.")
+            return
+        try:
+            self.dico = self.transport.dictionnaire(self.dico_nom)
+        except Exception:
+            self.transport.envoyer(self.chat_id, f"⚠️ Dictionnaire « {self.dico_nom} » indisponible, retour au dictionnaire standard.")
+            self.dico_nom = DICO_STANDARD
+            self.dico = self.transport.dictionnaire(DICO_STANDARD)
+        self.active = True
+        self.transport.evenement(self, "debut", dico=self.dico_nom)
+        self.ask_next()
+
+    def ask_next(self):
+        if not self.active:
+            return
+
+        # Couper immédiatement le chrono précédent
+        self.arreter_chrono()
+
+        self.current_player = self.players[self.current_index]
+        self.current_player.tours += 1
+
+        pool = self.pool()
+        est_motarena = self.current_player.id == MOTARENA_ID
+
+        word, reponse = self.tirer_mot(pool, est_motarena)
+        if word is None:
+            self.timer = self.transport.planifier(0, self.timeout, self.generation)
+            return
+
+        self.current_word = word
+        self.used_words.add(word)
+        self.reponse_motarena = reponse
+        self.transport.evenement(self, "question", joueur=self.current_player, mot=word)
+
+        if est_motarena:
+            self.transport.envoyer(
+                self.chat_id,
+                f"<b>Tour de motArena</b>\n<blockquote>Mot : <b>{word}</b>\nMode : {self.mode}</blockquote>",
+                parse_mode="HTML"
+            )
+            # Le coup est joué plus tard par le planificateur : aucun thread ne dort
+            self.timer = self.transport.planifier(2, self.coup_motarena, self.generation, reponse)
+            self.signaler_changement()
+            return
+
+        nom = self.get_name(self.current_player)
+        temps = 20 if self.current_player.tours <= 2 else 10
+        self.temps_tour = temps
+        self.erreurs_tour = 0
+        self.transport.envoyer(
+            self.chat_id,
+            f"<b>Tour de {nom}</b>\n<blockquote>Mot : <b>{word}</b>\nMode : {self.mode}</blockquote>\nTu as {temps} secondes !",
+            parse_mode="HTML"
+        )
+        self.timer = self.transport.planifier(temps, self.timeout, self.generation)
+        self.signaler_changement()
+
+    def pool(self):
+        return self.dico["synonyme"] if self.mode == "synonyme" else self.dico["antonyme"]
+
+    def tirer_mot(self, pool, pour_motarena=False):
+        # Tirage pondéré vers la difficulté visée s'il y a une table (O(log n) par essai),
+        # sinon (ou après quelques essais) l'ordre mélangé de la partie.
+        # motArena ne reçoit qu'un mot auquel il reste une réponse libre.
+        # Mots déjà posés dans la partie (les réponses n'avancent pas la courbe)
+        mots_joues = sum(p.tours for p in self.players) - 1
+        table = self.transport.table_mots(self.mode, pool, mots_joues)
+        if table is not None:
+            for _ in range(ESSAIS_PONDERES):
+                word = pool.mot(table.tirer())
+                if word in self.used_words:
+                    continue
+                if not pour_motarena:
+                    return word, None
+                libres = [r for r in pool.liste_reponses(word) if r not in self.used_words]
+                if libres:
+                    return word, random.choice(libres)
+        for cycle in range(2):
+            if self.tirage is None or self.tirage_pool is not pool:
+                self.tirage = Tirage(len(pool))
+                self.tirage_pool = pool
+            while True:
+                i = self.tirage.suivant()
+                if i is None:
+                    break
+                word = pool.mot(i)
+                if word in self.used_words:
+                    continue
+                if not pour_motarena:
+                    return word, None
+                libres = [r for r in pool.liste_reponses(word) if r not in self.used_words]
+                if libres:
+                    return word, random.choice(libres)
+            # Dictionnaire épuisé : on le dit et on repart sur un nouveau cycle
+            self.tirage = None
+            self.used_words = set()
+            self.transport.evenement(self, "cycle")
+            if cycle == 0:
+                self.transport.envoyer(self.chat_id, "🔁 Tous les mots ont été joués ! On repart pour un nouveau cycle.")
+        return None, None
+
+    def coup_motarena(self, generation, reponse):
+        if not self.active or generation != self.generation:
+            return
+        self.transport.envoyer(self.chat_id, f"💬 motArena : \"{reponse}\" 😏", parse_mode="HTML")
+        self.validate(self.current_player, reponse)
+
+    def timeout(self, generation):
+        if not self.active or generation != self.generation:
+            return
+        name = self.get_name(self.current_player)
+        self.transport.envoyer(self.chat_id, f"❌ <b>{name} a perdu par inactivité !</b>", parse_mode="HTML")
+        self.eliminated.add(self.current_player.id)
+        self.transport.evenement(self, "temps", joueur=self.current_player, mot=self.current_word)
+        self.transport.evenement(self, "elimination", joueur=self.current_player)
+        if self.current_player.id == MOTARENA_ID:
+            self.check_winner_or_continue()
+            return
+
+        self.transport.evenement(self, "tour", mot=self.current_word, trouve=False,
+                                 duree=self.temps_tour, erreurs=self.erreurs_tour)
+        self.transport.evenement(self, "defaite", joueur=self.current_player)
+        self.check_winner_or_continue()
+
+    def validate(self, user, word):
+        # Ignorer toutes les réponses des joueurs éliminés
+        if user.id in self.eliminated:
+            return
+            
+        if not self.active or user.id != self.current_player.id:
+            return
+
+        word = word.lower().strip()
+        # Réponse officielle reconnue malgré accents, casse ou faute selon la tolérance
+        reponse = self.pool().trouver(self.current_word, word, self.tolerance)
+
+        if normaliser(word) == normaliser(self.current_word) or word in self.used_words or reponse in self.used_words:  
+            self.transport.evenement(self, "reponse", joueur=user, saisie=word, verdict="deja", reponse=reponse)
+            self.transport.envoyer(self.chat_id, f"⚠️ Ce mot a déjà été utilisé {self.get_name(user)}. Essaie un autre !", parse_mode="HTML")  
+            return
+
+        if reponse is not None:
+            if user.id != MOTARENA_ID and self.timer:
+                duree = max(0, self.temps_tour - self.timer.restant())
+                self.transport.evenement(self, "tour", mot=self.current_word, trouve=True,
+                                         duree=duree, erreurs=self.erreurs_tour)
+            self.used_words.add(reponse)
+            self.transport.evenement(self, "reponse", joueur=user, saisie=word, verdict="juste", reponse=reponse)
+            self.transport.envoyer(self.chat_id, f"✅ <b>{self.get_name(user)}</b> a réussi !", parse_mode="HTML")
+            # Couper immédiatement le chrono quand une bonne réponse est donnée
+            self.arreter_chrono()
+            self.current_index = (self.current_index + 1) % len(self.players)
+            self.skip_eliminated()
+            self.ask_next()
+            return
+
+        self.erreurs_tour += 1
+        self.transport.evenement(self, "reponse", joueur=user, saisie=word, verdict="faux", reponse=None)
+        self.transport.envoyer(self.chat_id, f"⚠️ Mauvaise réponse {self.get_name(user)}. Tu peux réessayer !", parse_mode="HTML")
+
+    def skip_eliminated(self):
+        while self.players[self.current_index].id in self.eliminated:
+            self.current_index = (self.current_index + 1) % len(self.players)
+
+    def check_winner_or_continue(self):
+        alive = [p for p in self.players if p.id not in self.eliminated]
+
+        if len(alive) == 1:
+            winner = alive[0]
+            winner_name = self.get_name(winner)
+            self.transport.envoyer(self.chat_id, f"🎉 <b>{winner_name} a gagné la partie !</b>", parse_mode="HTML")
+
+            if winner.id == MOTARENA_ID:
+                vanne = random.choice(VANNES_MOTARENA)
+                self.transport.planifier(1.5, self.transport.envoyer, self.chat_id, f"💬 motArena : « {vanne} »", "HTML")
+            else:
+                self.transport.evenement(self, "victoire", joueur=winner)
+
+            self.active = False
+            # Couper le chrono à la fin de partie
+            self.arreter_chrono()
+            self.transport.evenement(self, "fin", gagnant=winner)
+        else:
+            # Couper le chrono avant de passer au joueur suivant
+            self.arreter_chrono()
+            self.current_index = (self.current_index + 1) % len(self.players)
+            self.skip_eliminated()
+            self.ask_next()
+
+    ### ━━━ Instantanés (reprise après redémarrage) ━━━
+
+    def signaler_changement(self):
+        self.transport.evenement(self, "modifiee")
+
+    def instantane(self, maintenant):
+        # État compact, sérialisable en JSON ; les délais en cours deviennent
+        # des échéances murales (maintenant = time.time() de l'appelant)
+        def echeance(tache):
+            return round(maintenant + tache.restant(), 3) if tache else None
+
+        tirage = None
+        if self.tirage is not None:
+            tirage = [len(self.tirage_pool), self.tirage.restants, list(self.tirage.echanges.items())]
+        return {
+            "v": 1,
+            "mode": self.mode,
+            "tolerance": self.tolerance,
+            "dico": self.dico_nom,
+            "joueurs": [[p.id, p.username, p.first_name] for p in self.players],
+            "tours": [p.tours for p in self.players],
+            "index": self.current_index,
+            "utilises": list(self.used_words),
+            "elimines": list(self.eliminated),
+            "actif": self.active,
+            "mot": self.current_word,
+            "reponse_motarena": self.reponse_motarena,
+            "tirage": tirage,
+            "echeance": echeance(self.timer),
+            "compte": [self.countdown_started, self.countdown_cancelled, self.countdown_seconds, echeance(self.countdown_tache)],
+            "ident": self.ident,
+        }
+
+    @classmethod
+    def depuis_instantane(cls, chat_id, transport, etat):
+        game = cls(chat_id, transport, mode=etat["mode"], tolerance=etat["tolerance"])
+        game.dico_nom = etat["dico"]
+        game.ident = etat.get("ident")
+        for (uid, username, prenom), tours in zip(etat["joueurs"], etat["tours"]):
+            game._inscrire(Joueur(uid, username, prenom, tours))
+        game.current_index = etat["index"]
+        game.used_words = set(etat["utilises"])
+        game.eliminated = set(etat["elimines"])
+        game.active = etat["actif"]
+        game.current_word = etat["mot"]
+        game.reponse_motarena = etat["reponse_motarena"]
+        if game.players:
+            game.current_player = game.players[game.current_index]
+        game.countdown_started, game.countdown_cancelled, game.countdown_seconds, echeance_compte = etat["compte"]
+        game.echeances_reprise = (etat["echeance"], echeance_compte)
+        game.tirage_reprise = etat["tirage"]
+        return game
+
+    def reprendre(self, maintenant, grace=5):
+        # Réarme les chronos avec le temps qui restait ; si l'échéance est passée
+        # pendant l'arrêt, le joueur a encore `grace` secondes
+        echeance_tour, echeance_compte = self.echeances_reprise or (None, None)
+        self.echeances_reprise = None
+
+        if self.active:
+            try:
+                self.dico = self.transport.dictionnaire(self.dico_nom)
+            except Exception:
+                self.dico_nom = DICO_STANDARD
+                self.dico = self.transport.dictionnaire(DICO_STANDARD)
+            pool = self.pool()
+            if self.tirage_reprise and self.tirage_reprise[0] == len(pool):
+                # Même dictionnaire qu'avant l'arrêt : on garde l'ordre de tirage
+                _, restants, echanges = self.tirage_reprise
+                self.tirage = Tirage(restants)
+                self.tirage.echanges = {int(i): j for i, j in echanges}
+                self.tirage_pool = pool
+            self.tirage_reprise = None
+
+            restant = grace if echeance_tour is None else max(grace, echeance_tour - maintenant)
+            nom = "motArena" if self.current_player.id == MOTARENA_ID else self.get_name(self.current_player)
+            self.transport.envoyer(
+                self.chat_id,
+                f"♻️ <b>Le bot a redémarré, la partie reprend.</b>\n<b>Tour de {nom}</b>\n"
+                f"<blockquote>Mot : <b>{self.current_word}</b>\nMode : {self.mode}</blockquote>",
+                parse_mode="HTML"
+            )
+            if self.current_player.id == MOTARENA_ID and self.reponse_motarena:
+                self.timer = self.transport.planifier(restant, self.coup_motarena, self.generation, self.reponse_motarena)
+            else:
+                self.temps_tour = restant
+                self.timer = self.transport.planifier(restant, self.timeout, self.generation)
+        elif self.countdown_started and not self.countdown_cancelled and echeance_compte is not None:
+            self.countdown_tache = self.transport.planifier(max(0, echeance_compte - maintenant), self.countdown_step)
+        # Nouvelles échéances (et dictionnaire de repli éventuel) à archiver
+        self.signaler_changement()
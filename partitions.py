@@ -0,0 +1,131 @@
+import json
+import multiprocessing
+import queue
+import threading
+import time
+
+from telebot import apihelper
+
+
+def chat_du_brut(update):
+    # Même recherche que chat_de_update, mais sur le JSON brut : le front ne désérialise rien
+    for champ in ("message", "edited_message", "channel_post", "callback_query", "my_chat_member", "chat_member"):
+        objet = update.get(champ)
+        if objet is None:
+            continue
+        if champ == "callback_query":
+            objet = objet.get("message") or {}
+        chat = objet.get("chat")
+        if chat is not None:
+            return chat.get("id")
+    return None
+
+
+def partition(chat_id, nb):
+    # Un chat appartient toujours au même processus (les updates sans chat vont au premier)
+    if chat_id is None:
+        return 0
+    return chat_id % nb
+
+
+class _Partition:
+    __slots__ = ("indice", "file", "conn", "processus", "redemarrages")
+
+    def __init__(self, indice, taille_file):
+        self.indice = indice
+        self.file = queue.Queue(maxsize=taille_file)  # côté front : survit aux relances
+        self.conn = None
+        self.processus = None
+        self.redemarrages = 0
+
+
+### ━━━ Répartition des updates entre processus ━━━
+
+class Repartiteur:
+    # Le front lit seulement l'identifiant du chat et passe le JSON au processus qui
+    # possède ce chat. Un processus tombé est relancé seul : les updates de sa
+    # partition attendent dans sa file, les autres partitions ne voient rien.
+    def __init__(self, cible, nb, taille_file=1000, surveillance=2.0, deja_vu=None):
+        self.cible = cible  # cible(indice, nb, conn), au niveau module (spawn)
+        self.deja_vu = deja_vu  # deja_vu(update_id) → True pour un renvoi de Telegram
+        self.nb = nb
+        self.surveillance = surveillance
+        self.contexte = multiprocessing.get_context("spawn")
+        self.partitions = [_Partition(i, taille_file) for i in range(nb)]
+        self.rejetes = 0
+
+    def demarrer(self):
+        for part in self.partitions:
+            self._lancer(part)
+            threading.Thread(target=self._alimenter, args=(part,), name=f"partition-{part.indice}", daemon=True).start()
+        threading.Thread(target=self._surveiller, name="repartiteur", daemon=True).start()
+
+    def _lancer(self, part):
+        lecture, ecriture = self.contexte.Pipe(duplex=False)
+        processus = self.contexte.Process(
+            target=self.cible, args=(part.indice, self.nb, lecture), name=f"partition-{part.indice}", daemon=True
+        )
+        processus.start()
+        lecture.close()
+        ancienne, part.conn, part.processus = part.conn, ecriture, processus
+        if ancienne is not None:
+            ancienne.close()
+
+    def _surveiller(self):
+        while True:
+            time.sleep(self.surveillance)
+            for part in self.partitions:
+                if not part.processus.is_alive():
+                    print(f"⚠️ Partition {part.indice} arrêtée (code {part.processus.exitcode}), relance")
+                    part.redemarrages += 1
+                    self._lancer(part)
+
+    def _alimenter(self, part):
+        # Un thread par partition : un processus lent ne bloque que sa propre file
+        while True:
+            update = part.file.get()
+            while True:
+                try:
+                    part.conn.send(update)
+                    break
+                except (OSError, ValueError):
+                    # Processus en cours de relance : l'update attend le suivant
+                    time.sleep(self.surveillance / 4)
+
+    def transmettre(self, update):
+        part = self.partitions[partition(chat_du_brut(update), self.nb)]
+        try:
+            part.file.put_nowait(update)
+        except queue.Full:
+            self.rejetes += 1
+            print(f"⚠️ Partition {part.indice} saturée, update {update.get('update_id')} abandonnée")
+            return False
+        return True
+
+    def recevoir(self, corps):
+        # Même rôle qu'IngestionWebhook.recevoir, pour la route /webhook
+        try:
+            update = json.loads(corps)
+        except ValueError as e:
+            print("❌ Update webhook illisible :", e)
+            return False
+        if self.deja_vu is not None and self.deja_vu(update.get("update_id")):
+            return False
+        return self.transmettre(update)
+
+    def relever(self, token, timeout=20):
+        # Long polling du front : les updates restent des dicts jusqu'au processus de leur chat
+        decalage = None
+        while True:
+            try:
+                updates = apihelper.get_updates(token, offset=decalage, timeout=timeout, long_polling_timeout=timeout)
+            except Exception as e:
+                print("❌ Erreur getUpdates :", e)
+                time.sleep(3)
+                continue
+            for update in updates:
+                decalage = update["update_id"] + 1
+                self.transmettre(update)
+
+    def profondeurs(self):
+        return [part.file.qsize() for part in self.partitions]
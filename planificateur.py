@@ -0,0 +1,84 @@
+import heapq
+import itertools
+import threading
+import time
+
+
+class Tache:
+    __slots__ = ("echeance", "fn", "args", "annulee")
+
+    def __init__(self, echeance, fn, args):
+        self.echeance = echeance
+        self.fn = fn
+        self.args = args
+        self.annulee = False
+
+    def annuler(self):
+        # O(1) : la tâche reste dans le tas et sera jetée à son échéance
+        self.annulee = True
+        self.fn = None
+        self.args = None
+
+    def restant(self):
+        return max(0, self.echeance - time.monotonic())
+
+
+### ━━━ Planificateur unique (un seul thread pour tous les chronos) ━━━
+
+class Planificateur:
+    # Délais de tour, compte à rebours et coups différés de motArena :
+    # un tas trié par échéance, servi par un seul thread.
+    def __init__(self):
+        self.tas = []
+        self.compteur = itertools.count()
+        self.cond = threading.Condition()
+        self.thread = None
+
+    def demarrer(self):
+        self.thread = threading.Thread(target=self._boucle, name="planificateur", daemon=True)
+        self.thread.start()
+
+    def planifier(self, delai, fn, *args):
+        tache = Tache(time.monotonic() + delai, fn, args)
+        with self.cond:
+            heapq.heappush(self.tas, (tache.echeance, next(self.compteur), tache))
+            # On ne réveille le thread que si cette tâche devient la plus proche
+            if self.tas[0][2] is tache:
+                self.cond.notify()
+        return tache
+
+    def taille(self):
+        with self.cond:
+            return len(self.tas)
+
+    def actives(self):
+        # Tâches non annulées (les annulées restent dans le tas jusqu'à leur échéance)
+        with self.cond:
+            return sum(1 for _, _, tache in self.tas if not tache.annulee)
+
+    def _prochaine(self):
+        with self.cond:
+            while True:
+                if not self.tas:
+                    self.cond.wait()
+                    continue
+                echeance, _, tache = self.tas[0]
+                if tache.annulee:
+                    heapq.heappop(self.tas)
+                    continue
+                attente = echeance - time.monotonic()
+                if attente <= 0:
+                    heapq.heappop(self.tas)
+                    return tache
+                self.cond.wait(attente)
+
+    def _boucle(self):
+        while True:
+            tache = self._prochaine()
+            fn, args = tache.fn, tache.args
+            if fn is None:
+                continue
+            try:
+                fn(*args)
+            except Exception as e:
+                print("❌ Erreur tâche planifiée :", e)
@@ -0,0 +1,144 @@
+import functools
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+
+_un_profil = threading.Lock()  # un seul échantillonnage à la fois
+
+
+### ━━━ Profilage par échantillonnage ━━━
+
+def _pile(frame):
+    etapes = []
+    while frame is not None:
+        code = frame.f_code
+        etapes.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    etapes.reverse()
+    return etapes
+
+
+def echantillonner(secondes, frequence=100):
+    # Relève la pile de chaque thread `frequence` fois par seconde pendant `secondes`.
+    # Renvoie un Counter {"thread;fichier:fonction;…": n}, ou None si un profil tourne déjà
+    if not _un_profil.acquire(blocking=False):
+        return None
+    try:
+        moi = threading.get_ident()
+        piles = Counter()
+        periode = 1 / frequence
+        fin = time.monotonic() + secondes
+        while time.monotonic() < fin:
+            noms = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == moi:
+                    continue
+                piles[";".join([noms.get(ident, str(ident))] + _pile(frame))] += 1
+            time.sleep(periode)
+        return piles
+    finally:
+        _un_profil.release()
+
+
+def repliees(piles):
+    # Format « collapsed » : une pile par ligne, directement lisible par flamegraph.pl ou speedscope
+    return "".join(f"{pile} {n}\n" for pile, n in piles.most_common())
+
+
+### ━━━ Traces des updates ━━━
+
+class _Trace:
+    __slots__ = ("nom", "attributs", "instant", "debut", "duree", "spans")
+
+    def __init__(self, nom, attributs):
+        self.nom = nom
+        self.attributs = attributs
+        self.instant = time.time()
+        self.debut = time.perf_counter()
+        self.duree = 0.0
+        self.spans = []  # (nom, décalage depuis le début, durée)
+
+
+class _Span:
+    # Gestionnaire de contexte minimal : rien n'est alloué hors d'une trace
+    __slots__ = ("traces", "nom", "racine", "trace", "debut")
+
+    def __init__(self, traces, nom, racine):
+        self.traces = traces
+        self.nom = nom
+        self.racine = racine
+        self.trace = None
+
+    def __enter__(self):
+        self.trace = getattr(self.traces.local, "courante", None)
+        if self.trace is None:
+            if self.racine:
+                self.trace = self.traces.ouvrir(self.nom, {})
+                self.racine = "ouverte"
+            return self
+        self.debut = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if self.trace is None:
+            return False
+        if self.racine == "ouverte":
+            self.traces.fermer(self.trace)
+        elif len(self.trace.spans) < self.traces.spans_max:
+            self.trace.spans.append((self.nom, self.debut - self.trace.debut, time.perf_counter() - self.debut))
+        return False
+
+
+class Traces:
+    # Une trace par update (ou par appel API hors update) ; les spans s'y accrochent
+    # via le thread courant. Les dernières traces restent dans un anneau borné.
+    def __init__(self, capacite=2000, spans_max=64):
+        self.local = threading.local()
+        self.recentes = deque(maxlen=capacite)
+        self.spans_max = spans_max
+
+    def ouvrir(self, nom, attributs):
+        trace = self.local.courante = _Trace(nom, attributs)
+        return trace
+
+    def fermer(self, trace):
+        trace.duree = time.perf_counter() - trace.debut
+        self.local.courante = None
+        self.recentes.append(trace)
+
+    def tracer(self, nom, fn, *args, **attributs):
+        # Exécute fn(*args) comme racine d'une trace (span simple si une trace est déjà ouverte)
+        if getattr(self.local, "courante", None) is not None:
+            with self.span(nom):
+                return fn(*args)
+        trace = self.ouvrir(nom, attributs)
+        try:
+            return fn(*args)
+        finally:
+            self.fermer(trace)
+
+    def span(self, nom, racine=False):
+        # racine=True : ouvre sa propre trace si aucune n'est en cours (ex. thread d'envoi)
+        return _Span(self, nom, racine)
+
+    def envelopper(self, fn, nom):
+        @functools.wraps(fn)
+        def enveloppe(*args, **kwargs):
+            with self.span(nom):
+                return fn(*args, **kwargs)
+        return enveloppe
+
+    def plus_lentes(self, n=20):
+        traces = sorted(list(self.recentes), key=lambda t: t.duree, reverse=True)[:n]
+        return [
+            {
+                "nom": t.nom,
+                **t.attributs,
+                "instant": round(t.instant, 3),
+                "ms": round(t.duree * 1000, 3),
+                "spans": [{"nom": nom, "a_ms": round(a * 1000, 3), "ms": round(d * 1000, 3)} for nom, a, d in t.spans],
+            }
+            for t in traces
+        ]
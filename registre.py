@@ -0,0 +1,118 @@
+import os
+import threading
+from collections import OrderedDict
+
+from dictionnaire import charger_dictionnaire
+
+DICO_STANDARD = "standard"
+
+
+### ━━━ Registre des dictionnaires (chargement paresseux, rechargement à chaud) ━━━
+
+class RegistreDictionnaires:
+    # Chaque dictionnaire chargé est un instantané immuable : un rechargement
+    # remplace la référence, les parties en cours gardent l'ancien instantané.
+    def __init__(self, fichier_standard="dictionnaire.json", dossier="dictionnaires", capacite=4):
+        self.fichier_standard = fichier_standard
+        self.dossier = dossier
+        self.capacite = capacite
+        self.verrou = threading.Lock()
+        self.charges = OrderedDict()  # nom → (instantané, signature des fichiers)
+        self.verrous_chargement = {}
+
+    def valide(self, nom):
+        # Un simple nom de fichier de dictionnaires/, jamais un chemin
+        if not nom or nom in (".", "..") or ".." in nom or os.path.isabs(nom):
+            return False
+        if os.sep in nom or (os.altsep and os.altsep in nom):
+            return False
+        return nom in self.disponibles()
+
+    def chemin(self, nom):
+        if nom == DICO_STANDARD:
+            return self.fichier_standard
+        if not self.valide(nom):
+            raise KeyError(nom)
+        return os.path.join(self.dossier, f"{nom}.json")
+
+    def _signature(self, nom):
+        # mtimes du JSON source et du .mdb compilé : change dès que l'un est réécrit
+        json_ = self.chemin(nom)
+        mdb = os.path.splitext(json_)[0] + ".mdb"
+        return tuple(os.path.getmtime(p) if os.path.exists(p) else None for p in (json_, mdb))
+
+    def existe(self, nom):
+        try:
+            return any(self._signature(nom))
+        except KeyError:
+            return False
+
+    def disponibles(self):
+        noms = {DICO_STANDARD}
+        if os.path.isdir(self.dossier):
+            for fichier in os.listdir(self.dossier):
+                base, extension = os.path.splitext(fichier)
+                if extension in (".json", ".mdb"):
+                    noms.add(base)
+        return sorted(noms)
+
+    def en_memoire(self, nom):
+        with self.verrou:
+            return nom in self.charges
+
+    def obtenir(self, nom=DICO_STANDARD):
+        with self.verrou:
+            entree = self.charges.get(nom)
+            if entree is not None:
+                self.charges.move_to_end(nom)
+                return entree[0]
+            verrou_nom = self.verrous_chargement.setdefault(nom, threading.Lock())
+        # Chargement hors du verrou global : les autres dictionnaires restent servis
+        with verrou_nom:
+            with self.verrou:
+                entree = self.charges.get(nom)
+            if entree is not None:
+                return entree[0]
+            return self._charger(nom)
+
+    def _charger(self, nom):
+        if not self.existe(nom):
+            raise KeyError(nom)
+        signature = self._signature(nom)
+        instantane = charger_dictionnaire(self.chemin(nom))
+        with self.verrou:
+            self.charges[nom] = (instantane, signature)
+            self.charges.move_to_end(nom)
+            while len(self.charges) > self.capacite:
+                evince, _ = self.charges.popitem(last=False)
+                print(f"♻️ Dictionnaire '{evince}' évincé de la mémoire")
+        return instantane
+
+    def recharger(self, nom=None):
+        # Remplacement atomique ; renvoie la liste des dictionnaires rechargés
+        with self.verrou:
+            noms = [nom] if nom else list(self.charges)
+        recharges = []
+        for n in noms:
+            try:
+                self._charger(n)
+                recharges.append(n)
+            except Exception as e:
+                print(f"❌ Rechargement de '{n}' impossible :", e)
+        return recharges
+
+    def surveiller(self, intervalle=10):
+        def boucle():
+            arret = threading.Event()
+            while not arret.wait(intervalle):
+                with self.verrou:
+                    charges = [(n, signature) for n, (_, signature) in self.charges.items()]
+                for nom, signature in charges:
+                    try:
+                        if self._signature(nom) != signature:
+                            if self.recharger(nom):
+                                print(f"🔄 Dictionnaire '{nom}' rechargé")
+                    except OSError:
+                        pass
+
+        threading.Thread(target=boucle, name="registre-dicos", daemon=True).start()
@@ -0,0 +1,57 @@
+import argparse
+import json
+import time
+from collections import Counter
+
+from journal import fichiers, lire, rejouer, instantane
+
+# Usage : python rejouer.py [journal/] [--chat ID] [--partie ID] [--detail]
+#   sans filtre : résumé de toutes les parties du journal (issues, verdicts, débit de relecture)
+#   --partie    : événements de la partie, puis son état final au format Game.instantane
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Relecture du journal des parties")
+    parser.add_argument("dossier", nargs="?", default="journal")
+    parser.add_argument("--chat", type=int)
+    parser.add_argument("--partie")
+    parser.add_argument("--detail", action="store_true", help="une ligne par partie")
+    args = parser.parse_args()
+
+    chemins = fichiers(args.dossier)
+    if not chemins:
+        raise SystemExit(f"❌ Aucun fichier de journal dans {args.dossier}")
+
+    if args.partie is not None:
+        filtre = json.dumps({"partie": args.partie}, ensure_ascii=False, separators=(",", ":"))[1:-1].encode("utf-8")
+        evenements = [e for e in lire(chemins, filtre) if e["partie"] == args.partie]
+        if not evenements:
+            raise SystemExit(f"❌ Partie {args.partie} absente du journal")
+        for evenement in evenements:
+            print(json.dumps(evenement, ensure_ascii=False))
+        print(json.dumps(instantane(rejouer(evenements)[args.partie]), ensure_ascii=False, indent=1))
+        raise SystemExit(0)
+
+    debut = time.perf_counter()
+    filtre = None if args.chat is None else f'"chat":{args.chat},'.encode()
+    parties = rejouer(lire(chemins, filtre), chat=args.chat)
+    duree = time.perf_counter() - debut
+    total = sum(p["evenements"] for p in parties.values())
+
+    if args.detail:
+        for p in sorted(parties.values(), key=lambda p: p["debut"]):
+            debut_partie = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(p["debut"]))
+            print(
+                f"{p['partie']}  {debut_partie}  {p['mode'] or '-'}  {len(p['joueurs'])} joueurs  "
+                f"{sum(p['tours'].values())} tours  {p['issue'] or 'en cours'}"
+                + (f" ({p['gagnant']})" if p["gagnant"] is not None else "")
+            )
+
+    issues = Counter(p["issue"] or "en cours" for p in parties.values())
+    verdicts = Counter()
+    for p in parties.values():
+        verdicts.update(p["verdicts"])
+    print(
+        f"✅ {total} événements, {len(parties)} parties, {len(chemins)} fichier(s) "
+        f"en {duree:.2f} s ({total / max(duree, 1e-9):,.0f} événements/s)"
+    )
+    print("   Issues : " + ", ".join(f"{issue} {n}" for issue, n in issues.most_common()))
+    print("   Réponses : " + ", ".join(f"{verdict} {n}" for verdict, n in verdicts.most_common()))
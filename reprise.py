@@ -0,0 +1,80 @@
+import json
+import sqlite3
+import threading
+import time
+
+
+### ━━━ Archive des parties en cours ━━━
+
+class ArchiveParties:
+    # Seules les parties modifiées depuis le dernier passage sont réécrites,
+    # toutes dans une même transaction : l'archive est toujours cohérente.
+    def __init__(self, chemin, intervalle=2.0):
+        self.intervalle = intervalle
+        self.conn = sqlite3.connect(chemin, check_same_thread=False)
+        self.verrou = threading.Lock()          # en_attente
+        self.verrou_ecriture = threading.Lock() # connexion
+        self.en_attente = {}  # chat_id → dernier état (None = partie terminée)
+        self.ecritures = 0
+        with self.verrou_ecriture:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS parties (chat_id INTEGER PRIMARY KEY, etat TEXT NOT NULL, maj REAL NOT NULL)"
+            )
+            self.conn.commit()
+
+    def demarrer(self):
+        def boucle():
+            while True:
+                time.sleep(self.intervalle)
+                try:
+                    self.vider()
+                except Exception as e:
+                    print("❌ Erreur écriture des parties :", e)
+
+        threading.Thread(target=boucle, name="archive-parties", daemon=True).start()
+
+    def noter(self, chat_id, etat):
+        # Les états successifs d'une même partie s'écrasent : une seule écriture par passage
+        with self.verrou:
+            self.en_attente[chat_id] = etat
+
+    def oublier(self, chat_id):
+        with self.verrou:
+            self.en_attente[chat_id] = None
+
+    def charger(self):
+        resultat = {}
+        with self.verrou_ecriture:
+            lignes = self.conn.execute("SELECT chat_id, etat FROM parties").fetchall()
+        for chat_id, etat in lignes:
+            try:
+                resultat[chat_id] = json.loads(etat)
+            except ValueError as e:
+                print(f"⚠️ Partie {chat_id} illisible, ignorée :", e)
+        return resultat
+
+    def vider(self):
+        with self.verrou_ecriture:
+            with self.verrou:
+                lot, self.en_attente = self.en_attente, {}
+            if not lot:
+                return
+            maintenant = time.time()
+            ecrites = [
+                (chat_id, json.dumps(etat, ensure_ascii=False, separators=(",", ":")), maintenant)
+                for chat_id, etat in lot.items() if etat is not None
+            ]
+            effacees = [(chat_id,) for chat_id, etat in lot.items() if etat is None]
+            self.conn.executemany("INSERT OR REPLACE INTO parties (chat_id, etat, maj) VALUES (?, ?, ?)", ecrites)
+            self.conn.executemany("DELETE FROM parties WHERE chat_id = ?", effacees)
+            self.conn.commit()
+            self.ecritures += len(lot)
+
+    def effacer(self):
+        with self.verrou_ecriture:
+            with self.verrou:
+                self.en_attente.clear()
+            self.conn.execute("DELETE FROM parties")
+            self.conn.commit()
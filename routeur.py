@@ -0,0 +1,50 @@
+### ━━━ Tri des updates avant dispatch ━━━
+
+class Routeur:
+    # Décide en O(1), avant tout worker, si une update peut intéresser un handler :
+    # table des commandes connues + ensemble des chats dont la partie attend une réponse.
+    def __init__(self):
+        self.commandes = frozenset()
+        self.en_jeu = set()
+        self.compteurs = {}  # décision → nombre d'updates
+
+    def charger_commandes(self, bot):
+        # À appeler une fois tous les handlers déclarés
+        commandes = set()
+        for handler in bot.message_handlers:
+            commandes.update(handler["filters"].get("commands") or ())
+        self.commandes = frozenset(commandes)
+
+    def attendre(self, chat_id):
+        self.en_jeu.add(chat_id)
+
+    def liberer(self, chat_id):
+        self.en_jeu.discard(chat_id)
+
+    def accepter(self, update):
+        if update.message is not None:
+            decision = self._trier(update.message)
+        elif update.callback_query is not None:
+            decision = "bouton"
+        else:
+            decision = "ignore_type"
+        self.compteurs[decision] = self.compteurs.get(decision, 0) + 1
+        return not decision.startswith("ignore")
+
+    def _trier(self, message):
+        if message.content_type == "document":
+            return "document"
+        texte = message.text
+        if texte is None:
+            return "ignore_type"
+        # Partie en cours : tout texte peut être une réponse
+        if message.chat.id in self.en_jeu:
+            return "reponse"
+        if texte.startswith("/"):
+            # En privé, même une commande inconnue reçoit le message de refus
+            if message.chat.type == "private":
+                return "commande"
+            mots = texte[1:].split(None, 1)
+            nom = mots[0].partition("@")[0] if mots else ""
+            return "commande" if nom in self.commandes else "ignore_commande_inconnue"
+        return "ignore_bavardage"
@@ -0,0 +1,223 @@
+import gzip
+import hashlib
+import json
+import threading
+import time
+
+from stats import normaliser
+
+SUFFIXE_INSTANTANE = ".snap.json.gz"
+SUFFIXE_DELTA = ".delta.json.gz"
+CLE_META = "sauvegarde"  # dernier hash envoyé et base des deltas, dans les méta des stats
+
+
+def empreinte(donnees):
+    # Hash du contenu, indépendant de l'ordre des clés
+    brut = json.dumps(donnees, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(brut.encode("utf-8")).hexdigest()[:16]
+
+
+def compresser(contenu):
+    return gzip.compress(json.dumps(contenu, ensure_ascii=False, separators=(",", ":")).encode("utf-8"), mtime=0)
+
+
+def decompresser(octets):
+    return json.loads(gzip.decompress(octets).decode("utf-8"))
+
+
+def appliquer_delta(base, delta):
+    etat = {uid: dict(r) for uid, r in base.items()}
+    for uid in delta.get("supprimes", ()):
+        etat.pop(uid, None)
+    etat.update(normaliser(delta.get("modifies", {})))
+    return etat
+
+
+### ━━━ Sauvegardes incrémentales ━━━
+
+class Sauvegarde:
+    # Un instantané complet de temps en temps, puis des deltas cumulés depuis cet
+    # instantané : restaurer = instantané + dernier delta. Rien n'est envoyé tant
+    # que le contenu n'a pas changé, et une rafale de victoires ne fait qu'un envoi.
+    def __init__(self, stats, envois, destinataires, prefixe="victoires",
+                 calme=10, attente_max=60, intervalle_min=60,
+                 deltas_max=24, age_max=6 * 3600):
+        self.stats = stats
+        self.envois = envois
+        self.destinataires = list(destinataires)
+        self.prefixe = prefixe
+        self.calme = calme
+        self.attente_max = attente_max
+        self.intervalle_min = intervalle_min
+        self.deltas_max = deltas_max
+        self.age_max = age_max
+        self.cond = threading.Condition()
+        self.sale = False
+        self.premiere_modif = 0.0
+        self.derniere_modif = 0.0
+        self.dernier_envoi = 0.0
+        self.base = None           # dernier instantané envoyé (ou restauré)
+        self.base_hash = None
+        self.base_instant = 0.0
+        self.deltas = 0
+        self.dernier_hash = None   # contenu du dernier envoi
+        self.envoyes = 0
+        self.ignores = 0
+        self.duree = 0.0           # durée et taille compressée du dernier envoi
+        self.taille = 0
+
+    def demarrer(self):
+        threading.Thread(target=self._boucle, name="sauvegarde", daemon=True).start()
+
+    def reprendre(self):
+        # Au démarrage : un contenu identique au dernier envoi n'est pas renvoyé,
+        # et s'il en était l'instantané, les deltas repartent de cette base
+        try:
+            etat = json.loads(self.stats.lire_meta(CLE_META) or "null")
+        except ValueError:
+            etat = None
+        donnees = self.stats.tous()
+        hash_ = empreinte(donnees)
+        if not etat:
+            if not donnees:
+                # Premier démarrage, store vide : rien à envoyer avant une vraie modification
+                with self.cond:
+                    self.dernier_hash = hash_
+            return
+        if hash_ != etat.get("dernier"):
+            return
+        with self.cond:
+            self.dernier_hash = hash_
+            if etat.get("base") == hash_:
+                age = max(0.0, time.time() - etat.get("base_date", 0))
+                self.base, self.base_hash, self.base_instant, self.deltas = donnees, hash_, time.monotonic() - age, 0
+
+    def _memoriser(self):
+        # Seul le processus qui envoie garde la trace de ses envois
+        if not self.destinataires:
+            return
+        with self.cond:
+            etat = {
+                "dernier": self.dernier_hash,
+                "base": self.base_hash,
+                "base_date": round(time.time() - (time.monotonic() - self.base_instant), 3),
+            }
+        self.stats.ecrire_meta(CLE_META, json.dumps(etat))
+
+    def noter(self):
+        # Appelé à chaque modification des stats : ne fait que lever le drapeau
+        with self.cond:
+            maintenant = time.monotonic()
+            if not self.sale:
+                self.sale = True
+                self.premiere_modif = maintenant
+            self.derniere_modif = maintenant
+            self.cond.notify()
+
+    def _echeance(self):
+        # Calme après la rafale, sans dépasser attente_max, et pas plus d'un envoi par intervalle_min
+        fin = min(self.derniere_modif + self.calme, self.premiere_modif + self.attente_max)
+        return max(fin, self.dernier_envoi + self.intervalle_min)
+
+    def _boucle(self):
+        while True:
+            with self.cond:
+                while not self.sale:
+                    self.cond.wait()
+                while time.monotonic() < self._echeance():
+                    self.cond.wait(self._echeance() - time.monotonic())
+                self.sale = False
+                self.dernier_envoi = time.monotonic()
+            try:
+                self.sauvegarder()
+            except Exception as e:
+                print("❌ Erreur sauvegarde :", e)
+                self.noter()
+
+    def sauvegarder(self):
+        debut = time.perf_counter()
+        donnees = self.stats.tous()
+        hash_ = empreinte(donnees)
+        if hash_ == self.dernier_hash:
+            self.ignores += 1
+            return None
+
+        horodatage = time.strftime("%Y%m%d-%H%M%S")
+        delta = None
+        with self.cond:
+            base, base_hash = self.base, self.base_hash
+        if base is not None and self.deltas < self.deltas_max and time.monotonic() - self.base_instant < self.age_max:
+            modifies = {uid: r for uid, r in donnees.items() if base.get(uid) != r}
+            supprimes = [uid for uid in base if uid not in donnees]
+            # Un delta presque aussi gros que l'instantané ne vaut pas la peine
+            if len(modifies) + len(supprimes) < len(donnees) // 2:
+                delta = {"type": "delta", "base": base_hash, "hash": hash_,
+                         "modifies": modifies, "supprimes": supprimes}
+
+        if delta is None:
+            nom = f"{self.prefixe}-{horodatage}{SUFFIXE_INSTANTANE}"
+            contenu = {"type": "instantane", "hash": hash_, "donnees": donnees}
+            legende = f"📦 Sauvegarde complète ({len(donnees)} joueurs)"
+            with self.cond:
+                self.base, self.base_hash, self.base_instant, self.deltas = donnees, hash_, time.monotonic(), 0
+        else:
+            nom = f"{self.prefixe}-{horodatage}{SUFFIXE_DELTA}"
+            contenu = delta
+            legende = f"🧩 Delta depuis {base_hash} ({len(delta['modifies'])} joueurs modifiés)"
+            with self.cond:
+                self.deltas += 1
+
+        octets = compresser(contenu)
+        for chat_id in self.destinataires:
+            self.envois.envoyer_document(chat_id, octets, nom, caption=legende)
+        with self.cond:
+            self.dernier_hash = hash_
+        self._memoriser()
+        self.envoyes += 1
+        self.duree = time.perf_counter() - debut
+        self.taille = len(octets)
+        return nom
+
+    def restaurer(self, nom_fichier, octets):
+        # Renvoie les données complètes à remettre en place, ou lève ValueError
+        if not nom_fichier.endswith(".gz"):
+            # Ancien victoires.json complet : le prochain envoi sera un instantané
+            donnees = normaliser(json.loads(octets))
+            with self.cond:
+                self.base = self.base_hash = self.dernier_hash = None
+            self._memoriser()
+            return donnees
+
+        try:
+            contenu = decompresser(octets)
+        except (OSError, EOFError) as e:
+            raise ValueError(f"archive illisible ({e})")
+        if contenu.get("type") == "instantane":
+            donnees = normaliser(contenu["donnees"])
+            if empreinte(donnees) != contenu.get("hash"):
+                raise ValueError("instantané corrompu (hash différent)")
+            self._rebaser(donnees)
+            return donnees
+
+        if contenu.get("type") == "delta":
+            with self.cond:
+                base, base_hash = self.base, self.base_hash
+            if base is None or contenu.get("base") != base_hash:
+                raise ValueError(f"ce delta s'applique à l'instantané {contenu.get('base')} : envoie-le d'abord")
+            donnees = appliquer_delta(base, contenu)
+            if empreinte(donnees) != contenu.get("hash"):
+                raise ValueError("delta corrompu (hash différent)")
+            with self.cond:
+                self.dernier_hash = contenu["hash"]
+            self._memoriser()
+            return donnees
+
+        raise ValueError("fichier de sauvegarde inconnu")
+
+    def _rebaser(self, donnees):
+        # Les deltas suivants partiront de l'état restauré, sans le renvoyer
+        hash_ = empreinte(donnees)
+        with self.cond:
+            self.base, self.base_hash, self.base_instant, self.deltas = donnees, hash_, time.monotonic(), 0
+            self.dernier_hash = hash_
+        self._memoriser()
@@ -0,0 +1,275 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+def normaliser_record(record):
+    # Anciennes sauvegardes : un simple entier = nombre de victoires
+    if isinstance(record, int):
+        return {"victoires": record, "defaites": 0}
+    return {"victoires": record.get("victoires", 0), "defaites": record.get("defaites", 0)}
+
+
+def normaliser(donnees):
+    return {str(uid): normaliser_record(record) for uid, record in donnees.items()}
+
+
+### ━━━ Stockage des statistiques ━━━
+
+class StockageStats:
+    # Interface commune : tous les records renvoyés sont déjà normalisés.
+    # observateur(secondes) reçoit la durée de chaque écriture sur disque (commit ou fichier)
+    observateur = None
+
+    def _observer(self, debut):
+        if self.observateur is not None:
+            self.observateur(time.perf_counter() - debut)
+
+    def taille_octets(self):
+        raise NotImplementedError
+
+    def lire(self, uid):
+        raise NotImplementedError
+
+    def incrementer(self, uid, victoires=0, defaites=0):
+        raise NotImplementedError
+
+    def tous(self):
+        raise NotImplementedError
+
+    def compter(self):
+        raise NotImplementedError
+
+    def remplacer(self, donnees):
+        raise NotImplementedError
+
+    def lire_meta(self, cle):
+        raise NotImplementedError
+
+    def ecrire_meta(self, cle, valeur):
+        raise NotImplementedError
+
+    def vider(self):
+        pass
+
+    def fermer(self):
+        self.vider()
+
+    def exporter_json(self):
+        return json.dumps(self.tous(), ensure_ascii=False, indent=2).encode("utf-8")
+
+    def _demarrer_vidage(self, intervalle):
+        self._arret = threading.Event()
+
+        def boucle():
+            while not self._arret.wait(intervalle):
+                try:
+                    self.vider()
+                except Exception as e:
+                    print("❌ Erreur écriture stats :", e)
+
+        threading.Thread(target=boucle, name="stats-vidage", daemon=True).start()
+
+
+class StatsSQLite(StockageStats):
+    # Upserts par joueur dans une transaction ouverte, validée par lots.
+    # Partagée entre processus : lot=1, aucune transaction ne reste ouverte
+    def __init__(self, chemin, fichier_json=None, intervalle=2.0, lot=200):
+        self.chemin = chemin
+        self.conn = sqlite3.connect(chemin, check_same_thread=False, timeout=30)
+        self.verrou = threading.Lock()
+        self.lot = lot
+        self.en_attente = 0
+        self.joueurs_modifies = False  # transaction en cours touchant la table joueurs
+        with self.verrou:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS joueurs ("
+                "uid TEXT PRIMARY KEY, victoires INTEGER NOT NULL DEFAULT 0, defaites INTEGER NOT NULL DEFAULT 0)"
+            )
+            self.conn.execute("CREATE TABLE IF NOT EXISTS meta (cle TEXT PRIMARY KEY, valeur TEXT)")
+            self.conn.commit()
+        if fichier_json:
+            self._importer_json(fichier_json)
+        self._demarrer_vidage(intervalle)
+
+    def _importer_json(self, fichier_json):
+        # Import unique de l'ancien victoires.json (records int ou dict)
+        with self.verrou:
+            deja = self.conn.execute("SELECT 1 FROM meta WHERE cle = 'import_json'").fetchone()
+        if deja or not os.path.exists(fichier_json):
+            return
+        with open(fichier_json, "r", encoding="utf-8") as f:
+            donnees = json.load(f)
+        with self.verrou:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO joueurs (uid, victoires, defaites) VALUES (?, ?, ?)",
+                [(uid, r["victoires"], r["defaites"]) for uid, r in normaliser(donnees).items()]
+            )
+            self.conn.execute("INSERT INTO meta (cle, valeur) VALUES ('import_json', ?)", (fichier_json,))
+            self.conn.commit()
+
+    def lire(self, uid):
+        with self.verrou:
+            ligne = self.conn.execute("SELECT victoires, defaites FROM joueurs WHERE uid = ?", (str(uid),)).fetchone()
+        if ligne is None:
+            return {"victoires": 0, "defaites": 0}
+        return {"victoires": ligne[0], "defaites": ligne[1]}
+
+    def incrementer(self, uid, victoires=0, defaites=0):
+        with self.verrou:
+            self.conn.execute(
+                "INSERT INTO joueurs (uid, victoires, defaites) VALUES (?, ?, ?) "
+                "ON CONFLICT(uid) DO UPDATE SET victoires = victoires + excluded.victoires, "
+                "defaites = defaites + excluded.defaites",
+                (str(uid), victoires, defaites)
+            )
+            self.joueurs_modifies = True
+            self.en_attente += 1
+            if self.en_attente >= self.lot:
+                self._valider()
+
+    def tous(self):
+        with self.verrou:
+            lignes = self.conn.execute("SELECT uid, victoires, defaites FROM joueurs").fetchall()
+        return {uid: {"victoires": v, "defaites": d} for uid, v, d in lignes}
+
+    def compter(self):
+        with self.verrou:
+            return self.conn.execute("SELECT COUNT(*) FROM joueurs").fetchone()[0]
+
+    def remplacer(self, donnees):
+        with self.verrou:
+            self.conn.execute("DELETE FROM joueurs")
+            self.conn.executemany(
+                "INSERT INTO joueurs (uid, victoires, defaites) VALUES (?, ?, ?)",
+                [(uid, r["victoires"], r["defaites"]) for uid, r in normaliser(donnees).items()]
+            )
+            self.joueurs_modifies = True
+            self._valider()
+
+    def version(self):
+        # +1 à chaque commit qui touche la table joueurs, quelle que soit la connexion ;
+        # les méta et les autres tables de la même base (annuaire) n'y changent rien
+        with self.verrou:
+            ligne = self.conn.execute("SELECT valeur FROM meta WHERE cle = 'version_stats'").fetchone()
+        return int(ligne[0]) if ligne else 0
+
+    def lire_meta(self, cle):
+        with self.verrou:
+            ligne = self.conn.execute("SELECT valeur FROM meta WHERE cle = ?", (cle,)).fetchone()
+        return ligne[0] if ligne else None
+
+    def ecrire_meta(self, cle, valeur):
+        with self.verrou:
+            self.conn.execute("INSERT OR REPLACE INTO meta (cle, valeur) VALUES (?, ?)", (cle, valeur))
+            self._valider()
+
+    def _valider(self):
+        debut = time.perf_counter()
+        if self.joueurs_modifies:
+            # Dans la même transaction que les écritures qu'il signale
+            self.conn.execute(
+                "INSERT INTO meta (cle, valeur) VALUES ('version_stats', '1') "
+                "ON CONFLICT(cle) DO UPDATE SET valeur = CAST(valeur AS INTEGER) + 1"
+            )
+            self.joueurs_modifies = False
+        self.conn.commit()
+        self.en_attente = 0
+        self._observer(debut)
+
+    def taille_octets(self):
+        # Base + WAL pas encore reporté dans la base
+        return sum(os.path.getsize(p) for p in (self.chemin, self.chemin + "-wal") if os.path.exists(p))
+
+    def vider(self):
+        with self.verrou:
+            if self.en_attente:
+                self._valider()
+
+
+class StatsJSON(StockageStats):
+    # Ancien format, mais en mémoire + écriture atomique différée
+    def __init__(self, chemin, intervalle=2.0):
+        self.chemin = chemin
+        self.verrou = threading.Lock()
+        self.verrou_ecriture = threading.Lock()
+        self.sale = False
+        self.donnees = {}
+        if os.path.exists(chemin):
+            with open(chemin, "r", encoding="utf-8") as f:
+                self.donnees = normaliser(json.load(f))
+        # Méta (état des sauvegardes…) dans un petit fichier à côté
+        self.chemin_meta = os.path.splitext(chemin)[0] + ".meta.json"
+        self.meta = {}
+        if os.path.exists(self.chemin_meta):
+            with open(self.chemin_meta, "r", encoding="utf-8") as f:
+                self.meta = json.load(f)
+        self._demarrer_vidage(intervalle)
+
+    def lire(self, uid):
+        with self.verrou:
+            return dict(self.donnees.get(str(uid), {"victoires": 0, "defaites": 0}))
+
+    def incrementer(self, uid, victoires=0, defaites=0):
+        with self.verrou:
+            record = self.donnees.setdefault(str(uid), {"victoires": 0, "defaites": 0})
+            record["victoires"] += victoires
+            record["defaites"] += defaites
+            self.sale = True
+
+    def tous(self):
+        with self.verrou:
+            return {uid: dict(r) for uid, r in self.donnees.items()}
+
+    def compter(self):
+        with self.verrou:
+            return len(self.donnees)
+
+    def remplacer(self, donnees):
+        with self.verrou:
+            self.donnees = normaliser(donnees)
+            self.sale = True
+        self.vider()
+
+    def lire_meta(self, cle):
+        with self.verrou:
+            return self.meta.get(cle)
+
+    def ecrire_meta(self, cle, valeur):
+        with self.verrou_ecriture:
+            with self.verrou:
+                self.meta[cle] = valeur
+                contenu = json.dumps(self.meta, ensure_ascii=False)
+            temporaire = self.chemin_meta + ".tmp"
+            with open(temporaire, "w", encoding="utf-8") as f:
+                f.write(contenu)
+            os.replace(temporaire, self.chemin_meta)
+
+    def vider(self):
+        with self.verrou_ecriture:
+            with self.verrou:
+                if not self.sale:
+                    return
+                contenu = json.dumps(self.donnees, ensure_ascii=False, indent=2)
+                self.sale = False
+            debut = time.perf_counter()
+            temporaire = self.chemin + ".tmp"
+            with open(temporaire, "w", encoding="utf-8") as f:
+                f.write(contenu)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temporaire, self.chemin)
+            self._observer(debut)
+
+    def taille_octets(self):
+        return os.path.getsize(self.chemin) if os.path.exists(self.chemin) else 0
+
+
+def ouvrir_stats(backend, chemin_sqlite, chemin_json, lot=200):
+    if backend == "json":
+        return StatsJSON(chemin_json)
+    return StatsSQLite(chemin_sqlite, fichier_json=chemin_json, lot=lot)
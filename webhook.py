@@ -0,0 +1,66 @@
+import queue
+import threading
+from collections import OrderedDict
+
+import telebot
+
+
+### ━━━ Réception des updates par webhook ━━━
+
+class IngestionWebhook:
+    # La route Flask ne fait que poser l'update dans une file bornée :
+    # Telegram reçoit son 200 tout de suite, un pool de workers traite ensuite.
+    def __init__(self, bot, nb_workers=4, taille_file=1000, memoire_ids=5000):
+        self.bot = bot
+        self.file = queue.Queue(maxsize=taille_file)
+        self.nb_workers = nb_workers
+        self.memoire_ids = memoire_ids
+        self.ids_vus = OrderedDict()
+        self.verrou = threading.Lock()
+        self.doublons = 0
+        self.rejetes = 0
+        self.workers = []
+
+    def demarrer(self):
+        for i in range(self.nb_workers):
+            t = threading.Thread(target=self._boucle, name=f"webhook-{i}", daemon=True)
+            t.start()
+            self.workers.append(t)
+
+    def recevoir(self, corps):
+        try:
+            update = telebot.types.Update.de_json(corps)
+        except Exception as e:
+            print("❌ Update webhook illisible :", e)
+            return False
+
+        if self.deja_vu(update.update_id):
+            return False
+
+        try:
+            self.file.put_nowait(update)
+        except queue.Full:
+            self.rejetes += 1
+            print(f"⚠️ File webhook pleine, update {update.update_id} abandonnée")
+            return False
+        return True
+
+    def deja_vu(self, update_id):
+        # 🔁 Telegram renvoie la même update s'il a cru à un échec : on l'ignore
+        # (aussi utilisé par le front du mode processus, qui ne passe pas par la file)
+        with self.verrou:
+            if update_id in self.ids_vus:
+                self.doublons += 1
+                return True
+            self.ids_vus[update_id] = None
+            if len(self.ids_vus) > self.memoire_ids:
+                self.ids_vus.popitem(last=False)
+        return False
+
+    def _boucle(self):
+        while True:
+            update = self.file.get()
+            try:
+                self.bot.process_new_updates([update])
+            except Exception as e:
+                print("❌ Erreur traitement update :", e)